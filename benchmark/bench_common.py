@@ -0,0 +1,53 @@
+"""
+Helpers shared by the benchmark scripts of the package
+"""
+import os
+import sys
+import time
+import json
+import resource
+
+SRC_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src')
+PACKAGE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+if SRC_PATH not in sys.path:
+    sys.path.insert(0, SRC_PATH)
+
+
+def peak_rss_kb():
+    """ Peak resident memory of the current process in KB """
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def time_call(function, repeat=5, *args, **kwargs):
+    """ Calls the function several times and returns (best time, last result) """
+    best = None
+    result = None
+    for _ in range(repeat):
+        start = time.time()
+        result = function(*args, **kwargs)
+        elapsed = time.time() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best, result
+
+
+def write_results(path, results):
+    """ Saves the results of a benchmark as JSON so different runs can be compared """
+    if path == "":
+        return
+    with open(path, 'w') as f:
+        json.dump(results, f, indent=2, sort_keys=True)
+    print("Results saved in " + path)
+
+
+def print_table(header, rows):
+    """ Prints the rows aligned in columns """
+    widths = [len(h) for h in header]
+    for row in rows:
+        for i, cell in enumerate(row):
+            widths[i] = max(widths[i], len(str(cell)))
+    line = "  ".join(h.ljust(widths[i]) for i, h in enumerate(header))
+    print(line)
+    print("-" * len(line))
+    for row in rows:
+        print("  ".join(str(cell).ljust(widths[i]) for i, cell in enumerate(row)))
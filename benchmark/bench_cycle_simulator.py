@@ -0,0 +1,69 @@
+#!/usr/bin/env python
+"""
+Offline cycle time of the assembly sequence of each data folder with CycleSimulator, for one or more layouts (launch
+files with the static frames of the CAD files), and throughput of the simulation of random feasible variants of the
+sequence. ROS does not need to be running (PyKDL and the messages of the package are needed).
+The durations of the operations can be given in a JSON file: {"RC": [fixed seconds, seconds per guide], ...}
+
+    python bench_cycle_simulator.py [--folders data_routing_v1 data_icps] [--launch launcher.launch other.launch]
+                                    [--durations durations.json] [--variants 10000] [--json results.json]
+"""
+import os
+import glob
+import json
+import argparse
+import bench_common
+from offline_layout import loadLayout, DEFAULT_LAUNCH
+from cycle_simulator import CycleSimulator, DEFAULT_DURATIONS
+
+
+def simulate_folder(folder, launch_file, durations, speed, tool_change_s, variants, repeat):
+    dict_elvez, jigs_complete_dict = loadLayout(folder, launch_file)
+    simulator = CycleSimulator(dict_elvez.list_seq, jigs_complete_dict, dict_elvez, durations, speed, tool_change_s)
+    result = simulator.breakdown(range(len(dict_elvez.list_seq)))
+    result['operations'] = len(dict_elvez.list_seq)
+    orders = simulator.randomVariants(variants, seed=0)
+    elapsed, cycles = bench_common.time_call(simulator.simulate, repeat, orders)
+    result['variants'] = variants
+    result['variants_per_s'] = variants / elapsed if elapsed > 0 else float('inf')
+    result['best_variant_s'] = float(cycles.min())
+    result['worst_variant_s'] = float(cycles.max())
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--folders', nargs='*', default=None, help="Data folders, by default the data_routing_v* ones of the package")
+    parser.add_argument('--launch', nargs='*', default=[DEFAULT_LAUNCH], help="Launch files with the layouts to compare")
+    parser.add_argument('--durations', default="", help="JSON file with the durations of each type of operation")
+    parser.add_argument('--speed', type=float, default=0.25, help="Speed of the end effector (m/s)")
+    parser.add_argument('--tool-change', type=float, default=8.0, help="Seconds of a tool change")
+    parser.add_argument('--variants', type=int, default=10000, help="Random feasible orders simulated per folder")
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--json', default="")
+    args = parser.parse_args()
+
+    durations = dict(DEFAULT_DURATIONS)
+    if args.durations != "":
+        with open(args.durations) as f:
+            durations.update((key, tuple(value)) for key, value in json.load(f).items())
+    folders = args.folders
+    if folders is None:
+        folders = sorted(glob.glob(os.path.join(bench_common.PACKAGE_PATH, 'data_routing_v*')))
+    results = {}
+    rows = []
+    for folder in folders:
+        name = os.path.basename(os.path.normpath(folder))
+        for launch_file in args.launch:
+            layout = os.path.basename(launch_file)
+            result = simulate_folder(folder, launch_file, durations, args.speed, args.tool_change, args.variants, args.repeat)
+            results.setdefault(name, {})[layout] = result
+            rows.append([name, layout, result['operations'], "%.1f" % result['cycle_s'], "%.1f" % result['work_s'],
+                         "%.1f" % (result['operation_travel_s'] + result['transition_s']),
+                         "%.1f - %.1f" % (result['best_variant_s'], result['worst_variant_s']), "%.0f" % result['variants_per_s']])
+    bench_common.print_table(['folder', 'layout', 'operations', 'cycle (s)', 'work (s)', 'travel (s)', 'variants (s)', 'variants/s'], rows)
+    bench_common.write_results(args.json, {'durations': durations, 'speed': args.speed, 'tool_change_s': args.tool_change, 'folders': results})
+
+
+if __name__ == '__main__':
+    main()
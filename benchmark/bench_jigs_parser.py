@@ -0,0 +1,117 @@
+#!/usr/bin/env python
+"""
+Parsing time of the jigs definition file on a synthetic library (default: 10k guides).
+It compares the current single pass reader with a copy of the previous one (two parses and findall per pose block),
+and the time needed to create all the PyKDL frames afterwards.
+
+    python bench_jigs_parser.py [--jigs 500] [--guides 20] [--json results.json]
+"""
+import os
+import shutil
+import argparse
+import tempfile
+import PyKDL
+import xmltodict
+import xml.etree.ElementTree as ET
+import bench_common
+from collectData import InputFilesDataCollector
+
+POSE = ''.join('<pos name="%s">%s</pos>' % (name, value) for name, value in (('x', 1), ('y', 6), ('z', 80))) + \
+       ''.join('<rot name="%s">%s</rot>' % (name, value) for name, value in (('R', 0), ('P', 0), ('Y', 0.3)))
+
+
+def write_library(path, jigs, guides):
+    with open(path, 'w') as f:
+        f.write('<?xml version="1.0"?>\n<data>\n')
+        for j in range(jigs):
+            f.write('<jig model="%07d" xdim="10" xcol1="0" xcol2="10" ydim="30" ycol1="-8" ycol2="22" zdim="100">\n' % j)
+            for g in range(guides):
+                f.write('<guide couple="%d"><key length="10" gap="10" height="54.5" height_corner="54.5" xcol1="0" xcol2="10" ycol1="-14" ycol2="24">%s</key>'
+                        '<collision xdim="7.2" ydim="19.8" zdim="10">%s</collision></guide>\n' % (g + 1, POSE, POSE))
+            f.write('<tape_spot id="1" guide="1" xdim="20" ydim="20" zdim="10">%s</tape_spot>\n' % POSE.replace('>1<', '>30<'))
+            f.write('</jig>\n')
+        f.write('</data>\n')
+
+
+def legacy_frame(element):
+    values = {}
+    for child in element.findall('pos') + element.findall('rot'):
+        values[child.get('name')] = float(child.text)
+    tf = PyKDL.Frame()
+    tf.p = PyKDL.Vector(values['x']/1000, values['y']/1000, values['z']/1000)
+    tf.M.DoRotX(values['R'])
+    tf.M.DoRotY(values['P'])
+    tf.M.DoRotZ(values['Y'])
+    return tf
+
+
+def legacy_parse(path):
+    """ Condensed copy of the previous reader for jigs: xmltodict + ElementTree parses and one frame per findall """
+    with open(path) as fd:
+        xmltodict.parse(fd.read())
+    root = ET.parse(path).getroot()
+    main_dic = {}
+    for code in root.findall('jig'):
+        couples = {}
+        for guide in code.findall('guide'):
+            key_dict = {}
+            for key in guide.findall('key'):
+                tf = legacy_frame(key)
+                size = [float(key.get(att))/1000 for att in ('length', 'gap', 'height')]
+                center = tf * PyKDL.Frame(PyKDL.Vector(size[0]/2, size[1]/2, size[2]/2))
+                key_dict = {'frame': tf, 'center_pose': center}
+            colli_dict = {}
+            for colli in guide.findall('collision'):
+                colli_dict = {'frame': legacy_frame(colli)}
+            couples[guide.get('couple')] = {'key': key_dict, 'collision': colli_dict}
+        tape_spots = {}
+        for tape in code.findall('tape_spot'):
+            tape_spots[tape.get('id')] = {'frame': legacy_frame(tape)}
+        main_dic[code.get('model')] = {'guides': couples, 'tape_spots': tape_spots}
+    return main_dic
+
+
+def read_all_frames(dict_jigs):
+    """ Forces the creation of every PyKDL frame of the parsed library """
+    count = 0
+    for model in dict_jigs.values():
+        for guide in model['guides'].values():
+            guide['key']['frame']
+            guide['key']['center_pose']
+            guide['collision']['frame']
+            count += 3
+        for spot in model['tape_spots'].values():
+            spot['frame']
+            spot['center_pose']
+            count += 2
+    return count
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--jigs', type=int, default=500)
+    parser.add_argument('--guides', type=int, default=20, help='Guides per jig')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--json', default='', help='File where the results are saved')
+    args = parser.parse_args()
+
+    collector = InputFilesDataCollector.__new__(InputFilesDataCollector)
+    tmp_dir = tempfile.mkdtemp()
+    try:
+        path = os.path.join(tmp_dir, 'Jigs_definition_v2.xml')
+        write_library(path, args.jigs, args.guides)
+        legacy_s, _ = bench_common.time_call(legacy_parse, args.repeat, path)
+        parse_s, dict_jigs = bench_common.time_call(collector._createJigsDict, args.repeat, path)
+        frames_s, frames = bench_common.time_call(read_all_frames, 1, dict_jigs)
+    finally:
+        shutil.rmtree(tmp_dir)
+
+    results = {'jigs': args.jigs, 'guides': args.jigs * args.guides, 'frames': frames,
+               'legacy_parse_s': legacy_s, 'parse_s': parse_s, 'frames_on_demand_s': frames_s}
+    bench_common.print_table(['guides', 'legacy ms', 'parse ms', 'all frames ms'],
+                             [[results['guides'], "%.1f" % (legacy_s * 1000), "%.1f" % (parse_s * 1000), "%.1f" % (frames_s * 1000)]])
+    bench_common.write_results(args.json, {'benchmark': 'jigs_parser', 'results': results})
+
+
+if __name__ == '__main__':
+    main()
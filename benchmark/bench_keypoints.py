@@ -0,0 +1,139 @@
+#!/usr/bin/env python
+"""
+Time and peak RSS of building the keypoints of many instances of the same jig model:
+deep copies of the template with one PyKDL product per frame (previous create_jigs_struct) vs
+shared KeypointTemplate + KeypointInstance (only the instance frame is stored, keypoints are computed on demand).
+Then the startup of UC2_handler on a synthetic data folder (synthetic_data.py): jigs structure, service responses,
+compiled sequence and markers. Each variant runs in its own process. The numbers depend on PyKDL: the module used is
+printed and saved with the results, and the benchmark stops if it is not the compiled extension.
+
+    python bench_keypoints.py [--instances 400] [--guides 50] [--scale medium] [--allow-stand-in] [--json results.json]
+"""
+import os
+import sys
+import copy
+import json
+import shutil
+import argparse
+import tempfile
+import subprocess
+import numpy as np
+import PyKDL
+import bench_common
+import bench_jigs_parser
+from collectData import InputFilesDataCollector
+from frame_arrays import posesToMatrices, matrixToFrame
+from platform_model import KeypointTemplate, KeypointInstance, GUIDE_FRAMES
+
+VARIANTS = ['deepcopy', 'template', 'template_read_all']
+
+
+def deepcopy_guides(definition, jig_frame):
+    """ Copy of the previous composition of the guides in create_jigs_struct """
+    guides_dic = {}
+    for guide in definition['guides']:
+        guides_dic[guide] = copy.deepcopy(definition['guides'][guide])
+        guides_dic[guide]['key']['frame'] = jig_frame * guides_dic[guide]['key']['frame']
+        guides_dic[guide]['key']['center_pose'] = jig_frame * guides_dic[guide]['key']['center_pose']
+        guides_dic[guide]['collision']['frame'] = jig_frame * guides_dic[guide]['collision']['frame']
+    return guides_dic
+
+
+def run_child(variant, jigs_file, instances):
+    collector = InputFilesDataCollector.__new__(InputFilesDataCollector)
+    definition = list(collector._createJigsDict(jigs_file).values())[0]
+    matrices = posesToMatrices(np.column_stack((np.random.uniform(0, 1, (instances, 3)), np.zeros((instances, 2)), np.random.uniform(-3, 3, instances))))
+    frames = [matrixToFrame(matrix) for matrix in matrices]
+    rss_before = bench_common.peak_rss_kb()
+    start = bench_common.time.time()
+    if variant == 'deepcopy':
+        components = [deepcopy_guides(definition, frame) for frame in frames]
+    else:
+        template = KeypointTemplate(definition['guides'], GUIDE_FRAMES)
+        components = [KeypointInstance(template, matrix) for matrix in matrices]
+        if variant == 'template_read_all':
+            for guides in components:
+                for guide in guides:
+                    guides[guide]['key']['frame']
+                    guides[guide]['key']['center_pose']
+                    guides[guide]['collision']['frame']
+    elapsed = bench_common.time.time() - start
+    print(json.dumps({'time_s': elapsed, 'peak_rss_kb': bench_common.peak_rss_kb() - rss_before}))
+
+
+def run_startup(folder):
+    """ Stages of the startup of UC2_handler after loading the input files, as in main_UC2 """
+    from offline_layout import launchFrames, rootFrame, DEFAULT_LAUNCH
+    from uc2_model import UC2Model, ROOT_FRAMES, CAD_KINDS
+    from run_benchmarks import FILES
+    model = UC2Model(folder, CAD_KINDS, *FILES)
+    frames = launchFrames(DEFAULT_LAUNCH)
+    root_frames = dict((kind, rootFrame(frames, ROOT_FRAMES[kind])) for kind in model.kinds())
+    rss_before = bench_common.peak_rss_kb()
+    stages = []
+    for name, function in [('create_jigs_struct', lambda: model.build(root_frames)), ('ServiceResponses', model.responses),
+                           ('CompiledSequence', model.compiled), ('markers', lambda: model.createMarkers('file://' + folder + '/stl/'))]:
+        start = bench_common.time.time()
+        function()
+        stages.append([name, bench_common.time.time() - start])
+    print(json.dumps({'stages_s': stages, 'peak_rss_kb': bench_common.peak_rss_kb() - rss_before}))
+
+
+def pykdl_module():
+    """ File of the PyKDL module and whether it is the compiled extension """
+    path = getattr(PyKDL, '__file__', '')
+    return path, os.path.splitext(path)[1] == '.so'
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--instances', type=int, default=400)
+    parser.add_argument('--guides', type=int, default=50, help='Guides of the jig model')
+    parser.add_argument('--scale', default='medium', help="Synthetic data folder of the startup (synthetic_data.SCALES), 'none' to skip it")
+    parser.add_argument('--allow-stand-in', action='store_true', help="Run even if PyKDL is not the compiled extension (the results are marked)")
+    parser.add_argument('--json', default='', help='File where the results are saved')
+    parser.add_argument('--child', nargs=2, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        if args.child[0] == 'startup':
+            run_startup(args.child[1])
+        else:
+            run_child(args.child[0], args.child[1], args.instances)
+        return
+
+    pykdl_path, compiled = pykdl_module()
+    print("PyKDL: " + pykdl_path)
+    if not compiled:
+        if not args.allow_stand_in:
+            sys.exit("PyKDL is not the compiled extension, the times would not be those of the real library (--allow-stand-in to run anyway)")
+        print("WARNING: PyKDL is not the compiled extension, the times are not those of the real library")
+    tmp_dir = tempfile.mkdtemp()
+    results = {'instances': args.instances, 'guides': args.guides, 'pykdl': pykdl_path, 'pykdl_compiled': compiled}
+    try:
+        jigs_file = os.path.join(tmp_dir, 'Jigs_definition_v2.xml')
+        bench_jigs_parser.write_library(jigs_file, 1, args.guides)
+        for variant in VARIANTS:
+            output = subprocess.check_output([sys.executable, os.path.abspath(__file__), '--child', variant, jigs_file, '--instances', str(args.instances)])
+            results[variant] = json.loads(output.decode().strip().splitlines()[-1])
+        if args.scale != 'none':
+            from synthetic_data import writeDataset, SCALES
+            folder = os.path.join(tmp_dir, args.scale)
+            results['startup_dataset'] = writeDataset(folder, **SCALES[args.scale])
+            output = subprocess.check_output([sys.executable, os.path.abspath(__file__), '--child', 'startup', folder])
+            results['startup'] = json.loads(output.decode().strip().splitlines()[-1])
+    finally:
+        shutil.rmtree(tmp_dir)
+
+    bench_common.print_table(['variant', 'ms', 'peak RSS KB'],
+                             [[variant, "%.1f" % (results[variant]['time_s'] * 1000), results[variant]['peak_rss_kb']] for variant in VARIANTS])
+    if 'startup' in results:
+        print("")
+        rows = [[name, "%.1f" % (seconds * 1000)] for name, seconds in results['startup']['stages_s']]
+        rows.append(['total (peak RSS %d KB)' % results['startup']['peak_rss_kb'], "%.1f" % (sum(seconds for name, seconds in results['startup']['stages_s']) * 1000)])
+        bench_common.print_table(['startup ' + args.scale, 'ms'], rows)
+    bench_common.write_results(args.json, {'benchmark': 'keypoints', 'results': results})
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,125 @@
+#!/usr/bin/env python
+"""
+Bandwidth and CPU of the platform markers on a synthetic platform with many jigs and keypoints.
+The previous loop, restamping and publishing the full MarkerArray at 10 Hz, is compared with MarkerServer, which sends the full
+array once to each subscriber and then only the markers that change.
+The messages are serialized instead of published, so no roscore is needed, but the ROS messages must be available.
+
+    python bench_marker_server.py [--jigs 500] [--keypoints-jig 20] [--batched] [--changed 0.01] [--json results.json]
+"""
+import copy
+import random
+import argparse
+from io import BytesIO
+import PyKDL
+import numpy as np
+import rospy
+import bench_common
+import visualization
+from visualization_msgs.msg import MarkerArray
+from marker_server import MarkerServer
+
+
+class SerializingPublisher(object):
+    """ Replaces the publisher of the markers, serializing the messages that would be published """
+    def __init__(self):
+        self.messages = 0
+        self.bytes = 0
+
+    def publish(self, msg):
+        buff = BytesIO()
+        msg.serialize(buff)
+        self.messages += 1
+        self.bytes += buff.tell()
+
+
+def random_frame(size):
+    frame = PyKDL.Frame()
+    frame.p = PyKDL.Vector(random.uniform(0, size), random.uniform(0, size), random.uniform(0, size))
+    frame.M.DoRotZ(random.uniform(-3.14, 3.14))
+    return frame
+
+
+def create_markers(jigs, keypoints_jig, batched):
+    """ One mesh for each jig and the spheres of its keypoints (one SPHERE_LIST if batched), as built by main_UC2 """
+    markers = []
+    for i in range(jigs):
+        jig_name = 'ID%06dplatform' % (i + 1)
+        marker = visualization.createMesh('ID000001platform', mesh_path='file:///home/user/catkin_ws/src/elvez_pkg/data_UI/stl/platform/ID%06d.STL' % (i + 1), transform=random_frame(1), color=visualization.Color(0.5, 0.5, 0.5, 1))
+        marker.id = len(markers)
+        marker.text = 'ID%06d' % (i + 1)
+        markers.append(marker)
+        if batched:
+            keypoints = [visualization.createKeypointList(frame_id=jig_name, positions=np.random.uniform(0, 0.1, (keypoints_jig, 3)), color=visualization.Color(1, 0, 0, 1))]
+        else:
+            keypoints = [visualization.createKeypoint(frame_id=jig_name, transform=random_frame(0.1), color=visualization.Color(1, 0, 0, 1)) for j in range(keypoints_jig)]
+        for keypoint in keypoints:
+            keypoint.id = len(markers)
+            keypoint.lifetime = rospy.Duration(0)
+            keypoint.text = "Keypoint guide"
+            markers.append(keypoint)
+    return markers
+
+
+def legacy_tick(publisher, marker_array):
+    """ One iteration of the loop of main_UC2 before MarkerServer """
+    current_time = rospy.get_rostime()
+    for marker in marker_array.markers:
+        marker.header.stamp = current_time
+    publisher.publish(marker_array)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--jigs', type=int, default=500)
+    parser.add_argument('--keypoints-jig', type=int, default=20, help='Keypoints of each jig')
+    parser.add_argument('--rate', type=float, default=10.0, help='Frequency of the previous loop in Hz')
+    parser.add_argument('--batched', action='store_true', help='One SPHERE_LIST marker for the keypoints of each jig')
+    parser.add_argument('--changed', type=float, default=0.01, help='Fraction of the markers modified in an update of the model')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--json', default='', help='File where the results are saved')
+    args = parser.parse_args()
+
+    #The stamps come from the wall clock, as no node is initialized
+    rospy.rostime.set_rostime_initialized(True)
+    random.seed(0)
+    np.random.seed(0)
+    markers = create_markers(args.jigs, args.keypoints_jig, args.batched)
+
+    #Before: the full array on every tick
+    legacy_publisher = SerializingPublisher()
+    legacy_s, _ = bench_common.time_call(legacy_tick, args.repeat, legacy_publisher, MarkerArray(markers=markers))
+    tick_bytes = legacy_publisher.bytes // legacy_publisher.messages
+
+    #After: the full array once for each subscriber, and the modified markers when the model changes
+    marker_server = MarkerServer('bench_markers')
+    marker_server.publisher = SerializingPublisher()
+    initial_s, _ = bench_common.time_call(marker_server.update, 1, markers)
+    subscriber = SerializingPublisher()
+    marker_server.peer_subscribe('bench_markers', None, subscriber.publish)
+    idle_s, _ = bench_common.time_call(marker_server.update, args.repeat, markers)
+    modified = list(markers)
+    for i in random.sample(range(len(markers)), max(1, int(len(markers) * args.changed))):
+        modified[i] = copy.deepcopy(markers[i])
+        modified[i].pose.position.z += 0.01
+    sent_before = marker_server.publisher.bytes
+    delta_s, delta_markers = bench_common.time_call(marker_server.update, 1, modified)
+    delta_bytes = marker_server.publisher.bytes - sent_before
+
+    results = {'benchmark': 'marker_server', 'markers': len(markers), 'batched': args.batched, 'rate_hz': args.rate,
+               'legacy_bytes_per_s': tick_bytes * args.rate, 'legacy_cpu_percent': 100.0 * legacy_s * args.rate,
+               'server_full_array_bytes': subscriber.bytes, 'server_initial_update_ms': initial_s * 1000,
+               'server_unchanged_update_ms': idle_s * 1000, 'server_delta_markers': delta_markers,
+               'server_delta_bytes': delta_bytes, 'server_delta_update_ms': delta_s * 1000}
+    rows_table = [['previous loop', "%.1f KB/s" % (tick_bytes * args.rate / 1024.0), "%.1f %% of a core" % results['legacy_cpu_percent']],
+                  ['server, new subscriber', "%.1f KB once" % (subscriber.bytes / 1024.0), "-"],
+                  ['server, model unchanged', "0 KB/s", "%.2f ms per check" % results['server_unchanged_update_ms']],
+                  ['server, %d markers changed' % delta_markers, "%.1f KB once" % (delta_bytes / 1024.0), "%.2f ms" % results['server_delta_update_ms']]]
+
+    print("%d markers" % len(markers))
+    bench_common.print_table(['case', 'bandwidth', 'CPU'], rows_table)
+    bench_common.write_results(args.json, results)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+#!/usr/bin/env python
+"""
+Mesh loading of the op2 layout (stl/platform_op2, combs and ATC of data_UI) with one resource per marker vs the
+resources shared by canonicalMeshes. RViz is not needed: each resource is read and kept in memory once, as the mesh
+loader of RViz does with every different mesh_resource, so the time and peak RSS are those of the meshes it would load.
+Each measurement runs in its own process.
+
+    python bench_mesh_dedup.py [--folder data_UI] [--stl-dirs platform_op2 combs ATC] [--json results.json]
+"""
+import os
+import sys
+import glob
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import subprocess
+import bench_common
+from model_cache import ModelCache
+from stl_mesh import canonicalMeshes, readStl
+
+
+def run_child(mode, paths, cache_dir):
+    """ Loads the meshes in this process and prints the measurements as JSON """
+    rss_before = bench_common.peak_rss_kb()
+    start = time.time()
+    if mode == 'shared':
+        model_cache = ModelCache(os.path.dirname(cache_dir), cache_dir)
+        mesh_map = model_cache.getOrBuild('meshes', paths, lambda: canonicalMeshes(paths, model_cache.digests))
+        resources = [mesh_map[path] for path in paths]
+    else:
+        resources = paths
+    map_s = time.time() - start
+    loaded = {}
+    for resource in resources:
+        if resource not in loaded:
+            loaded[resource] = readStl(resource)
+    elapsed = time.time() - start
+    print(json.dumps({'time_s': elapsed, 'map_s': map_s, 'resources': len(loaded), 'bytes': sum(os.path.getsize(path) for path in loaded),
+                      'peak_rss_kb': bench_common.peak_rss_kb() - rss_before}))
+
+
+def measure(mode, paths, cache_dir):
+    output = subprocess.check_output([sys.executable, os.path.abspath(__file__), '--child', mode, cache_dir] + paths)
+    return json.loads(output.decode().strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--folder', default='data_UI', help='Data folder, relative to the package')
+    parser.add_argument('--stl-dirs', nargs='+', default=['platform_op2', 'combs', 'ATC'], help='Folders of stl/ with the meshes of the layout')
+    parser.add_argument('--json', default='', help='File where the results are saved')
+    parser.add_argument('--child', nargs='+', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args.child[0], args.child[2:], args.child[1])
+        return
+
+    paths = []
+    for stl_dir in args.stl_dirs:
+        paths += sorted(glob.glob(os.path.join(bench_common.PACKAGE_PATH, args.folder, 'stl', stl_dir, 'ID*.STL')))
+    cache_dir = tempfile.mkdtemp()
+    try:
+        results = {'per_marker': measure('per_marker', paths, cache_dir),
+                   'shared_cold': measure('shared', paths, cache_dir),
+                   'shared_cached': measure('shared', paths, cache_dir)}
+    finally:
+        shutil.rmtree(cache_dir)
+
+    rows = []
+    for name in ['per_marker', 'shared_cold', 'shared_cached']:
+        result = results[name]
+        rows.append([name, result['resources'], "%.1f" % (result['bytes'] / 1024.0), "%.1f" % (result['map_s'] * 1000), "%.1f" % (result['time_s'] * 1000), result['peak_rss_kb']])
+    print("%d mesh markers" % len(paths))
+    bench_common.print_table(['mode', 'resources', 'KB loaded', 'map ms', 'total ms', 'peak RSS KB'], rows)
+    results.update({'benchmark': 'mesh_dedup', 'markers': len(paths)})
+    bench_common.write_results(args.json, results)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,49 @@
+#!/usr/bin/env python
+"""
+Builds the levels of detail of the STL meshes of a data folder (the ones shown by the mesh markers, stl/*/ID*.STL)
+and reports the triangles and file sizes before and after fitting them in a triangle budget.
+The variants are saved in the same cache used by main_UC2, so running it offline avoids computing them on load.
+
+    python bench_mesh_lod.py [--folder data_UI] [--budget 100000] [--json results.json]
+"""
+import os
+import glob
+import time
+import argparse
+import bench_common
+from model_cache import CACHE_DIR_NAME
+from stl_mesh import MeshLOD
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--folder', default='data_UI', help='Data folder, relative to the package')
+    parser.add_argument('--budget', type=int, default=100000, help='Maximum triangles of all the meshes')
+    parser.add_argument('--json', default='', help='File where the results are saved')
+    args = parser.parse_args()
+
+    folder = os.path.join(bench_common.PACKAGE_PATH, args.folder)
+    paths = sorted(glob.glob(os.path.join(folder, 'stl', '*', 'ID*.STL')))
+    mesh_lod = MeshLOD(os.path.join(folder, CACHE_DIR_NAME, 'meshes'))
+    start = time.time()
+    for path in paths:
+        mesh_lod.levels(path)
+    build_s = time.time() - start
+    start = time.time()
+    chosen = mesh_lod.assignLevels(paths, args.budget)
+    assign_s = time.time() - start
+    rows, totals = mesh_lod.report(paths, chosen)
+
+    rows_table = []
+    for path, row in zip(paths, rows):
+        rows_table.append([os.path.relpath(path, folder), row[1], "%.1f" % (row[2] / 1024.0), row[3], "%.1f" % (row[4] / 1024.0)])
+    rows_table.append(['total', totals[0], "%.1f" % (totals[1] / 1024.0), totals[2], "%.1f" % (totals[3] / 1024.0)])
+    bench_common.print_table(['mesh', 'triangles', 'KB', 'triangles LOD', 'KB LOD'], rows_table)
+    print("Levels of detail built or loaded in %.2f s, assigned in %.1f ms" % (build_s, assign_s * 1000))
+    bench_common.write_results(args.json, {'benchmark': 'mesh_lod', 'folder': args.folder, 'budget': args.budget, 'build_s': build_s, 'assign_ms': assign_s * 1000,
+                                           'meshes': [dict(zip(['mesh', 'triangles', 'bytes', 'lod_triangles', 'lod_bytes'], row)) for row in rows],
+                                           'totals': dict(zip(['triangles', 'bytes', 'lod_triangles', 'lod_bytes'], totals))})
+
+
+if __name__ == '__main__':
+    main()
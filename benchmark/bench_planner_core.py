@@ -0,0 +1,84 @@
+#!/usr/bin/env python
+"""
+Latency from a command of the planner (a service callback) to the start of its handling. Before, the callbacks set
+global flags polled by a loop at --rate Hz; with PlannerCore they post the command to a queue consumed by a worker thread.
+The commands are posted from another thread at random intervals, as the service callbacks of rospy do. No roscore is needed.
+
+    python bench_planner_core.py [--commands 200] [--rate 10] [--json results.json]
+"""
+import time
+import random
+import argparse
+import threading
+import bench_common
+from planner_core import PlannerCore
+
+
+class PollingLoop(object):
+    """ Main loop of the planners before PlannerCore: a flag set by the callback and checked at a fixed rate """
+    def __init__(self, rate):
+        self.period = 1.0 / rate
+        self.flag = False
+        self.posted = None
+        self.latencies = []
+        self.running = True
+        self.thread = threading.Thread(target=self._run)
+        self.thread.daemon = True
+        self.thread.start()
+
+    def post(self):
+        self.posted = time.time()
+        self.flag = True
+
+    def _run(self):
+        while self.running:
+            if self.flag:
+                self.latencies.append(time.time() - self.posted)
+                self.flag = False
+            time.sleep(self.period)
+
+
+def post_commands(post, commands, min_interval, max_interval):
+    for _ in range(commands):
+        time.sleep(random.uniform(min_interval, max_interval))
+        post()
+
+
+def summary(latencies):
+    latencies = sorted(1000.0 * latency for latency in latencies)
+    return {'commands': len(latencies), 'mean_ms': sum(latencies) / len(latencies), 'p50_ms': latencies[len(latencies) // 2],
+            'p95_ms': latencies[min(len(latencies) - 1, int(0.95 * len(latencies)))], 'max_ms': latencies[-1]}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--commands', type=int, default=200)
+    parser.add_argument('--rate', type=float, default=10.0, help='Frequency of the polling loop in Hz')
+    parser.add_argument('--json', default='', help='File where the results are saved')
+    args = parser.parse_args()
+
+    random.seed(0)
+    #The interval between commands is longer than the period of the loop, so no command is merged with the previous one
+    min_interval, max_interval = 1.5 / args.rate, 3.0 / args.rate
+    loop = PollingLoop(args.rate)
+    post_commands(loop.post, args.commands, min_interval, max_interval)
+    time.sleep(2.0 / args.rate)
+    loop.running = False
+
+    core = PlannerCore('bench_planner_core')
+    core.register('execute', lambda: None)
+    core.start()
+    post_commands(lambda: core.post('execute'), args.commands, min_interval, max_interval)
+    core.shutdown()
+
+    results = {'benchmark': 'planner_core', 'rate_hz': args.rate, 'polling': summary(loop.latencies), 'queue': summary(core.latencies['execute'])}
+    rows_table = []
+    for name, mode in [('polling loop', 'polling'), ('PlannerCore', 'queue')]:
+        result = results[mode]
+        rows_table.append([name, result['commands'], "%.2f" % result['mean_ms'], "%.2f" % result['p50_ms'], "%.2f" % result['p95_ms'], "%.2f" % result['max_ms']])
+    bench_common.print_table(['planner', 'commands', 'mean ms', 'p50 ms', 'p95 ms', 'max ms'], rows_table)
+    bench_common.write_results(args.json, results)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,62 @@
+#!/usr/bin/env python
+"""
+Idle time between skills with and without prefetching the next operations. The sequence is dispatched as planner.py does,
+getting each operation from an OperationPrefetcher and then sleeping --skill-s seconds in place of the skill manager.
+The idle time is the time waiting for each operation, with depth 0 every operation is resolved when it is requested.
+Launch the handler with the layout to measure (e.g. launcher.launch) and run this script in another terminal.
+
+    python bench_prefetch.py [--depth 3] [--skill-s 0.2] [--cycles 3] [--json results.json]
+"""
+import time
+import argparse
+import rospy
+import bench_common
+from elvez_pkg.srv import resolve_operation, resolve_operationRequest
+from service_client import ServiceClient
+from operation_prefetcher import OperationPrefetcher
+from bench_service_client import HANDLER
+
+
+def run(depth, skill_s, cycles):
+    """ Dispatches the whole sequence cycles times, returns the prefetcher """
+    services = ServiceClient()
+    resolve = lambda index: services.call(HANDLER + 'resolve_operation', resolve_operation, resolve_operationRequest(index=index))
+    #Connection and first response of the handler, not measured
+    resolve(0)
+    prefetcher = OperationPrefetcher(resolve, depth)
+    index = 0
+    for _ in range(cycles):
+        while True:
+            prefetcher.moveTo(index)
+            operation = prefetcher.get(index)
+            time.sleep(skill_s)
+            index = operation.index
+            if operation.end or not operation.success:
+                break
+    return prefetcher
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--depth', type=int, default=3, help='Operations prefetched')
+    parser.add_argument('--skill-s', type=float, default=0.2, help='Seconds of each simulated skill')
+    parser.add_argument('--cycles', type=int, default=3, help='Times the whole sequence is dispatched')
+    parser.add_argument('--json', default='', help='File where the results are saved')
+    args = parser.parse_args()
+
+    rospy.init_node('bench_prefetch', anonymous=True)
+    results = {'benchmark': 'prefetch', 'skill_s': args.skill_s, 'cycles': args.cycles, 'modes': {}}
+    rows_table = []
+    for depth in [0, args.depth]:
+        prefetcher = run(depth, args.skill_s, args.cycles)
+        waits = [1000.0 * wait for wait in prefetcher.wait_s]
+        results['modes'][depth] = {'operations': len(waits), 'prefetched': prefetcher.hits, 'idle_mean_ms': sum(waits) / len(waits),
+                                   'idle_max_ms': max(waits), 'idle_total_ms': sum(waits)}
+        rows_table.append([depth, len(waits), prefetcher.hits, "%.2f" % (sum(waits) / len(waits)), "%.2f" % max(waits), "%.1f" % sum(waits)])
+
+    bench_common.print_table(['depth', 'operations', 'prefetched', 'idle mean ms', 'idle max ms', 'idle total ms'], rows_table)
+    bench_common.write_results(args.json, results)
+
+
+if __name__ == '__main__':
+    main()
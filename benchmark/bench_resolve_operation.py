@@ -0,0 +1,69 @@
+#!/usr/bin/env python
+"""
+Dispatch latency of each operation of the sequence with the info calls that planner.py made before (index_operation,
+then connector, guide and tray for PC, a cable_info per cable and a guide_info per spot for RC, taping spot for T) and
+with the single resolve_operation call. Both use persistent proxies, so the difference is the number of round trips.
+Launch the handler with the layout to measure (e.g. launcher.launch) and run this script in another terminal.
+The sequence index of the handler is moved by the benchmark.
+
+    python bench_resolve_operation.py [--repeat 5] [--json results.json]
+"""
+import time
+import argparse
+import rospy
+import bench_common
+from elvez_pkg.srv import *
+from service_client import ServiceClient
+from bench_service_client import HANDLER, dispatch, percentile
+
+
+def resolve(services, index):
+    return services.call(HANDLER + 'resolve_operation', resolve_operation, resolve_operationRequest(index=index))
+
+
+def time_dispatch(function, services, index, repeat):
+    """ Dispatch times (ms) of an operation and the service calls made in each dispatch """
+    times = []
+    calls = sum(len(latencies) for latencies in services.latencies.values())
+    for _ in range(repeat):
+        start = time.time()
+        function(services, index)
+        times.append(1000.0 * (time.time() - start))
+    return times, (sum(len(latencies) for latencies in services.latencies.values()) - calls) // repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=5, help='Dispatches of each operation')
+    parser.add_argument('--json', default='', help='File where the results are saved')
+    args = parser.parse_args()
+
+    rospy.init_node('bench_resolve_operation', anonymous=True)
+    services = ServiceClient()
+    #The first calls wait for the services and connect, they are not measured
+    operations = [resolve(services, 0)]
+    dispatch(services, 0)
+    while not operations[-1].end:
+        operations.append(resolve(services, len(operations)))
+
+    results = {'benchmark': 'resolve_operation', 'operations': []}
+    rows_table = []
+    for index, operation in enumerate(operations):
+        several_ms, several_calls = time_dispatch(dispatch, services, index, args.repeat)
+        single_ms, _ = time_dispatch(resolve, services, index, args.repeat)
+        result = {'index': index, 'type': operation.type, 'labels': len(operation.label), 'spots': len(operation.spot), 'cables': len(operation.cables),
+                  'calls_before': several_calls, 'before_ms': percentile(several_ms, 0.5), 'resolve_ms': percentile(single_ms, 0.5)}
+        results['operations'].append(result)
+        rows_table.append([index, operation.type, result['labels'], result['spots'], result['cables'], several_calls, "%.2f" % result['before_ms'], "%.2f" % result['resolve_ms']])
+
+    #The longest routes first
+    rows_table.sort(key=lambda row: (row[1] != 'RC', -row[3]))
+    bench_common.print_table(['index', 'operation', 'labels', 'spots', 'cables', 'calls before', 'before ms', 'resolve ms'], rows_table)
+    results['before_total_ms'] = sum(result['before_ms'] for result in results['operations'])
+    results['resolve_total_ms'] = sum(result['resolve_ms'] for result in results['operations'])
+    print("Whole sequence (p50 of each operation): %.1f ms before, %.1f ms with resolve_operation" % (results['before_total_ms'], results['resolve_total_ms']))
+    bench_common.write_results(args.json, results)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+#!/usr/bin/env python
+"""
+World frames of a synthetic scene (default: 50k transforms, depth 10): walking the parents of each transform
+and multiplying PyKDL frames one at a time (as create_jigs_struct did) vs the batched pass of SceneArrays.
+
+    python bench_scene_arrays.py [--transforms 50000] [--depth 10] [--json results.json]
+"""
+import argparse
+import numpy as np
+import PyKDL
+import bench_common
+from elvez_platform import SceneArrays
+from frame_arrays import posesToMatrices, matrixToFrame
+
+
+def synthetic_scene(count, depth, seed=0):
+    """ Random forest whose chains are at most depth transforms long """
+    random = np.random.RandomState(seed)
+    parents = -np.ones(count, dtype=int)
+    levels = np.zeros(count, dtype=int)
+    for i in range(1, count):
+        parent = random.randint(0, i)
+        if levels[parent] < depth - 1:
+            parents[i] = parent
+            levels[i] = levels[parent] + 1
+    poses = np.column_stack((random.uniform(-1, 1, (count, 3)), random.uniform(-np.pi, np.pi, (count, 3))))
+    return parents, posesToMatrices(poses)
+
+
+def walk_parents(parents, frames, base):
+    """ Previous approach: every transform multiplies the frames of its whole chain """
+    world = []
+    for i in range(len(parents)):
+        frame = frames[i]
+        parent = parents[i]
+        while parent >= 0:
+            frame = frames[parent] * frame
+            parent = parents[parent]
+        world.append(base * frame)
+    return world
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--transforms', type=int, default=50000)
+    parser.add_argument('--depth', type=int, default=10)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--json', default='', help='File where the results are saved')
+    args = parser.parse_args()
+
+    parents, local = synthetic_scene(args.transforms, args.depth)
+    frames = [matrixToFrame(matrix) for matrix in local]
+    base = np.eye(4)
+    base[:3, 3] = [0.5, -0.2, 0.7]
+
+    walk_s, walked = bench_common.time_call(walk_parents, 1, parents, frames, matrixToFrame(base))
+    build_s, arrays = bench_common.time_call(SceneArrays, args.repeat, parents, local)
+    batched_s, world = bench_common.time_call(arrays.worldMatrices, args.repeat, base)
+    error = max(abs(walked[i].p[k] - world[i, k, 3]) for i in range(0, len(world), max(1, len(world) // 1000)) for k in range(3))
+
+    results = {'transforms': args.transforms, 'depth': args.depth, 'walk_parents_s': walk_s,
+               'scene_arrays_build_s': build_s, 'batched_world_s': batched_s, 'max_position_error': error}
+    bench_common.print_table(['transforms', 'depth', 'walk ms', 'arrays build ms', 'batched ms', 'max error'],
+                             [[args.transforms, args.depth, "%.1f" % (walk_s * 1000), "%.1f" % (build_s * 1000), "%.1f" % (batched_s * 1000), "%.2e" % error]])
+    bench_common.write_results(args.json, {'benchmark': 'scene_arrays', 'results': results})
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,114 @@
+#!/usr/bin/env python
+"""
+Compilation of a synthetic assembly sequence and latency of the index_operation service: the response built on every
+request from the sequence list, as the callback did before, against the lookup in the CompiledSequence.
+Needs the messages of elvez_pkg, so the workspace must be built and sourced.
+
+    python bench_sequence_compiler.py [--operations 5000] [--jigs 200] [--route 20] [--json results.json]
+"""
+import random
+import argparse
+import bench_common
+from bench_service_responses import create_jigs_dict, random_frame
+from service_responses import ServiceResponses
+from sequence_compiler import CompiledSequence
+from elvez_pkg.msg import spot_data
+from elvez_pkg.srv import index_operationResponse
+
+TRAYS = 8  #Trays of the box of the harnesses
+
+
+class SyntheticData(object):
+    """ The parts of InputFilesDataCollector used by ServiceResponses and CompiledSequence """
+    def __init__(self, operations, jigs, guides, spots, route):
+        self.dict_components = {'connector': {}, 'device': {}, 'cable': {}}
+        self.dict_WH = {}
+        self.connector_WH = {}  #connector: WH where it is the first connector
+        self.list_seq = []
+        for i in range(operations):
+            jig = 'J%d' % random.randint(1, jigs)
+            operation_type = random.choice(['PC', 'RC', 'T'])
+            if operation_type == 'PC':
+                label = 'CON%d' % i
+                self.dict_components['connector'][label] = {'color': 'red', 'reference': 'R', 'model': 'M', 'xdim': 0.01, 'ydim': 0.01, 'zdim': 0.01}
+                self.dict_WH['WH%d' % i] = {'box': 'B1', 'tray': str(i % TRAYS + 1), 'first_con': label, 'end_con': {}}
+                self.connector_WH[label] = 'WH%d' % i
+                self.list_seq.append({'operation': 'PC', 'label': [label], 'spot': [{'jig': jig, 'couple': 'G%d' % random.randint(1, guides), 'side': 'L'}]})
+            elif operation_type == 'RC':
+                label = 'CA%d' % i
+                self.dict_components['cable'][label] = {'color': 'blue', 'length': 1.0, 'diameter': 0.002}
+                route_spots = [{'jig': 'J%d' % random.randint(1, jigs), 'couple': 'G%d' % random.randint(1, guides)} for _ in range(route)]
+                self.list_seq.append({'operation': 'RC', 'label': [label], 'spot': route_spots})
+            else:
+                self.list_seq.append({'operation': 'T', 'label': [], 'spot': [{'jig': jig, 'tape_spot': 'T%d' % random.randint(1, spots)}]})
+
+    def findConnectorCables(self, label):
+        if label in self.connector_WH:
+            return [(self.connector_WH[label], [])]
+        return []
+
+    def findCable(self, label):
+        return None
+
+    def findTrayWH(self, box, tray):
+        return None
+
+
+def rebuilt_index_operation(list_seq, index):
+    """ Copy of the response built by index_operation_callback before CompiledSequence """
+    resp = index_operationResponse()
+    resp.type = list_seq[index]['operation']
+    for label in list_seq[index]['label']:
+        resp.label.append(label)
+    for spot in list_seq[index]['spot']:
+        new_spot = spot_data()
+        new_spot.jig = spot['jig']
+        if list_seq[index]['operation'] == 'T':
+            new_spot.id = spot['tape_spot']
+        else:
+            new_spot.id = spot['couple']
+            if list_seq[index]['operation'] == 'PC':
+                new_spot.side = spot['side']
+        resp.spot.append(new_spot)
+    index += 1
+    if index >= len(list_seq):
+        index = 0
+        resp.end = True
+    else:
+        resp.end = False
+    resp.index = index
+    resp.success = True
+    return resp
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--operations', type=int, default=5000)
+    parser.add_argument('--jigs', type=int, default=200)
+    parser.add_argument('--guides', type=int, default=12, help='Guides of each jig')
+    parser.add_argument('--spots', type=int, default=6, help='Taping spots of each jig')
+    parser.add_argument('--route', type=int, default=20, help='Spots of each RC operation')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--json', default='', help='File where the results are saved')
+    args = parser.parse_args()
+
+    random.seed(0)
+    jigs_complete_dict = create_jigs_dict(args.jigs, args.guides, args.spots)
+    jigs_complete_dict['B1'] = {'trays': dict((str(t + 1), {'xdim': 0.1, 'ydim': 0.1, 'zdim': 0.05, 'frame': random_frame(), 'center_pose': random_frame()}) for t in range(TRAYS))}
+    data = SyntheticData(args.operations, args.jigs, args.guides, args.spots, args.route)
+    service_responses = ServiceResponses(jigs_complete_dict, data)
+    compile_s, compiled = bench_common.time_call(CompiledSequence, 1, service_responses)
+
+    indexes = [random.randrange(args.operations) for _ in range(1000)]
+    rebuilt_s, _ = bench_common.time_call(lambda: [rebuilt_index_operation(data.list_seq, index) for index in indexes], args.repeat)
+    lookup_s, _ = bench_common.time_call(lambda: [compiled.indexOperation(index) for index in indexes], args.repeat)
+
+    results = {'benchmark': 'sequence_compiler', 'operations': args.operations, 'route': args.route, 'compile_s': compile_s, 'errors': len(compiled.errors),
+               'rebuilt_us': rebuilt_s * 1000, 'lookup_us': lookup_s * 1000}
+    print("%d operations compiled in %.2f s, %d reference errors" % (args.operations, compile_s, len(compiled.errors)))
+    bench_common.print_table(['index_operation', 'us per call'], [['rebuilt per request', "%.1f" % (rebuilt_s * 1000)], ['compiled lookup', "%.2f" % (lookup_s * 1000)]])
+    bench_common.write_results(args.json, results)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,62 @@
+#!/usr/bin/env python
+"""
+Reorders the assembly sequence of each data folder with SequenceOptimizer and reports the estimated travel time of the
+end effector in file order and in the optimized order. The model is built offline with the frames of launcher.launch,
+so ROS does not need to be running (PyKDL and the messages of the package are needed).
+
+    python bench_sequence_optimizer.py [--folders data_routing_v1 data_routing_v2] [--launch launcher.launch]
+                                       [--speed 0.25] [--tool-change 8] [--write] [--json results.json]
+"""
+import os
+import glob
+import argparse
+import bench_common
+from offline_layout import loadLayout, DEFAULT_LAUNCH
+from sequence_optimizer import SequenceOptimizer, writeSequence
+
+OPTIMIZED_FILE = 'Assembly_sequence_optimized.csv'
+
+
+def optimize_folder(folder, launch_file, speed, tool_change_s, repeat, write):
+    dict_elvez, jigs_complete_dict = loadLayout(folder, launch_file)
+    optimizer = SequenceOptimizer(dict_elvez.list_seq, jigs_complete_dict, dict_elvez, speed, tool_change_s)
+    elapsed, order = bench_common.time_call(optimizer.optimize, repeat)
+    internal = float(optimizer.internalTravel().sum())
+    before = optimizer.cost(range(len(order))) + internal
+    after = optimizer.cost(order) + internal
+    if write:
+        writeSequence(os.path.join(folder, 'Assembly_sequence.csv'), order, os.path.join(folder, OPTIMIZED_FILE))
+    return {'operations': len(order), 'order': [int(i) for i in order], 'feasible': optimizer.isFeasible(order),
+            'travel_before_s': before, 'travel_after_s': after, 'saving_s': before - after,
+            'saving_pct': 100.0 * (before - after) / before if before > 0 else 0.0, 'optimize_ms': 1000.0 * elapsed}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--folders', nargs='*', default=None, help="Data folders, by default the data_routing_v* ones of the package")
+    parser.add_argument('--launch', default=DEFAULT_LAUNCH, help="Launch file with the static frames of the CAD files")
+    parser.add_argument('--speed', type=float, default=0.25, help="Speed of the end effector (m/s)")
+    parser.add_argument('--tool-change', type=float, default=8.0, help="Seconds of a tool change")
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--write', action='store_true', help="Write " + OPTIMIZED_FILE + " in each folder")
+    parser.add_argument('--json', default="")
+    args = parser.parse_args()
+
+    folders = args.folders
+    if folders is None:
+        folders = sorted(glob.glob(os.path.join(bench_common.PACKAGE_PATH, 'data_routing_v*')))
+    results = {}
+    rows = []
+    for folder in folders:
+        name = os.path.basename(os.path.normpath(folder))
+        result = optimize_folder(folder, args.launch, args.speed, args.tool_change, args.repeat, args.write)
+        results[name] = result
+        rows.append([name, result['operations'], "%.1f" % result['travel_before_s'], "%.1f" % result['travel_after_s'],
+                     "%.1f (%.1f%%)" % (result['saving_s'], result['saving_pct']), "%.2f" % result['optimize_ms'],
+                     " ".join(str(i + 1) for i in result['order'])])
+    bench_common.print_table(['folder', 'operations', 'file order (s)', 'optimized (s)', 'saving', 'optimize (ms)', 'order'], rows)
+    bench_common.write_results(args.json, {'speed': args.speed, 'tool_change_s': args.tool_change, 'folders': results})
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,91 @@
+#!/usr/bin/env python
+"""
+Operation dispatch latency of the planner: for each operation of the sequence, the index_operation call and the info
+calls that planner.py makes to get its keypoints (connector, guide and tray for PC, cables and guides for RC, taping spot
+for T). It is measured with a new proxy for every call, as the planners did before, and with the persistent proxies of ServiceClient.
+Launch the handler with the layout to measure (e.g. launcher.launch) and run this script in another terminal.
+The sequence index of the handler is moved by the benchmark.
+
+    python bench_service_client.py [--repeat 3] [--json results.json]
+"""
+import time
+import argparse
+import rospy
+import bench_common
+from elvez_pkg.srv import *
+from service_client import ServiceClient
+
+HANDLER = '/ELVEZ_platform_handler/'
+
+
+def dispatch(services, index):
+    """ Resolves the keypoints of an operation as planner.py does. Returns the operation type """
+    operation = services.call(HANDLER + 'index_operation', index_operation, index_operationRequest(index=index))
+    if operation.type == 'PC':
+        connector = services.call(HANDLER + 'connector_info', connector_info, connector_infoRequest(label=operation.label[0]))
+        services.call(HANDLER + 'guide_info', guide_info, guide_infoRequest(jig=operation.spot[0].jig, guide=operation.spot[0].id))
+        services.call(HANDLER + 'tray_info', tray_info, tray_infoRequest(box=connector.box, tray=connector.tray))
+    elif operation.type == 'RC':
+        for label in operation.label:
+            if label[:2] == 'CA':
+                services.call(HANDLER + 'cable_info', cable_info, cable_infoRequest(label=label))
+            else:
+                connector = services.call(HANDLER + 'connector_info', connector_info, connector_infoRequest(label=label))
+                for cable in connector.cables:
+                    services.call(HANDLER + 'cable_info', cable_info, cable_infoRequest(label=cable.label))
+        for spot in operation.spot:
+            services.call(HANDLER + 'guide_info', guide_info, guide_infoRequest(jig=spot.jig, guide=spot.id))
+    elif operation.type == 'T':
+        services.call(HANDLER + 'taping_spot_info', taping_spot_info, taping_spot_infoRequest(jig=operation.spot[0].jig, spot=operation.spot[0].id))
+    return operation.type
+
+
+def measure(services, operations, repeat):
+    """ Dispatch time (ms) of every operation, grouped by operation type """
+    times = {}
+    for _ in range(repeat):
+        for index in range(operations):
+            start = time.time()
+            operation_type = dispatch(services, index)
+            times.setdefault(operation_type, []).append(1000.0 * (time.time() - start))
+    return times
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=3, help='Times the whole sequence is dispatched')
+    parser.add_argument('--json', default='', help='File where the results are saved')
+    args = parser.parse_args()
+
+    rospy.init_node('bench_service_client', anonymous=True)
+    rospy.wait_for_service(HANDLER + 'all_operations')
+    operations = len(rospy.ServiceProxy(HANDLER + 'all_operations', all_operations)().data)
+
+    results = {'benchmark': 'service_client', 'operations': operations, 'repeat': args.repeat, 'modes': {}}
+    rows_table = []
+    for mode, persistent in [('new proxy per call', False), ('persistent', True)]:
+        services = ServiceClient(persistent=persistent)
+        #The first dispatch waits for the services and connects, it is not measured
+        dispatch(services, 0)
+        services.latencies = {}
+        times = measure(services, operations, args.repeat)
+        services.close()
+        results['modes'][mode] = {'dispatch_ms': dict((operation_type, {'mean': sum(values) / len(values), 'p50': percentile(values, 0.5), 'p95': percentile(values, 0.95)})
+                                                      for operation_type, values in times.items()),
+                                  'services': services.stats()}
+        for operation_type in sorted(times):
+            values = times[operation_type]
+            rows_table.append([mode, operation_type, len(values), "%.2f" % (sum(values) / len(values)), "%.2f" % percentile(values, 0.5), "%.2f" % percentile(values, 0.95)])
+
+    print("%d operations" % operations)
+    bench_common.print_table(['proxies', 'operation', 'dispatches', 'mean ms', 'p50 ms', 'p95 ms'], rows_table)
+    bench_common.write_results(args.json, results)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,163 @@
+#!/usr/bin/env python
+"""
+Latency of the jig_info, guide_info and taping_spot_info callbacks of the UC2_handler on a synthetic platform.
+The responses built on every request, as the callbacks did before, are compared with the ServiceResponses: the first
+pass of the requests, when each response is built and memoized, and the next ones, which only look them up.
+Needs the messages of elvez_pkg, so the workspace must be built and sourced.
+
+    python bench_service_responses.py [--jigs 500] [--guides 12] [--spots 6] [--json results.json]
+"""
+import random
+import argparse
+import PyKDL
+import bench_common
+from service_responses import ServiceResponses, fromKdlToPose
+from elvez_pkg.msg import jig_guide_data, jig_tape_data
+from elvez_pkg.srv import jig_infoResponse, guide_infoResponse, taping_spot_infoResponse
+
+
+def random_frame():
+    frame = PyKDL.Frame()
+    frame.p = PyKDL.Vector(random.uniform(-1, 1), random.uniform(-1, 1), random.uniform(0, 1))
+    frame.M.DoRotZ(random.uniform(-3.14, 3.14))
+    return frame
+
+
+def create_jigs_dict(jigs, guides, spots):
+    """ jigs_complete_dict with the same structure as platform_model.createJigsStruct """
+    jigs_complete_dict = {}
+    for i in range(jigs):
+        jig_dict = {'dimensions': [0.1, 0.1, 0.05], 'collisions': [0.01, 0.01, 0.01, 0.01], 'jig_frame': random_frame(), 'commercial': '%07d' % (i % 20), 'Type': 'J'}
+        jig_dict['guides'] = {}
+        for j in range(guides):
+            key = {'length': 0.01, 'gap': 0.005, 'height': 0.02, 'height_corner': 0.01, 'xcol1': 0.0, 'xcol2': 0.0, 'ycol1': 0.0, 'ycol2': 0.0, 'frame': random_frame(), 'center_pose': random_frame()}
+            collision = {'xdim': 0.02, 'ydim': 0.02, 'zdim': 0.03, 'frame': random_frame()}
+            jig_dict['guides']['G%d' % (j + 1)] = {'key': key, 'collision': collision}
+        jig_dict['tape_spots'] = {}
+        for j in range(spots):
+            jig_dict['tape_spots']['T%d' % (j + 1)] = {'xdim': 0.02, 'ydim': 0.02, 'zdim': 0.01, 'frame': random_frame(), 'center_pose': random_frame()}
+        jigs_complete_dict['J%d' % (i + 1)] = jig_dict
+    return jigs_complete_dict
+
+
+def rebuilt_jig_info(jigs_complete_dict, jig):
+    """ Copy of the response built by jig_info_callback before ServiceResponses """
+    resp = jig_infoResponse()
+    resp.success = False
+    if jig in jigs_complete_dict:
+        resp.commercial = jigs_complete_dict[jig]['commercial']
+        resp.corner_frame = fromKdlToPose(jigs_complete_dict[jig]['jig_frame'])
+        resp.dimensions = jigs_complete_dict[jig]['dimensions']
+        if 'guides' in jigs_complete_dict[jig]:
+            for guide in jigs_complete_dict[jig]['guides']:
+                data_guide = jig_guide_data()
+                data_guide.id = guide
+                data_guide.key_length = jigs_complete_dict[jig]['guides'][guide]['key']['length']
+                data_guide.key_gap = jigs_complete_dict[jig]['guides'][guide]['key']['gap']
+                data_guide.key_height = jigs_complete_dict[jig]['guides'][guide]['key']['height']
+                data_guide.key_height_corner = jigs_complete_dict[jig]['guides'][guide]['key']['height_corner']
+                data_guide.collisions = [jigs_complete_dict[jig]['guides'][guide]['key']['xcol1'], jigs_complete_dict[jig]['guides'][guide]['key']['xcol2'], jigs_complete_dict[jig]['guides'][guide]['key']['ycol1'], jigs_complete_dict[jig]['guides'][guide]['key']['ycol2']]
+                data_guide.key_corner_frame = fromKdlToPose(jigs_complete_dict[jig]['guides'][guide]['key']['frame'])
+                data_guide.key_center_frame = fromKdlToPose(jigs_complete_dict[jig]['guides'][guide]['key']['center_pose'])
+                data_guide.collision_dimensions = [jigs_complete_dict[jig]['guides'][guide]['collision']['xdim'], jigs_complete_dict[jig]['guides'][guide]['collision']['ydim'], jigs_complete_dict[jig]['guides'][guide]['collision']['zdim']]
+                data_guide.collision_corner_frame = fromKdlToPose(jigs_complete_dict[jig]['guides'][guide]['collision']['frame'])
+                resp.guides.append(data_guide)
+        if 'tape_spots' in jigs_complete_dict[jig]:
+            for spot in jigs_complete_dict[jig]['tape_spots']:
+                data_spot = jig_tape_data()
+                data_spot.id = spot
+                data_spot.corner_frame = fromKdlToPose(jigs_complete_dict[jig]['tape_spots'][spot]['frame'])
+                data_spot.center_frame = fromKdlToPose(jigs_complete_dict[jig]['tape_spots'][spot]['center_pose'])
+                data_spot.dimensions = [jigs_complete_dict[jig]['tape_spots'][spot]['xdim'], jigs_complete_dict[jig]['tape_spots'][spot]['ydim'], jigs_complete_dict[jig]['tape_spots'][spot]['zdim']]
+                resp.taping_spots.append(data_spot)
+        resp.success = True
+    return resp
+
+
+def rebuilt_guide_info(jigs_complete_dict, jig, guide):
+    """ Copy of the response built by guide_info_callback before ServiceResponses """
+    resp = guide_infoResponse()
+    data = jig_guide_data()
+    resp.success = False
+    if jig in jigs_complete_dict:
+        if 'guides' in jigs_complete_dict[jig]:
+            if guide in jigs_complete_dict[jig]['guides']:
+                data.id = guide
+                data.key_length = jigs_complete_dict[jig]['guides'][guide]['key']['length']
+                data.key_gap = jigs_complete_dict[jig]['guides'][guide]['key']['gap']
+                data.key_height = jigs_complete_dict[jig]['guides'][guide]['key']['height']
+                data.key_height_corner = jigs_complete_dict[jig]['guides'][guide]['key']['height_corner']
+                data.collisions = jigs_complete_dict[jig]['collisions']
+                data.key_corner_frame = fromKdlToPose(jigs_complete_dict[jig]['guides'][guide]['key']['frame'])
+                data.key_center_frame = fromKdlToPose(jigs_complete_dict[jig]['guides'][guide]['key']['center_pose'])
+                data.collision_dimensions = [jigs_complete_dict[jig]['guides'][guide]['collision']['xdim'], jigs_complete_dict[jig]['guides'][guide]['collision']['ydim'], jigs_complete_dict[jig]['guides'][guide]['collision']['zdim']]
+                data.collision_corner_frame = fromKdlToPose(jigs_complete_dict[jig]['guides'][guide]['collision']['frame'])
+                data.dimensions = jigs_complete_dict[jig]['dimensions']
+                resp.data = data
+                resp.success = True
+    return resp
+
+
+def rebuilt_taping_spot_info(jigs_complete_dict, jig, spot):
+    """ Copy of the response built by taping_spot_info_callback before ServiceResponses """
+    resp = taping_spot_infoResponse()
+    data = jig_tape_data()
+    resp.success = False
+    if jig in jigs_complete_dict:
+        if 'tape_spots' in jigs_complete_dict[jig]:
+            if spot in jigs_complete_dict[jig]['tape_spots']:
+                data.id = spot
+                data.corner_frame = fromKdlToPose(jigs_complete_dict[jig]['tape_spots'][spot]['frame'])
+                data.center_frame = fromKdlToPose(jigs_complete_dict[jig]['tape_spots'][spot]['center_pose'])
+                data.dimensions = [jigs_complete_dict[jig]['tape_spots'][spot]['xdim'], jigs_complete_dict[jig]['tape_spots'][spot]['ydim'], jigs_complete_dict[jig]['tape_spots'][spot]['zdim']]
+                resp.data = data
+                resp.success = True
+    return resp
+
+
+def run_queries(function, queries):
+    return [function(*query) for query in queries]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--jigs', type=int, default=500)
+    parser.add_argument('--guides', type=int, default=12, help='Guides of each jig')
+    parser.add_argument('--spots', type=int, default=6, help='Taping spots of each jig')
+    parser.add_argument('--queries', type=int, default=1000, help='Requests of each service')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--json', default='', help='File where the results are saved')
+    args = parser.parse_args()
+
+    random.seed(0)
+    jigs_complete_dict = create_jigs_dict(args.jigs, args.guides, args.spots)
+    #The tray info is not requested, so the WH indexes are not needed
+    build_s, responses = bench_common.time_call(ServiceResponses, 1, jigs_complete_dict, None)
+    first_responses = ServiceResponses(jigs_complete_dict, None)
+
+    jigs = sorted(jigs_complete_dict.keys())
+    jig_queries = [(random.choice(jigs),) for _ in range(args.queries)]
+    guide_queries = [(jig, 'G%d' % random.randint(1, args.guides)) for jig, in jig_queries]
+    spot_queries = [(jig, 'T%d' % random.randint(1, args.spots)) for jig, in jig_queries]
+
+    services = [('jig_info', jig_queries, lambda jig: rebuilt_jig_info(jigs_complete_dict, jig), 'jigInfo'),
+                ('guide_info', guide_queries, lambda jig, guide: rebuilt_guide_info(jigs_complete_dict, jig, guide), 'guideInfo'),
+                ('taping_spot_info', spot_queries, lambda jig, spot: rebuilt_taping_spot_info(jigs_complete_dict, jig, spot), 'tapingSpotInfo')]
+    results = {'benchmark': 'service_responses', 'jigs': args.jigs, 'guides': args.guides, 'spots': args.spots, 'queries': args.queries, 'build_s': build_s, 'results': []}
+    rows_table = []
+    for name, queries, rebuild, method in services:
+        rebuild_s, _ = bench_common.time_call(run_queries, args.repeat, rebuild, queries)
+        first_s, _ = bench_common.time_call(run_queries, 1, getattr(first_responses, method), queries)
+        memoized_s, _ = bench_common.time_call(run_queries, args.repeat, getattr(responses, method), queries)
+        result = {'service': name, 'rebuild_us': rebuild_s * 1e6 / len(queries), 'first_us': first_s * 1e6 / len(queries), 'memoized_us': memoized_s * 1e6 / len(queries)}
+        results['results'].append(result)
+        rows_table.append([name, "%.1f" % result['rebuild_us'], "%.1f" % result['first_us'], "%.2f" % result['memoized_us'],
+                           "%.0fx" % (result['rebuild_us'] / max(result['memoized_us'], 1e-9))])
+
+    print("Responses of %d jigs created in %.3f ms" % (args.jigs, build_s * 1000))
+    bench_common.print_table(['service', 'rebuild us/request', 'first pass us/request', 'memoized us/request', 'speedup'], rows_table)
+    bench_common.write_results(args.json, results)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,49 @@
+#!/usr/bin/env python
+"""
+Bounding boxes, volumes and triangle counts of every STL file of a data folder (memory-mapped, serial and in parallel),
+and the check of the jig, box and comb dimensions of the definitions against their meshes.
+
+    python bench_stl_stats.py [--folder data_UI] [--processes 4] [--tolerance 0.1] [--json results.json]
+"""
+import os
+import argparse
+import bench_common
+import stl_mesh
+from collectData import InputFilesDataCollector
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--folder', default='data_UI', help='Data folder, relative to the package')
+    parser.add_argument('--processes', type=int, default=None, help='Processes of the pool, by default one per CPU')
+    parser.add_argument('--scale', type=float, default=0.001, help='Meters per unit of the meshes')
+    parser.add_argument('--tolerance', type=float, default=0.1, help='Largest relative excess of a definition over its mesh')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--json', default='', help='File where the results are saved')
+    args = parser.parse_args()
+
+    folder = os.path.join(bench_common.PACKAGE_PATH, args.folder)
+    stl_folder = os.path.join(folder, 'stl')
+    serial_s, stats = bench_common.time_call(stl_mesh.directoryStats, args.repeat, stl_folder, 1)
+    parallel_s, _ = bench_common.time_call(stl_mesh.directoryStats, args.repeat, stl_folder, args.processes)
+    largest = max(stats, key=lambda mesh: stats[mesh]['triangles'])
+    largest_s, _ = bench_common.time_call(stl_mesh.meshStats, args.repeat, os.path.join(stl_folder, largest))
+    total_mb = sum(os.path.getsize(os.path.join(stl_folder, mesh)) for mesh in stats) / 1024.0 / 1024.0
+
+    print("%d STL files (%.1f MB): serial %.1f ms, parallel %.1f ms. Largest %s (%d triangles): %.1f ms"
+          % (len(stats), total_mb, serial_s * 1000, parallel_s * 1000, largest, stats[largest]['triangles'], largest_s * 1000))
+
+    dict_elvez = InputFilesDataCollector(folder, 'platform_ids.wri', 'combs_ids.wri', 'ATC_ids.wri', 'Jigs_definition_v2.xml', 'Components_definition.csv', 'WH_configuration.xml', 'Assembly_sequence.csv')
+    checks = stl_mesh.checkMeshDimensions(folder, dict_elvez.dict_jigs, stats, args.scale, args.tolerance)
+    rows = []
+    for mesh, label, commercial, definition, extent, excess, ok in checks:
+        rows.append([mesh, label, commercial, " ".join("%.4f" % value for value in definition), " ".join("%.4f" % value for value in extent), "%.0f %%" % (max(excess, 0.0) * 100), "ok" if ok else "LARGER"])
+    bench_common.print_table(['mesh', 'label', 'commercial', 'definition xyz (m)', 'mesh xyz (m)', 'excess', 'check'], rows)
+
+    bench_common.write_results(args.json, {'benchmark': 'stl_stats', 'folder': args.folder, 'files': len(stats), 'megabytes': total_mb,
+                                           'serial_s': serial_s, 'parallel_s': parallel_s, 'largest': largest, 'largest_s': largest_s,
+                                           'stats': stats, 'checks': [dict(zip(['mesh', 'label', 'commercial', 'definition', 'mesh_dims', 'excess', 'ok'], check)) for check in checks]})
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,112 @@
+#!/usr/bin/env python
+"""
+Cost of re-broadcasting the frames of the platform on one tick, as a function of the number of keypoints.
+The previous path (one sendTransform per frame of tf.TransformBroadcaster, computing the quaternion of the PyKDL frame
+on each call) is compared with PlatformTFPublisher(static=False), which sends one message with all the frames.
+The messages are serialized instead of published, so no roscore is needed, but the ROS messages must be available.
+
+    python bench_tf_publisher.py [--keypoints 100 1000 5000 20000] [--json results.json]
+"""
+import random
+import argparse
+from io import BytesIO
+import PyKDL
+import rospy
+import bench_common
+from geometry_msgs.msg import TransformStamped
+from tf2_msgs.msg import TFMessage
+from tf_publisher import PlatformTFPublisher
+
+
+class SerializingBroadcaster(object):
+    """ Replaces the broadcasters of tf and tf2_ros, serializing the TFMessage that would be published """
+    def __init__(self):
+        self.messages = 0
+        self.bytes = 0
+
+    def publish(self, msg):
+        buff = BytesIO()
+        msg.serialize(buff)
+        self.messages += 1
+        self.bytes += buff.tell()
+
+    def sendTransform(self, transforms):
+        self.publish(TFMessage(transforms))
+
+
+def legacy_send(broadcaster, translation, rotation, time, child, parent):
+    """ Copy of tf.TransformBroadcaster.sendTransform, which publishes one TFMessage per frame """
+    t = TransformStamped()
+    t.header.frame_id = parent
+    t.header.stamp = time
+    t.child_frame_id = child
+    t.transform.translation.x = translation[0]
+    t.transform.translation.y = translation[1]
+    t.transform.translation.z = translation[2]
+    t.transform.rotation.x = rotation[0]
+    t.transform.rotation.y = rotation[1]
+    t.transform.rotation.z = rotation[2]
+    t.transform.rotation.w = rotation[3]
+    broadcaster.publish(TFMessage([t]))
+
+
+def legacy_tick(broadcaster, frames):
+    """ One iteration of the loop of main_UC2 before PlatformTFPublisher """
+    for frame, frame_id, parent_frame in frames:
+        legacy_send(broadcaster, (frame.p.x(), frame.p.y(), frame.p.z()), frame.M.GetQuaternion(), 0, frame_id, parent_frame)
+
+
+def create_frames(keypoints, keypoints_jig):
+    """ Jigs with their keypoints as (kdl frame, frame id, parent frame) """
+    frames = []
+    jigs = max(1, keypoints // keypoints_jig)
+    for i in range(jigs):
+        jig_name = 'ID%06dplatform' % (i + 1)
+        frame = PyKDL.Frame()
+        frame.p = PyKDL.Vector(random.uniform(0, 1), random.uniform(0, 1), 0)
+        frame.M.DoRotZ(random.uniform(-3.14, 3.14))
+        frames.append((frame, jig_name, 'ID000001platform'))
+        for j in range(keypoints_jig):
+            frame = PyKDL.Frame()
+            frame.p = PyKDL.Vector(random.uniform(0, 0.1), random.uniform(0, 0.1), 0.02)
+            frame.M.DoRotZ(random.uniform(-3.14, 3.14))
+            frames.append((frame, jig_name + 'guide' + str(j + 1), jig_name))
+    return frames
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--keypoints', type=int, nargs='+', default=[100, 1000, 5000, 20000])
+    parser.add_argument('--keypoints-jig', type=int, default=10, help='Keypoints of each jig')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--json', default='', help='File where the results are saved')
+    args = parser.parse_args()
+
+    #The stamps come from the wall clock, as no node is initialized
+    rospy.rostime.set_rostime_initialized(True)
+    random.seed(0)
+    results = []
+    rows_table = []
+    for keypoints in args.keypoints:
+        frames = create_frames(keypoints, args.keypoints_jig)
+        legacy_broadcaster = SerializingBroadcaster()
+        legacy_s, _ = bench_common.time_call(legacy_tick, args.repeat, legacy_broadcaster, frames)
+
+        tf_publisher = PlatformTFPublisher(static=False)
+        tf_publisher.broadcaster = SerializingBroadcaster()
+        for frame, frame_id, parent_frame in frames:
+            tf_publisher.setFrame(frame, frame_id, parent_frame)
+        tf_publisher.publish()  #The first tick builds the transforms
+        batched_s, _ = bench_common.time_call(tf_publisher.publish, args.repeat)
+
+        result = {'keypoints': keypoints, 'frames': len(frames), 'legacy_tick_ms': legacy_s * 1000, 'batched_tick_ms': batched_s * 1000,
+                  'legacy_messages_tick': legacy_broadcaster.messages // args.repeat, 'batched_messages_tick': 1}
+        results.append(result)
+        rows_table.append([keypoints, len(frames), "%.2f" % result['legacy_tick_ms'], "%.2f" % result['batched_tick_ms'], "%.1fx" % (legacy_s / batched_s)])
+
+    bench_common.print_table(['keypoints', 'frames', 'per frame ms/tick', 'batched ms/tick', 'speedup'], rows_table)
+    bench_common.write_results(args.json, {'benchmark': 'tf_publisher', 'results': results})
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,142 @@
+#!/usr/bin/env python
+"""
+Microbenchmarks of UC2Model, the model of UC2_handler without a ROS node: loading the input files, building the jigs structure,
+the responses and the compiled sequence, the markers and frames for RViz, and the cold and warm latency of every service path.
+The frames of the CAD files are read from launcher.launch. Needs PyKDL and the messages of elvez_pkg.
+
+    python bench_uc2_model.py [--folder data_routing_v1] [--launch launcher.launch] [--calls 1000] [--json results.json]
+"""
+import os
+import time
+import argparse
+import bench_common
+from offline_layout import launchFrames, rootFrame, DEFAULT_LAUNCH
+from uc2_model import UC2Model, ROOT_FRAMES
+from service_responses import ServiceResponses
+from sequence_compiler import CompiledSequence
+from dataset_metrics import cadNames
+
+
+class FrameCollector(object):
+    """ Receives the frames of addPlatformFrames instead of a PlatformTFPublisher """
+    def __init__(self):
+        self.frames = {}
+
+    def setFrame(self, frame, frame_id, parent_frame):
+        self.frames[frame_id] = (parent_frame, frame)
+
+
+def service_calls(model):
+    """ (name, function, arguments) of a request of each service, for the first component of each kind found """
+    calls = [('all_cad_components', model.allCadComponents, ()), ('next_operation', model.nextOperation, ()),
+             ('all_operations', model.allOperations, ())]
+    jigs_complete_dict = model.jigs_complete_dict
+    for label in sorted(jigs_complete_dict):
+        component = jigs_complete_dict[label]
+        if 'guides' in component and len(component['guides']) > 0:
+            calls.append(('jig_info', model.jigInfo, (label,)))
+            calls.append(('guide_info', model.guideInfo, (label, sorted(component['guides'])[0])))
+            break
+    for label in sorted(jigs_complete_dict):
+        if len(jigs_complete_dict[label].get('tape_spots', [])) > 0:
+            calls.append(('taping_spot_info', model.tapingSpotInfo, (label, sorted(jigs_complete_dict[label]['tape_spots'])[0])))
+            break
+    for label in sorted(jigs_complete_dict):
+        if len(jigs_complete_dict[label].get('trays', [])) > 0:
+            calls.append(('tray_info', model.trayInfo, (label, sorted(jigs_complete_dict[label]['trays'])[0])))
+            break
+    for label in sorted(jigs_complete_dict):
+        if 'tool_name' in jigs_complete_dict[label]:
+            calls.append(('tool_info', model.toolInfo, (jigs_complete_dict[label]['tool_name'],)))
+            break
+    components = model.dict_elvez.dict_components
+    if components['connector']:
+        calls.append(('connector_info', model.connectorInfo, (sorted(components['connector'])[0],)))
+    if components['cable']:
+        calls.append(('cable_info', model.cableInfo, (sorted(components['cable'])[0],)))
+    if model.dict_elvez.list_seq:
+        calls.append(('index_operation', model.indexOperation, (0,)))
+        calls.append(('resolve_operation', model.resolveOperation, (0,)))
+    return calls
+
+
+def responses_timings(model, repeat):
+    """
+    Best time (s) of creating the ServiceResponses of the model and of compiling the sequence, each one timed on its own.
+    The sequence is compiled from new responses every time, so it includes resolving the components it uses
+    """
+    responses_s = bench_common.time_call(ServiceResponses, repeat, model.jigs_complete_dict, model.dict_elvez)[0]
+    compiled_s = None
+    for _ in range(repeat):
+        responses = ServiceResponses(model.jigs_complete_dict, model.dict_elvez)
+        start = time.time()
+        CompiledSequence(responses)
+        elapsed = time.time() - start
+        if compiled_s is None or elapsed < compiled_s:
+            compiled_s = elapsed
+    return responses_s, compiled_s
+
+
+def service_latencies(model, calls, repeat):
+    """
+    (cold, warm) latency (us) of each service path. Cold is the first request after dropping the responses and the compiled
+    sequence of the model (best of repeat), so it includes building what the request needs. Warm is the mean of calls requests after it
+    """
+    latencies = {}
+    for name, function, call_args in service_calls(model):
+        cold_s = None
+        for _ in range(repeat):
+            model.service_responses = None
+            model.compiled_sequence = None
+            model.resetSequence()
+            start = time.time()
+            function(*call_args)
+            elapsed = time.time() - start
+            if cold_s is None or elapsed < cold_s:
+                cold_s = elapsed
+        start = time.time()
+        for _ in range(calls):
+            function(*call_args)
+        latencies[name] = (1e6 * cold_s, 1e6 * (time.time() - start) / calls)
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--folder', default=os.path.join(bench_common.PACKAGE_PATH, 'data_routing_v1'))
+    parser.add_argument('--launch', default=DEFAULT_LAUNCH, help="Launch file with the static frames of the CAD files")
+    parser.add_argument('--calls', type=int, default=1000, help="Requests of each service")
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--json', default="")
+    args = parser.parse_args()
+
+    files = ('Jigs_definition_v2.xml', 'Components_definition.csv', 'WH_configuration.xml', 'Assembly_sequence.csv')
+    frames = launchFrames(args.launch)
+    cad_names = cadNames(args.folder)
+    load_s, model = bench_common.time_call(UC2Model, args.repeat, args.folder, cad_names, *files)
+    root_frames = dict((kind, rootFrame(frames, ROOT_FRAMES[kind])) for kind in model.kinds())
+    stages = [('load input files', load_s)]
+    stages.append(('build jigs structure', bench_common.time_call(model.build, args.repeat, root_frames)[0]))
+    responses_s, compiled_s = responses_timings(model, args.repeat)
+    stages.append(('service responses', responses_s))
+    stages.append(('compiled sequence', compiled_s))
+    markers_s, markers = bench_common.time_call(model.createMarkers, args.repeat, 'file://' + os.path.join(args.folder, 'stl') + '/')
+    stages.append(('markers', markers_s))
+    stages.append(('tf frames', bench_common.time_call(lambda: model.addPlatformFrames(FrameCollector()), args.repeat)[0]))
+
+    results = {'folder': args.folder, 'cad_names': list(cad_names), 'markers': len(markers), 'stages_ms': {}, 'services_cold_us': {}, 'services_us': {}}
+    rows = []
+    for name, seconds in stages:
+        results['stages_ms'][name] = 1000.0 * seconds
+        rows.append([name, "%.3f ms" % (1000.0 * seconds), ""])
+    for name, (cold, warm) in sorted(service_latencies(model, args.calls, args.repeat).items()):
+        results['services_cold_us'][name] = cold
+        results['services_us'][name] = warm
+        rows.append([name, "%.2f us" % cold, "%.2f us" % warm])
+    bench_common.print_table(['path', 'time (cold)', 'warm'], rows)
+    results['peak_rss_kb'] = bench_common.peak_rss_kb()
+    bench_common.write_results(args.json, results)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,117 @@
+#!/usr/bin/env python
+"""
+Latency of the connector, cable and tray lookups of the UC2_handler services over a synthetic wiring harness configuration.
+The scans previously done by the service callbacks are compared with the indexes built by InputFilesDataCollector.
+
+    python bench_wh_indexes.py [--harnesses 5000] [--cables 100000] [--queries 200] [--json results.json]
+"""
+import random
+import argparse
+import bench_common
+from collectData import InputFilesDataCollector
+
+
+def create_WH_dict(harnesses, cables, branches):
+    """ dict_WH with the same structure as InputFilesDataCollector._createWHDict """
+    cables_WH = max(1, cables // harnesses)
+    dict_WH = {}
+    cable = 0
+    for i in range(harnesses):
+        WH = 'WH%d' % (i + 1)
+        end_con = {}
+        for j in range(cables_WH):
+            branch = 'CON_%d_%d' % (i + 1, j % branches + 1)
+            end_con.setdefault(branch, {})['W%d' % (cable + 1)] = {'first_pins': [str(j + 1)], 'end_pins': [str(j % 4 + 1)]}
+            cable += 1
+        dict_WH[WH] = {'first_con': 'CON_%d_0' % (i + 1), 'box': 'Box%d' % (i // 4 + 1), 'tray': 'Tray%d' % (i % 4 + 1), 'end_con': end_con}
+    return dict_WH
+
+
+def scan_connector(dict_WH, label):
+    """ Copy of the scan that connector_info_callback used before the indexes """
+    found = []
+    for WH in dict_WH:
+        if label == dict_WH[WH]['first_con']:
+            cables = []
+            for branch in dict_WH[WH]['end_con']:
+                for cable in dict_WH[WH]['end_con'][branch]:
+                    cables.append((cable, dict_WH[WH]['end_con'][branch][cable]['first_pins']))
+            found.append((WH, cables))
+        elif label in dict_WH[WH]['end_con']:
+            cables = []
+            for cable in dict_WH[WH]['end_con'][label]:
+                cables.append((cable, dict_WH[WH]['end_con'][label][cable]['end_pins']))
+            found.append((WH, cables))
+    return found
+
+
+def scan_cable(dict_WH, label):
+    """ Copy of the scan that cable_info_callback used before the indexes """
+    found = None
+    for WH in dict_WH:
+        for branch in dict_WH[WH]['end_con']:
+            if label in dict_WH[WH]['end_con'][branch]:
+                found = (WH, branch)
+    return found
+
+
+def scan_tray(dict_WH, box, tray):
+    """ Copy of the scan that tray_info_callback used before the indexes """
+    found = None
+    for WH in dict_WH:
+        if box == dict_WH[WH]['box'] and tray == dict_WH[WH]['tray']:
+            found = WH
+    return found
+
+
+def run_queries(function, queries):
+    return [function(*query) for query in queries]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--harnesses', type=int, default=5000)
+    parser.add_argument('--cables', type=int, default=100000)
+    parser.add_argument('--branches', type=int, default=4, help='End connectors of each harness')
+    parser.add_argument('--queries', type=int, default=200, help='Requests of each service')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--json', default='', help='File where the results are saved')
+    args = parser.parse_args()
+
+    random.seed(0)
+    dict_WH = create_WH_dict(args.harnesses, args.cables, args.branches)
+    #Only the WH dictionary is needed, so the input files are not loaded
+    collector = InputFilesDataCollector.__new__(InputFilesDataCollector)
+    collector.dict_WH = dict_WH
+    index_s, _ = bench_common.time_call(collector._createWHIndexes, 1)
+
+    WHs = list(dict_WH.keys())
+    connector_queries = []
+    cable_queries = []
+    tray_queries = []
+    for _ in range(args.queries):
+        WH = dict_WH[random.choice(WHs)]
+        connector_queries.append((random.choice([WH['first_con']] + list(WH['end_con'].keys())),))
+        cable_queries.append((random.choice(list(WH['end_con'][random.choice(list(WH['end_con'].keys()))].keys())),))
+        tray_queries.append((WH['box'], WH['tray']))
+
+    services = [('connector_info', connector_queries, lambda label: scan_connector(dict_WH, label), collector.findConnectorCables),
+                ('cable_info', cable_queries, lambda label: scan_cable(dict_WH, label), collector.findCable),
+                ('tray_info', tray_queries, lambda box, tray: scan_tray(dict_WH, box, tray), collector.findTrayWH)]
+    results = {'benchmark': 'wh_indexes', 'harnesses': args.harnesses, 'cables': args.cables, 'queries': args.queries, 'index_build_s': index_s, 'results': []}
+    rows_table = []
+    for name, queries, scan, lookup in services:
+        scan_s, scan_found = bench_common.time_call(run_queries, 1, scan, queries)
+        index_lookup_s, index_found = bench_common.time_call(run_queries, args.repeat, lookup, queries)
+        assert scan_found == index_found, name + ': the index and the scan give different results'
+        result = {'service': name, 'scan_ms': scan_s * 1000 / len(queries), 'index_ms': index_lookup_s * 1000 / len(queries)}
+        results['results'].append(result)
+        rows_table.append([name, "%.3f" % result['scan_ms'], "%.4f" % result['index_ms'], "%.0fx" % (result['scan_ms'] / max(result['index_ms'], 1e-9))])
+
+    print("Indexes built in %.1f ms" % (index_s * 1000))
+    bench_common.print_table(['service', 'scan ms/request', 'index ms/request', 'speedup'], rows_table)
+    bench_common.write_results(args.json, results)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+#!/usr/bin/env python
+"""
+Scaling of the .wri ID map builders from 10 to 100k rows.
+The quadratic loop previously used by Scene.buildScene is only run up to --legacy-max rows.
+
+    python bench_wri_reader.py [--rows 10 100 1000 10000 100000] [--json results.json]
+"""
+import os
+import shutil
+import argparse
+import tempfile
+import bench_common
+from elvez_platform import ItemID
+from wri_reader import iterWriRows
+from collectData import InputFilesDataCollector
+
+
+def write_wri(path, rows):
+    with open(path, 'w') as f:
+        for i in range(rows):
+            f.write("ID%06d\tJ%d\t%07d\n" % (i + 1, i + 1, 9 + i % 20))
+
+
+def legacy_id_map(wri_file):
+    """ Copy of the nested loop that Scene.buildScene used before iterWriRows """
+    id_map = {}
+    with open(wri_file) as rfile:
+        content = rfile.readlines()
+        for line in content:
+            chunks = line.split('\t')
+            for line in content:
+                id_map[chunks[0].strip()] = ItemID(chunks[0].strip(), chunks[1].strip(), chunks[2].strip())
+    return id_map
+
+
+def streaming_id_map(wri_file):
+    id_map = {}
+    for cad_id, label, commercial in iterWriRows(wri_file):
+        id_map[cad_id] = ItemID(cad_id, label, commercial)
+    return id_map
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, nargs='+', default=[10, 100, 1000, 10000, 100000])
+    parser.add_argument('--legacy-max', type=int, default=2000, help='Largest file measured with the quadratic loop')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--json', default='', help='File where the results are saved')
+    args = parser.parse_args()
+
+    #Only the .wri parser of the collector is needed, so the input files are not loaded
+    collector = InputFilesDataCollector.__new__(InputFilesDataCollector)
+    tmp_dir = tempfile.mkdtemp()
+    results = []
+    rows_table = []
+    try:
+        for rows in args.rows:
+            wri_file = os.path.join(tmp_dir, 'bench_%d_ids.wri' % rows)
+            write_wri(wri_file, rows)
+            result = {'rows': rows}
+            result['scene_id_map_s'], _ = bench_common.time_call(streaming_id_map, args.repeat, wri_file)
+            result['platform_dict_s'], _ = bench_common.time_call(collector._createPlatformDict, args.repeat, wri_file)
+            if rows <= args.legacy_max:
+                result['legacy_id_map_s'], _ = bench_common.time_call(legacy_id_map, 1, wri_file)
+            results.append(result)
+            legacy = "%.2f" % (result['legacy_id_map_s'] * 1000) if 'legacy_id_map_s' in result else "-"
+            rows_table.append([rows, legacy, "%.2f" % (result['scene_id_map_s'] * 1000), "%.2f" % (result['platform_dict_s'] * 1000)])
+    finally:
+        shutil.rmtree(tmp_dir)
+
+    bench_common.print_table(['rows', 'legacy ms', 'id_map ms', 'platform dict ms'], rows_table)
+    bench_common.write_results(args.json, {'benchmark': 'wri_reader', 'results': results})
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+#!/usr/bin/env python
+"""
+Startup time and peak RSS of the X3D scene loaders (complete XML tree vs streaming).
+Each measurement runs in its own process so that the peak RSS of one loader does not hide the other.
+
+    python bench_x3d_loader.py [--data data_UI data] [--json results.json]
+"""
+import os
+import sys
+import glob
+import json
+import argparse
+import subprocess
+import bench_common
+from bench_common import PACKAGE_PATH
+
+LOADERS = ['tree', 'streaming']
+
+
+def run_child(loader, x3d_file, repeat):
+    """ Loads the scene in this process and prints the measurements as JSON """
+    from elvez_platform import Scene
+    rss_before = bench_common.peak_rss_kb()
+    if loader == 'tree':
+        load = Scene.loadSceneTree
+    else:
+        load = Scene.loadSceneStreaming
+    best, scene = bench_common.time_call(load, repeat, x3d_file, {}, 'bench')
+    transform_list = []
+    scene.deepSearch(transform_list)
+    print(json.dumps({'time_s': best, 'peak_rss_kb': bench_common.peak_rss_kb() - rss_before}))
+
+
+def measure(loader, x3d_file, repeat):
+    output = subprocess.check_output([sys.executable, os.path.abspath(__file__), '--child', loader, x3d_file, '--repeat', str(repeat)])
+    return json.loads(output.decode().strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--data', nargs='+', default=['data_UI', 'data'], help='Data directories (relative to the package)')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--json', default='', help='File where the results are saved')
+    parser.add_argument('--child', nargs=2, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args.child[0], args.child[1], args.repeat)
+        return
+
+    results = []
+    rows = []
+    for data_dir in args.data:
+        for x3d_file in sorted(glob.glob(os.path.join(PACKAGE_PATH, data_dir, '*.x3d'))):
+            size_kb = os.path.getsize(x3d_file) / 1024
+            result = {'file': os.path.join(data_dir, os.path.basename(x3d_file)), 'size_kb': size_kb}
+            for loader in LOADERS:
+                result[loader] = measure(loader, x3d_file, args.repeat)
+            results.append(result)
+            rows.append([result['file'], size_kb,
+                         "%.1f" % (result['tree']['time_s'] * 1000), "%.1f" % (result['streaming']['time_s'] * 1000),
+                         result['tree']['peak_rss_kb'], result['streaming']['peak_rss_kb']])
+
+    bench_common.print_table(['file', 'KB', 'tree ms', 'stream ms', 'tree RSS KB', 'stream RSS KB'], rows)
+    bench_common.write_results(args.json, {'benchmark': 'x3d_loader', 'results': results})
+
+
+if __name__ == '__main__':
+    main()
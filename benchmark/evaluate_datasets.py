@@ -0,0 +1,77 @@
+#!/usr/bin/env python
+"""
+Loads every data folder in a process pool, without a ROS master, and writes one report comparing their components,
+keypoint spread, routing length and estimated cycle time (dataset_metrics.datasetMetrics). PyKDL and the messages of the
+package are needed, as UC2Model builds the service responses.
+
+    python evaluate_datasets.py [--folders data_routing_v1 data_icps] [--processes 4] [--launch launcher.launch]
+                                [--json report.json]
+"""
+import os
+import time
+import argparse
+import multiprocessing
+import bench_common
+from dataset_metrics import datasetMetrics, DATASETS
+from offline_layout import DEFAULT_LAUNCH
+
+
+def evaluate(job):
+    """ Metrics of a folder in a worker of the pool, the errors are returned so one wrong folder does not stop the others """
+    folder, launch_file, speed, tool_change_s = job
+    start = time.time()
+    try:
+        metrics = datasetMetrics(folder, launch_file, None, speed, tool_change_s)
+    except Exception as e:
+        metrics = {'error': "%s: %s" % (type(e).__name__, e)}
+    metrics['load_s'] = time.time() - start
+    return metrics
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--folders', nargs='*', default=None, help="Data folders, by default " + " ".join(DATASETS))
+    parser.add_argument('--processes', type=int, default=multiprocessing.cpu_count(), help="Workers of the pool, 1 to evaluate in this process")
+    parser.add_argument('--launch', default=DEFAULT_LAUNCH, help="Launch file with the static frames of the CAD files")
+    parser.add_argument('--speed', type=float, default=0.25, help="Speed of the end effector (m/s)")
+    parser.add_argument('--tool-change', type=float, default=8.0, help="Seconds of a tool change")
+    parser.add_argument('--json', default="")
+    args = parser.parse_args()
+
+    folders = args.folders
+    if folders is None:
+        folders = [os.path.join(bench_common.PACKAGE_PATH, folder) for folder in DATASETS]
+    jobs = [(folder, args.launch, args.speed, args.tool_change) for folder in folders]
+    start = time.time()
+    if args.processes > 1:
+        pool = multiprocessing.Pool(min(args.processes, len(jobs)))
+        results = pool.map(evaluate, jobs, chunksize=1)
+        pool.close()
+        pool.join()
+    else:
+        results = [evaluate(job) for job in jobs]
+    elapsed = time.time() - start
+
+    report = {}
+    rows = []
+    errors = []
+    for folder, metrics in zip(folders, results):
+        name = os.path.relpath(os.path.abspath(folder), os.path.abspath(bench_common.PACKAGE_PATH))
+        report[name] = metrics
+        if 'error' in metrics:
+            errors.append(name + ": " + metrics['error'])
+            continue
+        rows.append([name, "%d/%d/%d/%d" % (metrics['jigs'], metrics['combs'], metrics['boxes'], metrics['ATC_stations']),
+                     "%d/%d/%d" % (metrics['connectors'], metrics['cables'], metrics['harnesses']), metrics['operations'],
+                     metrics['keypoints'], "%.3f" % metrics.get('keypoint_std_m', 0.0), "%.3f" % metrics['routing_length_m'],
+                     "%.1f" % metrics['cycle_s'], "%.2f" % metrics['load_s']])
+    bench_common.print_table(['folder', 'jigs/combs/boxes/ATC', 'con/cab/WH', 'operations', 'keypoints', 'spread (m)',
+                              'routing (m)', 'cycle (s)', 'load (s)'], rows)
+    for error in errors:
+        print("Not evaluated " + error)
+    print("%d folders in %.2f s with %d processes" % (len(folders), elapsed, max(1, min(args.processes, len(jobs)))))
+    bench_common.write_results(args.json, {'processes': args.processes, 'elapsed_s': elapsed, 'launch': args.launch, 'datasets': report})
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+#!/usr/bin/env python
+"""
+Messages per second on /tf and /tf_static and CPU usage of the UC2_handler node while it is running.
+Launch the handler with the layout to measure (e.g. launcher.launch) and run this script in another terminal,
+once with each version of the handler to compare them.
+
+    python measure_tf_rate.py [--node /UC2_handler] [--duration 20] [--json results.json]
+"""
+import os
+import time
+import argparse
+import rospy
+import rosnode
+import rosgraph
+import bench_common
+try:
+    from xmlrpclib import ServerProxy
+except ImportError:
+    from xmlrpc.client import ServerProxy
+from tf2_msgs.msg import TFMessage
+
+
+class TopicCounter(object):
+    def __init__(self, topic):
+        self.messages = 0
+        self.transforms = 0
+        self.subscriber = rospy.Subscriber(topic, TFMessage, self.callback, queue_size=1000)
+
+    def callback(self, msg):
+        self.messages += 1
+        self.transforms += len(msg.transforms)
+
+
+def node_pid(node_name):
+    """ PID of a running ROS node, asked to the node through its XMLRPC API """
+    master = rosgraph.Master('/measure_tf_rate')
+    node_api = rosnode.get_api_uri(master, node_name)
+    if node_api is None:
+        raise rosnode.ROSNodeException("Node " + node_name + " is not running")
+    return ServerProxy(node_api).getPid('/measure_tf_rate')[2]
+
+
+def cpu_seconds(pid):
+    """ User + system CPU time consumed by a process of this machine """
+    with open('/proc/%d/stat' % pid) as f:
+        fields = f.read().rsplit(')', 1)[1].split()
+    return (float(fields[11]) + float(fields[12])) / os.sysconf('SC_CLK_TCK')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--node', default='/UC2_handler', help='Node that publishes the frames of the platform')
+    parser.add_argument('--duration', type=float, default=20.0, help='Seconds measured')
+    parser.add_argument('--json', default='', help='File where the results are saved')
+    args = parser.parse_args()
+
+    rospy.init_node('measure_tf_rate', anonymous=True)
+    pid = node_pid(args.node)
+    counters = {'/tf': TopicCounter('/tf'), '/tf_static': TopicCounter('/tf_static')}
+    rospy.sleep(1.0)  #Latched messages are received when subscribing, they are not counted in the rate
+    start_counts = dict((topic, (counters[topic].messages, counters[topic].transforms)) for topic in counters)
+    start_cpu = cpu_seconds(pid)
+    start = time.time()
+    rospy.sleep(args.duration)
+    elapsed = time.time() - start
+    cpu = cpu_seconds(pid) - start_cpu
+
+    results = {'benchmark': 'tf_rate', 'node': args.node, 'duration_s': elapsed, 'cpu_percent': 100.0 * cpu / elapsed, 'topics': {}}
+    rows_table = []
+    for topic in sorted(counters):
+        messages = counters[topic].messages - start_counts[topic][0]
+        transforms = counters[topic].transforms - start_counts[topic][1]
+        results['topics'][topic] = {'messages_per_s': messages / elapsed, 'transforms_per_s': transforms / elapsed, 'latched_transforms': start_counts[topic][1]}
+        rows_table.append([topic, "%.1f" % (messages / elapsed), "%.1f" % (transforms / elapsed), start_counts[topic][1]])
+
+    bench_common.print_table(['topic', 'messages/s', 'transforms/s', 'received at start'], rows_table)
+    print("CPU of %s: %.1f %%" % (args.node, results['cpu_percent']))
+    bench_common.write_results(args.json, results)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,107 @@
+#!/usr/bin/env python
+"""
+Benchmark runner over synthetic data folders (synthetic_data.py) at several scales. For each scale it times the loading
+of the CAD files (Platform), the input files (InputFilesDataCollector), the jigs structure (create_jigs_struct, now
+UC2Model.build), the service responses, the compiled sequence, and the cold (first request, building what it needs) and
+warm latency of every service callback path. The results are saved as JSON, and --compare prints the ratio against a
+previous run.
+Needs PyKDL and the messages of elvez_pkg, geometry_msgs and visualization_msgs, but not a ROS master.
+
+    python run_benchmarks.py [--scales small medium large] [--calls 1000] [--json results.json] [--compare previous.json]
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import platform
+import argparse
+import tempfile
+import bench_common
+from synthetic_data import writeDataset, SCALES
+from bench_uc2_model import responses_timings, service_latencies
+from elvez_platform import Platform
+from collectData import InputFilesDataCollector
+from offline_layout import launchFrames, rootFrame, DEFAULT_LAUNCH
+from uc2_model import UC2Model, ROOT_FRAMES, CAD_KINDS
+
+FILES = ('Jigs_definition_v2.xml', 'Components_definition.csv', 'WH_configuration.xml', 'Assembly_sequence.csv')
+
+
+def run_scale(folder, sizes, frames, repeat, calls):
+    """ Timings (ms) of the model building stages and cold and warm latency (us) of the service paths for one synthetic folder """
+    start = time.time()
+    dataset = writeDataset(folder, **sizes)
+    timings = {'generate': 1000.0 * (time.time() - start)}
+    for kind in CAD_KINDS:
+        timings['Platform ' + kind] = 1000.0 * bench_common.time_call(Platform, repeat, kind, folder)[0]
+    ids_files = [kind + "_ids.wri" for kind in CAD_KINDS]
+    timings['InputFilesDataCollector'] = 1000.0 * bench_common.time_call(InputFilesDataCollector, repeat, folder, *(ids_files + list(FILES)))[0]
+    model = UC2Model(folder, CAD_KINDS, *FILES)
+    root_frames = dict((kind, rootFrame(frames, ROOT_FRAMES[kind])) for kind in model.kinds())
+    timings['create_jigs_struct'] = 1000.0 * bench_common.time_call(model.build, repeat, root_frames)[0]
+    responses_s, compiled_s = responses_timings(model, repeat)
+    timings['ServiceResponses'] = 1000.0 * responses_s
+    timings['CompiledSequence'] = 1000.0 * compiled_s
+    timings['markers'] = 1000.0 * bench_common.time_call(model.createMarkers, repeat, 'file://' + folder + '/stl/')[0]
+    services_cold = {}
+    services = {}
+    for name, (cold, warm) in service_latencies(model, calls, repeat).items():
+        services_cold[name] = cold
+        services[name] = warm
+    files_kb = dict((name, os.path.getsize(os.path.join(folder, name)) / 1024.0) for name in sorted(os.listdir(folder)) if os.path.isfile(os.path.join(folder, name)))
+    return {'sizes': sizes, 'dataset': dataset, 'files_kb': files_kb, 'timings_ms': timings, 'services_cold_us': services_cold, 'services_us': services}
+
+
+def compare(results, previous):
+    """ Rows with the time of each measurement in the previous run, this run and their ratio """
+    rows = []
+    for scale in sorted(results['scales']):
+        if scale not in previous.get('scales', {}):
+            continue
+        for group, unit, suffix in (('timings_ms', 'ms', ''), ('services_cold_us', 'us', ' (cold)'), ('services_us', 'us', '')):
+            for name, value in sorted(results['scales'][scale].get(group, {}).items()):
+                old = previous['scales'][scale].get(group, {}).get(name)
+                if old:
+                    rows.append([scale, name + suffix, "%.3f %s" % (old, unit), "%.3f %s" % (value, unit), "%.2fx" % (value / old)])
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scales', nargs='+', choices=sorted(SCALES), default=['small', 'medium'])
+    parser.add_argument('--launch', default=DEFAULT_LAUNCH, help="Launch file with the static frames of the CAD files")
+    parser.add_argument('--calls', type=int, default=1000, help="Requests of each service")
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--keep', default="", help="Folder where the synthetic data folders are kept, by default a temporary one")
+    parser.add_argument('--json', default="")
+    parser.add_argument('--compare', default="", help="JSON of a previous run")
+    args = parser.parse_args()
+
+    frames = launchFrames(args.launch)
+    base = args.keep if args.keep != "" else tempfile.mkdtemp()
+    results = {'python': sys.version.split()[0], 'machine': platform.platform(), 'date': time.strftime('%Y-%m-%d %H:%M:%S'), 'scales': {}}
+    rows = []
+    try:
+        for scale in args.scales:
+            result = run_scale(os.path.join(base, scale), SCALES[scale], frames, args.repeat, args.calls)
+            results['scales'][scale] = result
+            for name, value in sorted(result['timings_ms'].items()):
+                rows.append([scale, name, "%.3f ms" % value, ""])
+            for name, value in sorted(result['services_us'].items()):
+                rows.append([scale, name, "%.2f us" % result['services_cold_us'][name], "%.2f us" % value])
+    finally:
+        if args.keep == "":
+            shutil.rmtree(base)
+    results['peak_rss_kb'] = bench_common.peak_rss_kb()
+    bench_common.print_table(['scale', 'path', 'time (cold)', 'warm'], rows)
+    if args.compare != "":
+        with open(args.compare) as f:
+            previous = json.load(f)
+        print("")
+        bench_common.print_table(['scale', 'path', 'previous', 'now', 'ratio'], compare(results, previous))
+    bench_common.write_results(args.json, results)
+
+
+if __name__ == '__main__':
+    main()
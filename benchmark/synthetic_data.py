@@ -0,0 +1,247 @@
+#!/usr/bin/env python
+"""
+Generator of synthetic data folders with the same files and formats as the data folders of the package
+(platform, combs and ATC *_cad.x3d and *_ids.wri, Jigs_definition_v2.xml, Components_definition.csv,
+WH_configuration.xml and Assembly_sequence.csv), at a configurable scale.
+The jigs are placed in a grid on the table and share a few commercial models, as in the real platform. Every harness
+has its connector extracted from a comb, placed in a jig, its branches routed through --route guides and taped.
+
+    python synthetic_data.py output_folder [--jigs 200] [--guides 10] [--harnesses 50] [--cables 20] [--sequence 1000]
+"""
+import os
+import random
+import argparse
+
+JIG_MODELS = 8  #Commercial models shared by the jigs
+COMB_GUIDES = 10
+BOX_TRAYS = 4
+GRID_MM = 120.0  #Distance between the jigs on the table
+SCALES = {
+    'small': dict(jigs=20, guides=4, harnesses=5, cables=10, sequence=50),
+    'medium': dict(jigs=200, guides=10, harnesses=50, cables=20, sequence=1000),
+    'large': dict(jigs=1000, guides=20, harnesses=200, cables=50, sequence=10000),
+}
+
+X3D_HEADER = """<?xml version="1.0" encoding="UTF-8"?>
+<!DOCTYPE X3D PUBLIC "ISO//Web3D//DTD X3D 3.0//EN" "http://www.web3d.org/specifications/x3d-3.0.dtd">
+<X3D version="3.0" profile="Immersive" xmlns:xsd="http://www.w3.org/2001/XMLSchema-instance" xsd:noNamespaceSchemaLocation="http://www.web3d.org/specifications/x3d-3.0.xsd">
+\t<head>
+\t\t<meta name="filename" content="%s" />
+\t\t<meta name="generator" content="synthetic_data.py" />
+\t</head>
+\t<Scene>
+"""
+X3D_FOOTER = "\t</Scene>\n</X3D>\n"
+
+
+def pose_xml(indent, x, y, z, R=0.0, P=0.0, Y=0.0):
+    lines = []
+    for tag, name, value in (('pos', 'x', x), ('pos', 'y', y), ('pos', 'z', z), ('rot', 'R', R), ('rot', 'P', P), ('rot', 'Y', Y)):
+        lines.append('%s<%s name="%s">%g</%s>' % (indent, tag, name, value, tag))
+    return "\n".join(lines) + "\n"
+
+
+def box_shape(indent, xdim, ydim, zdim):
+    """ IndexedFaceSet of a box, so the size of the CAD files is close to the exported ones """
+    points = " ".join("%f %f %f" % (x, y, z) for x in (0, xdim) for y in (0, ydim) for z in (0, zdim))
+    faces = "0 1 3 2 -1 4 6 7 5 -1 0 4 5 1 -1 2 3 7 6 -1 0 2 6 4 -1 1 5 7 3 -1 "
+    return ('%s<Shape>\n%s\t<Appearance>\n%s\t</Appearance>\n%s\t<IndexedFaceSet solid="false" coordIndex="%s">\n'
+            '%s\t\t<Coordinate point="%s" />\n%s\t</IndexedFaceSet>\n%s</Shape>\n') % (
+        indent, indent, indent, indent, faces, indent, points, indent, indent)
+
+
+class CADWriter(object):
+    """ *_cad.x3d and *_ids.wri of a table (T) with its components as children transforms """
+    def __init__(self, name, table_label, table_model):
+        self.name = name
+        self.rows = [(table_label, table_model)]
+        self.components = []  #(translation mm, rotation angle around z, dimensions mm)
+
+    def add(self, label, model, translation, angle, dimensions):
+        self.rows.append((label, model))
+        self.components.append((translation, angle, dimensions))
+
+    def write(self, folder, table_dimensions):
+        ids = ["ID%06d" % (i + 1) for i in range(len(self.rows))]
+        with open(os.path.join(folder, self.name + "_ids.wri"), 'w') as f:
+            for cad_id, (label, model) in zip(ids, self.rows):
+                f.write("%s\t%s\t%s\n" % (cad_id, label, model))
+        with open(os.path.join(folder, self.name + "_cad.x3d"), 'w') as f:
+            f.write(X3D_HEADER % (self.name + ".x3d"))
+            f.write('\t\t<Transform DEF="%s" translation="0.000000 0.000000 0.000000" scale="0.001000 0.001000 0.001000" rotation="0.000000 0.000000 1.000000 0.000000">\n' % ids[0])
+            f.write(box_shape("\t\t\t", *table_dimensions))
+            for cad_id, (translation, angle, dimensions) in zip(ids[1:], self.components):
+                f.write('\t\t\t<Transform DEF="%s" translation="%f %f %f" rotation="0.000000 0.000000 1.000000 %f">\n' % ((cad_id,) + tuple(translation) + (angle,)))
+                f.write(box_shape("\t\t\t\t", *dimensions))
+                f.write('\t\t\t</Transform>\n')
+            f.write('\t\t</Transform>\n')
+            f.write(X3D_FOOTER)
+
+
+def jig_model_xml(model, guides, tape_spots):
+    ydim = 30.0 + 20.0 * guides
+    text = '    <jig model="%s" xdim="10" xcol1="0" xcol2="10" ydim="%g" ycol1="-8" ycol2="%g" zdim="100">\n' % (model, ydim, ydim - 8)
+    for g in range(guides):
+        text += '        <guide couple="%d">\n' % (g + 1)
+        text += '            <key length="10" gap="10" height="55" height_corner="55" xcol1="0" xcol2="10" ycol1="-14" ycol2="24">\n'
+        text += pose_xml('                ', 0, 6 + 20 * g, 100)
+        text += '            </key>\n'
+        text += '            <collision xdim="7.2" ydim="19.8" zdim="10">\n'
+        text += pose_xml('                ', 18.4, 20 * g, 55)
+        text += '            </collision>\n'
+        text += '        </guide>\n'
+    for t in range(tape_spots):
+        text += '        <tape_spot id="%d" xdim="10" ydim="10" zdim="-60" guide="%d">\n' % (t + 1, t % guides + 1)
+        text += pose_xml('            ', 0, 23.53 + 20 * t, 41.43, -0.2618)
+        text += '        </tape_spot>\n'
+    return text + '    </jig>\n'
+
+
+def comb_model_xml(model, guides):
+    text = '    <comb model="%s" xdim="3" xcol1="0" xcol2="3" ydim="%g" ycol1="0" ycol2="%g" zdim="5">\n' % (model, 21 * guides, 21 * guides)
+    for g in range(guides):
+        text += '        <guide couple="%d">\n' % (g + 1)
+        text += '            <key length="4" gap="3" height="28.5" height_corner="0" xcol1="0" xcol2="3" ycol1="0" ycol2="21">\n'
+        text += pose_xml('                ', 9.75, 21 * g, 5)
+        text += '            </key>\n'
+        text += '            <collision xdim="0" ydim="0" zdim="0">\n'
+        text += pose_xml('                ', 0, 0, 0)
+        text += '            </collision>\n'
+        text += '        </guide>\n'
+    return text + '    </comb>\n'
+
+
+def box_model_xml(model, trays):
+    text = '    <box model="%s" xdim="560" ydim="%g" zdim="49.51">\n' % (model, 110.0 * trays)
+    for t in range(trays):
+        text += '        <tray id="%d" xdim="550" ydim="105" zdim="14.83">\n' % (t + 1)
+        text += pose_xml('            ', 5, 110 * t, 4.83)
+        text += '        </tray>\n'
+    return text + '    </box>\n'
+
+
+def ATC_models_xml():
+    text = '    <ATC_station model="0000301" xdim="10" ydim="34" zdim="65" tool="gun">\n'
+    text += '        <tool_base>\n' + pose_xml('            ', 66.75, 34.5, 145.0, -1.57, 0, -1.57) + '        </tool_base>\n'
+    text += '        <tool_end>\n' + pose_xml('            ', 100.0, -55.0, 86.0, 0, 1.57, 0) + '        </tool_end>\n'
+    text += '        <tool_dim x="220.0" y="300.0" z="100.0"></tool_dim>\n'
+    text += '    </ATC_station>\n'
+    text += '    <ATC_station model="0000302" xdim="10" ydim="34" zdim="65" tool="gripper">\n'
+    text += '        <tool_base>\n' + pose_xml('            ', 25.0, -48.0, 115.0, -1.57, 0, -1.57) + '        </tool_base>\n'
+    text += '        <tool_end>\n' + pose_xml('            ', 0, 0, 240.0) + '        </tool_end>\n'
+    text += '        <tool_dim x="73.0" y="25.0" z="265.0"></tool_dim>\n'
+    text += '        <finger_dim finger_length="40.0" finger_width="20.0" finger_height="125.0"></finger_dim>\n'
+    text += '        <gripper_nail>\n' + pose_xml('            ', 0, 0, 260.0) + '        </gripper_nail>\n'
+    text += '    </ATC_station>\n'
+    return text
+
+
+def writeDataset(folder, jigs=200, guides=10, harnesses=50, cables=20, sequence=1000, branches=4, route=6, tape_spots=2, seed=0):
+    """
+    Writes a synthetic data folder. guides and tape_spots are per jig, cables per harness (split in branches) and
+    sequence is the number of operations of Assembly_sequence.csv. Returns a dictionary with the size of the folder
+    """
+    generator = random.Random(seed)
+    if not os.path.isdir(folder):
+        os.makedirs(folder)
+    boxes = max(1, (harnesses + BOX_TRAYS - 1) // BOX_TRAYS)
+    combs = max(1, (harnesses + COMB_GUIDES - 1) // COMB_GUIDES)
+    columns = max(1, int(round(jigs ** 0.5)))
+
+    #Platform: jigs in a grid and the boxes of the harnesses in a row behind them
+    platform = CADWriter('platform', 'T1', '0000001')
+    jig_models = ['%07d' % (11 + m) for m in range(min(JIG_MODELS, jigs))]
+    for j in range(jigs):
+        translation = (GRID_MM * (j % columns), GRID_MM * (j // columns), 5.0)
+        platform.add('J%d' % (j + 1), jig_models[j % len(jig_models)], translation, generator.choice([0.0, 1.570796]), (10, 30 + 20 * guides, 100))
+    for b in range(boxes):
+        platform.add('B%d' % (b + 1), '0000102', (600.0 * b, -600.0, 0.0), 0.0, (560, 110 * BOX_TRAYS, 50))
+    platform.write(folder, (GRID_MM * columns + 100, GRID_MM * (jigs // columns + 1) + 100, 5))
+    combs_cad = CADWriter('combs', 'T2', '0000201')
+    for c in range(combs):
+        combs_cad.add('C%d' % (c + 1), '0000210', (0.0, 250.0 * c, 0.0), 0.0, (3, 21 * COMB_GUIDES, 5))
+    combs_cad.write(folder, (100, 250 * combs, 5))
+    ATC = CADWriter('ATC', 'T1', '0000001')
+    ATC.add('Agun', '0000301', (0.0, 0.0, 0.0), 0.0, (10, 34, 65))
+    ATC.add('Agripper_right', '0000302', (0.0, 100.0, 0.0), 0.0, (10, 34, 65))
+    ATC.add('Agripper_left', '0000302', (0.0, 200.0, 0.0), 0.0, (10, 34, 65))
+    ATC.write(folder, (100, 300, 5))
+
+    with open(os.path.join(folder, 'Jigs_definition_v2.xml'), 'w') as f:
+        f.write('<?xml version="1.0"?>\n<data>\n')
+        for model in jig_models:
+            f.write(jig_model_xml(model, guides, tape_spots))
+        f.write(comb_model_xml('0000210', COMB_GUIDES))
+        f.write(box_model_xml('0000102', BOX_TRAYS))
+        f.write(ATC_models_xml())
+        f.write('</data>\n')
+
+    #Harnesses: first connector CONi, branches with end connector CONi_k and their cables
+    harness_branches = []
+    with open(os.path.join(folder, 'Components_definition.csv'), 'w') as components:
+        components.write("Type;Model;Reference;Label;Color;length;Diameter;x;y;z;Type\n")
+        with open(os.path.join(folder, 'WH_configuration.xml'), 'w') as f:
+            f.write('<?xml version="1.0"?>\n<data>\n')
+            cable = 0
+            for h in range(harnesses):
+                first = 'CON%d' % (h + 1)
+                components.write("Connector;VGA;99999999;%s;Grey;;;32.9;14.64;46.55;\n" % first)
+                f.write('    <wiring_harness id="%d" first_connector="%s" tray="B%d.%d">\n' % (h + 1, first, h // BOX_TRAYS + 1, h % BOX_TRAYS + 1))
+                labels = []
+                harness_branches_number = max(1, min(branches, cables))
+                for k in range(harness_branches_number):
+                    label = 'CON%d_%d' % (h + 1, k + 1)
+                    labels.append(label)
+                    components.write("Connector;VGA;99999999;%s;Grey;;;32.9;14.64;46.55;\n" % label)
+                    f.write('        <end_connector label="%s">\n' % label)
+                    for c in range(k, cables, harness_branches_number):
+                        cable += 1
+                        components.write("Cable;;;CA%d;%s;500;5.1;;;;\n" % (cable, generator.choice(['Grey', 'Blue', 'Red', 'Green', 'Yellow'])))
+                        f.write('            <cable Row1="%d" Col1="0" Row2="%d" Col2="0">CA%d</cable>\n' % (c, c // harness_branches_number, cable))
+                    f.write('        </end_connector>\n')
+                f.write('    </wiring_harness>\n')
+                harness_branches.append((first, labels))
+            f.write('</data>\n')
+
+    #Sequence: the operations of each harness in turn until it has the required length
+    operations = []
+    h = 0
+    while len(operations) < sequence and harnesses > 0:
+        first, labels = harness_branches[h % harnesses]
+        operations.append(('EC', first, 'C%d.%d.R' % (h % harnesses // COMB_GUIDES + 1, h % COMB_GUIDES + 1)))
+        operations.append(('PC', first, 'J%d.%d.L' % (generator.randint(1, jigs), generator.randint(1, guides))))
+        for label in labels:
+            route_jigs = generator.sample(range(1, jigs + 1), min(route, jigs))
+            operations.append(('RC', label, "-".join('J%d.%d' % (j, generator.randint(1, guides)) for j in route_jigs)))
+            if tape_spots > 0:
+                operations.append(('T', label, 'J%d.TS%d' % (route_jigs[-1], generator.randint(1, tape_spots))))
+        h += 1
+    with open(os.path.join(folder, 'Assembly_sequence.csv'), 'w') as f:
+        f.write("Order;Type of operation;Label;Spot\n")
+        for i, (operation, label, spot) in enumerate(operations[:sequence]):
+            f.write("%d;%s;%s;%s\n" % (i + 1, operation, label, spot))
+    return {'jigs': jigs, 'guides': jigs * guides, 'tape_spots': jigs * tape_spots, 'combs': combs, 'boxes': boxes,
+            'harnesses': harnesses, 'cables': harnesses * cables, 'operations': min(sequence, len(operations))}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('folder')
+    parser.add_argument('--scale', choices=sorted(SCALES), default='medium', help="Default values of the sizes")
+    parser.add_argument('--jigs', type=int)
+    parser.add_argument('--guides', type=int, help="Guides per jig")
+    parser.add_argument('--harnesses', type=int)
+    parser.add_argument('--cables', type=int, help="Cables per harness")
+    parser.add_argument('--sequence', type=int, help="Operations of the assembly sequence")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    sizes = dict(SCALES[args.scale])
+    for key in sizes:
+        if getattr(args, key) is not None:
+            sizes[key] = getattr(args, key)
+    print(writeDataset(args.folder, seed=args.seed, **sizes))
+
+
+if __name__ == '__main__':
+    main()
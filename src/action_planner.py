@@ -13,25 +13,27 @@ from std_srvs.srv import Trigger, TriggerRequest
 from std_srvs.srv import Empty, EmptyResponse
 from elvez_pkg.msg import *
 from elvez_pkg.srv import *
+from service_client import ServiceClient
+from planner_core import PlannerCore
 from move_sda10f.srv import Pose_srv, Pose_srvRequest
 from move_sda10f.msg import moveActFeedback, moveActResult, moveActAction, moveActGoal
 
 rospy.init_node('action_planner')
-rate = rospy.Rate(10)
-next = False
-reset = False
-simulation = False
 executeSeq_service = 'ELVEZ_platform_planner/executeSeq'
 resetSeq_service = 'ELVEZ_platform_planner/resetSeq'
 simulation_service = 'ELVEZ_platform_planner/simulation'
+#The service callbacks post commands that are executed at once by the worker of the core
+core = PlannerCore('action_planner_core')
+#Persistent connections with the handler and skill manager services, their latency is printed at shutdown
+services = ServiceClient(persistent=rospy.get_param('~persistent_services', True))
+rospy.on_shutdown(lambda: rospy.loginfo("Service latencies:\n" + services.report() + "\nCommand latencies:\n" + core.report()))
 
 
 def executeSeq_callback(req): 
     """
     Calls the next operation service of the CAD platform
     """
-    global next
-    next = True
+    core.post('next')
     return EmptyResponse()
 
 rospy.Service(executeSeq_service, Empty, executeSeq_callback)
@@ -41,8 +43,7 @@ def resetSeq_callback(req):
     """
     Calls the next operation service of the CAD platform
     """
-    global reset
-    reset = True
+    core.post('reset')
     return EmptyResponse()
 
 rospy.Service(resetSeq_service, Empty, resetSeq_callback)
@@ -52,8 +53,7 @@ def simulation_callback(req):
     """
     Calls the next operation service of the CAD platform
     """
-    global simulation
-    simulation = True
+    core.post('simulation')
     return EmptyResponse()
 
 rospy.Service(simulation_service, Empty, simulation_callback)
@@ -63,186 +63,156 @@ def move_to_pose_feeback_callback(feedback):
     print(feedback)
 
 
-print(next)
-
-
-while not rospy.is_shutdown():
-    #print(next)
-    if next:
-        rospy.wait_for_service('/ELVEZ_platform_handler/next_operation')
-        my_service = rospy.ServiceProxy('/ELVEZ_platform_handler/next_operation', next_operation)
-        nextReq = next_operationRequest()
-        next_taskResult = my_service(nextReq)
-        print("Peticion realizada")
-        print(next_taskResult)
-        next = False
-
-
-        if next_taskResult.type=='PC':
-	    print("")
-            print("Connector info:")
-            rospy.wait_for_service('/ELVEZ_platform_handler/connector_info')
-            my_service = rospy.ServiceProxy('/ELVEZ_platform_handler/connector_info', connector_info)
-            connectorReq = connector_infoRequest()
-            connectorReq.label = next_taskResult.label[0]
-            connectorResult = my_service(connectorReq)
-            print(connectorResult)
-
-            print("")
-            print("Guide Keypoints info:")
-            rospy.wait_for_service('/ELVEZ_platform_handler/guide_info')
-            my_service = rospy.ServiceProxy('/ELVEZ_platform_handler/guide_info', guide_info)
-            guideReq = guide_infoRequest()
-            guideReq.jig = next_taskResult.spot[0].jig
-            guideReq.guide = next_taskResult.spot[0].id
-            guideResult = my_service(guideReq)
-            print(guideResult)
-
-	    print("")
-            print("Tray where that connector is located ("+connectorResult.box+"."+connectorResult.tray+"):")
-            rospy.wait_for_service('/ELVEZ_platform_handler/tray_info')
-            my_service = rospy.ServiceProxy('/ELVEZ_platform_handler/tray_info', tray_info)
-            trayReq = tray_infoRequest()
-            trayReq.box = connectorResult.box
-            trayReq.tray = connectorResult.tray
-            trayResult = my_service(trayReq)
-            print(trayResult)
-	    """  
-	    try:
-	      rospy.wait_for_service('sda10f_simulation/move_to_pose')
-	      my_service = rospy.ServiceProxy('sda10f_simulation/move_to_pose', Pose_srv)
-	      PoseReq = Pose_srvRequest()
-	      PoseReq.pose = guideResult.data.key_center_frame
-              PoseResult = my_service(PoseReq)
-	      print("Moving...")
-	      print(PoseResult)
-	    except:
-	      print("No moving")
-	    """
-
-        elif next_taskResult.type=='RC':
-            print("")
-            print("Cables info:")
-
-            for label in next_taskResult.label:
-                if label[:2] == 'CA':
-                    rospy.wait_for_service('/ELVEZ_platform_handler/cable_info')
-                    my_service = rospy.ServiceProxy('/ELVEZ_platform_handler/cable_info', cable_info)
+def next_operation_info():
+    nextReq = next_operationRequest()
+    next_taskResult = services.call('/ELVEZ_platform_handler/next_operation', next_operation, nextReq)
+    print("Peticion realizada")
+    print(next_taskResult)
+
+
+    if next_taskResult.type=='PC':
+        print("")
+        print("Connector info:")
+        connectorReq = connector_infoRequest()
+        connectorReq.label = next_taskResult.label[0]
+        connectorResult = services.call('/ELVEZ_platform_handler/connector_info', connector_info, connectorReq)
+        print(connectorResult)
+
+        print("")
+        print("Guide Keypoints info:")
+        guideReq = guide_infoRequest()
+        guideReq.jig = next_taskResult.spot[0].jig
+        guideReq.guide = next_taskResult.spot[0].id
+        guideResult = services.call('/ELVEZ_platform_handler/guide_info', guide_info, guideReq)
+        print(guideResult)
+
+        print("")
+        print("Tray where that connector is located ("+connectorResult.box+"."+connectorResult.tray+"):")
+        trayReq = tray_infoRequest()
+        trayReq.box = connectorResult.box
+        trayReq.tray = connectorResult.tray
+        trayResult = services.call('/ELVEZ_platform_handler/tray_info', tray_info, trayReq)
+        print(trayResult)
+        """  
+        try:
+          PoseReq = Pose_srvRequest()
+          PoseReq.pose = guideResult.data.key_center_frame
+          PoseResult = services.call('sda10f_simulation/move_to_pose', Pose_srv, PoseReq)
+          print("Moving...")
+          print(PoseResult)
+        except:
+          print("No moving")
+        """
+
+    elif next_taskResult.type=='RC':
+        print("")
+        print("Cables info:")
+
+        for label in next_taskResult.label:
+            if label[:2] == 'CA':
+                cableReq = cable_infoRequest()
+                cableReq.label = label
+                cableResult = services.call('/ELVEZ_platform_handler/cable_info', cable_info, cableReq)
+                print(cableResult)
+                print("")
+            else:
+                connectorReq = connector_infoRequest()
+                connectorReq.label = label
+                connectorResult = services.call('/ELVEZ_platform_handler/connector_info', connector_info, connectorReq)
+                for cableLabel in connectorResult.cables:
                     cableReq = cable_infoRequest()
-                    cableReq.label = label
-                    cableResult = my_service(cableReq)
+                    cableReq.label = cableLabel.label
+                    cableResult = services.call('/ELVEZ_platform_handler/cable_info', cable_info, cableReq)
                     print(cableResult)
                     print("")
-                else:
-                    rospy.wait_for_service('/ELVEZ_platform_handler/connector_info')
-                    my_service = rospy.ServiceProxy('/ELVEZ_platform_handler/connector_info', connector_info)
-                    connectorReq = connector_infoRequest()
-                    connectorReq.label = label
-                    connectorResult = my_service(connectorReq)
-                    for cableLabel in connectorResult.cables:
-                        rospy.wait_for_service('/ELVEZ_platform_handler/cable_info')
-                        my_service = rospy.ServiceProxy('/ELVEZ_platform_handler/cable_info', cable_info)
-                        cableReq = cable_infoRequest()
-                        cableReq.label = cableLabel.label
-                        cableResult = my_service(cableReq)
-                        print(cableResult)
-                        print("")
-
-            for spot in next_taskResult.spot:
-                print("Guide Keypoints info:")
-                rospy.wait_for_service('/ELVEZ_platform_handler/guide_info')
-                my_service = rospy.ServiceProxy('/ELVEZ_platform_handler/guide_info', guide_info)
-                guideReq = guide_infoRequest()
-                guideReq.jig = spot.jig
-                guideReq.guide = spot.id
-                guideResult = my_service(guideReq)
-                print(guideResult)
-                print("")
-
 
-        elif next_taskResult.type=='T':
-            print("")
-            print("Taping spot Keypoints info:")
-            rospy.wait_for_service('/ELVEZ_platform_handler/taping_spot_info')
-            my_service = rospy.ServiceProxy('/ELVEZ_platform_handler/taping_spot_info', taping_spot_info)
-            tapeReq = taping_spot_infoRequest()
-            tapeReq.jig = next_taskResult.spot[0].jig
-            tapeReq.spot = next_taskResult.spot[0].id
-            tapeResult = my_service(tapeReq)
-            print(tapeResult)
-
-    if reset:
-        rospy.wait_for_service('/ELVEZ_platform_handler/reset_sequence_list')
-        my_service = rospy.ServiceProxy('/ELVEZ_platform_handler/reset_sequence_list', Trigger)
-        requ = TriggerRequest()
-        result = my_service(requ)
-        print("Reset realizado")
-        print(result)
-        reset = False
-
-    if simulation:
-	#Reset to the first operation --> placing a connector
-	simulation = False
-	rospy.wait_for_service('/ELVEZ_platform_handler/reset_sequence_list')
-        my_service = rospy.ServiceProxy('/ELVEZ_platform_handler/reset_sequence_list', Trigger)
-        requ = TriggerRequest()
-        result = my_service(requ)
-        print("Reset to first operation")
-        print(result)
-
-	#Obtains information about the first operation
-        rospy.wait_for_service('/ELVEZ_platform_handler/next_operation')
-        my_service = rospy.ServiceProxy('/ELVEZ_platform_handler/next_operation', next_operation)
-        nextReq = next_operationRequest()
-        next_taskResult = my_service(nextReq)
-        print("Obtaining the first operation...")
-        print(next_taskResult)
-
-        if next_taskResult.type=='PC':
-	    #Obtains information about the connector of the operation (tray where it is located)
-	    print("")
-            print("Connector info:")
-            rospy.wait_for_service('/ELVEZ_platform_handler/connector_info')
-            my_service = rospy.ServiceProxy('/ELVEZ_platform_handler/connector_info', connector_info)
-            connectorReq = connector_infoRequest()
-            connectorReq.label = next_taskResult.label[0]
-            connectorResult = my_service(connectorReq)
-            print(connectorResult)
-
-	    #Obtains information about the guide of the operation (keypoint)
-            print("")
+        for spot in next_taskResult.spot:
             print("Guide Keypoints info:")
-            rospy.wait_for_service('/ELVEZ_platform_handler/guide_info')
-            my_service = rospy.ServiceProxy('/ELVEZ_platform_handler/guide_info', guide_info)
             guideReq = guide_infoRequest()
-            guideReq.jig = next_taskResult.spot[0].jig
-            guideReq.guide = next_taskResult.spot[0].id
-            guideResult = my_service(guideReq)
+            guideReq.jig = spot.jig
+            guideReq.guide = spot.id
+            guideResult = services.call('/ELVEZ_platform_handler/guide_info', guide_info, guideReq)
             print(guideResult)
+            print("")
+
 
-	    #Obtain information about the tray where the connector is (keypoint)
-	    print("")
-            print("Tray where that connector is located ("+connectorResult.box+"."+connectorResult.tray+"):")
-            rospy.wait_for_service('/ELVEZ_platform_handler/tray_info')
-            my_service = rospy.ServiceProxy('/ELVEZ_platform_handler/tray_info', tray_info)
-            trayReq = tray_infoRequest()
-            trayReq.box = connectorResult.box
-            trayReq.tray = connectorResult.tray
-            trayResult = my_service(trayReq)
-            print(trayResult)
-	    
-	    #Launch the simulation service
-	    try:
-	      client=actionlib.SimpleActionClient('sda10f_simulation/move_to_pose_action', moveActAction)
-	      client.wait_for_server()
-	      actionGoal = moveActGoal()
-	      #PoseReq.poseTray = trayResult.key_center_frame
-	      actionGoal.poseTray = trayResult.key_corner_frame
-	      actionGoal.poseGuide = guideResult.data.key_center_frame
-              client.send_goal(actionGoal, feedback_cb = move_to_pose_feeback_callback)
-	      print("Moving...")
-	      client.wait_for_result()
-	    except:
-	      print("No moving")
-   
-    rate.sleep()
+    elif next_taskResult.type=='T':
+        print("")
+        print("Taping spot Keypoints info:")
+        tapeReq = taping_spot_infoRequest()
+        tapeReq.jig = next_taskResult.spot[0].jig
+        tapeReq.spot = next_taskResult.spot[0].id
+        tapeResult = services.call('/ELVEZ_platform_handler/taping_spot_info', taping_spot_info, tapeReq)
+        print(tapeResult)
+
+core.register('next', next_operation_info)
+
+
+def reset_sequence():
+    requ = TriggerRequest()
+    result = services.call('/ELVEZ_platform_handler/reset_sequence_list', Trigger, requ)
+    print("Reset realizado")
+    print(result)
+
+core.register('reset', reset_sequence)
+
+
+def run_simulation():
+    #Reset to the first operation --> placing a connector
+    requ = TriggerRequest()
+    result = services.call('/ELVEZ_platform_handler/reset_sequence_list', Trigger, requ)
+    print("Reset to first operation")
+    print(result)
+
+    #Obtains information about the first operation
+    nextReq = next_operationRequest()
+    next_taskResult = services.call('/ELVEZ_platform_handler/next_operation', next_operation, nextReq)
+    print("Obtaining the first operation...")
+    print(next_taskResult)
+
+    if next_taskResult.type=='PC':
+        #Obtains information about the connector of the operation (tray where it is located)
+        print("")
+        print("Connector info:")
+        connectorReq = connector_infoRequest()
+        connectorReq.label = next_taskResult.label[0]
+        connectorResult = services.call('/ELVEZ_platform_handler/connector_info', connector_info, connectorReq)
+        print(connectorResult)
+
+        #Obtains information about the guide of the operation (keypoint)
+        print("")
+        print("Guide Keypoints info:")
+        guideReq = guide_infoRequest()
+        guideReq.jig = next_taskResult.spot[0].jig
+        guideReq.guide = next_taskResult.spot[0].id
+        guideResult = services.call('/ELVEZ_platform_handler/guide_info', guide_info, guideReq)
+        print(guideResult)
+
+        #Obtain information about the tray where the connector is (keypoint)
+        print("")
+        print("Tray where that connector is located ("+connectorResult.box+"."+connectorResult.tray+"):")
+        trayReq = tray_infoRequest()
+        trayReq.box = connectorResult.box
+        trayReq.tray = connectorResult.tray
+        trayResult = services.call('/ELVEZ_platform_handler/tray_info', tray_info, trayReq)
+        print(trayResult)
+
+        #Launch the simulation service
+        try:
+          client=actionlib.SimpleActionClient('sda10f_simulation/move_to_pose_action', moveActAction)
+          client.wait_for_server()
+          actionGoal = moveActGoal()
+          #PoseReq.poseTray = trayResult.key_center_frame
+          actionGoal.poseTray = trayResult.key_corner_frame
+          actionGoal.poseGuide = guideResult.data.key_center_frame
+          client.send_goal(actionGoal, feedback_cb = move_to_pose_feeback_callback)
+          print("Moving...")
+          client.wait_for_result()
+        except:
+          print("No moving")
+
+core.register('simulation', run_simulation)
+
+
+core.start()
+rospy.spin()
@@ -1,375 +1,202 @@
 import os
-import xml.etree.ElementTree as ET
-import xmltodict
+try:
+  import xml.etree.cElementTree as ET
+except ImportError:
+  import xml.etree.ElementTree as ET
 import PyKDL
 import numpy as np
 import csv
+from wri_reader import iterWriRows
+from frame_arrays import LazyFrameDict, posesToMatrices, translateLocal
 
 class InputFilesDataCollector(object): 
 
-  def __init__(self, folder_path, wri_file, wri_file_2, wri_file_3, jigs_file, components_file, WH_file, seq_file):
+  def __init__(self, folder_path, wri_file, wri_file_2, wri_file_3, jigs_file, components_file, WH_file, seq_file, cache=None):
     self.folder_path = folder_path 
+    self.cache = cache  #ModelCache used to skip the parsing of the files that did not change
     self.platform_file_path = os.path.join(folder_path, wri_file)
-    self.dict_platform = self._createPlatformDict(self.platform_file_path)
+    self.dict_platform = self._load('platform', self.platform_file_path, self._createPlatformDict)
 
     if wri_file_2 != "":
-	    self.combs_file_path = os.path.join(folder_path, wri_file_2)
-	    self.dict_combs = self._createPlatformDict(self.combs_file_path)
+      self.combs_file_path = os.path.join(folder_path, wri_file_2)
+      self.dict_combs = self._load('platform', self.combs_file_path, self._createPlatformDict)
 
     if wri_file_3 != "":
-	    self.ATC_file_path = os.path.join(folder_path, wri_file_3)
-	    self.dict_combs = self._createPlatformDict(self.ATC_file_path)
+      self.ATC_file_path = os.path.join(folder_path, wri_file_3)
+      self.dict_combs = self._load('platform', self.ATC_file_path, self._createPlatformDict)
      
     self.jigs_file_path = os.path.join(folder_path, jigs_file)
-    self.dict_jigs = self._createJigsDict(self.jigs_file_path)
+    self.dict_jigs = self._load('jigs', self.jigs_file_path, self._createJigsDict)
 
     self.components_file_path = os.path.join(folder_path, components_file)
-    self.dict_components = self._createComponentsDict(self.components_file_path)
+    self.dict_components = self._load('components', self.components_file_path, self._createComponentsDict)
 
     self.WH_file_path = os.path.join(folder_path, WH_file)
-    self.dict_WH = self._createWHDict(self.WH_file_path)
+    self.dict_WH = self._load('WH', self.WH_file_path, self._createWHDict)
+    self._createWHIndexes()
 
     self.seq_file_path = os.path.join(folder_path, seq_file)
-    self.list_seq = self._createSequenceList(self.seq_file_path)
+    self.list_seq = self._load('sequence', self.seq_file_path, self._createSequenceList)
 
     #print("Working...") 
 
+  def _load(self, part, path, create):
+    """Creates the data of an input file, or loads it from the model cache if the file did not change"""
+    if self.cache is None:
+      return create(path)
+    return self.cache.getOrBuild(part + '_' + os.path.basename(path), [path], lambda: create(path))
+
   def _createPlatformDict(self, path):
-    f = open(path,'r')
-    row = len(f.readlines())
-    f.seek(0)
     dic = {}
-    for index in range(1, row + 1):
-      #print(f.readline())
-      cad, label, product = map(str, f.readline().split('\t'))
-      dic[cad] = {"label": label, "product": product.rstrip()}
-    #print(dic)
+    for cad, label, product in iterWriRows(path):
+      dic[cad] = {"label": label, "product": product}
     return(dic)
 
-  def _createJigsDict(self, path):
-    with open(path) as fd: 
-      doc = xmltodict.parse(fd.read())
-    tree = ET.parse(path)
-    root = tree.getroot()
-    main_dic = {} 
-
-    for code in root: 
-      if code.tag=="jig":
-        dic = {} 
-        couples = {}
-        dic["type"] = "jig"
-        dic["xdim"] = float(code.get('xdim'))/1000
-        dic["ydim"] = float(code.get('ydim'))/1000
-        dic["zdim"] = float(code.get('zdim'))/1000
-	dic["xcol1"] = float(code.get('xcol1'))/1000
-        dic["xcol2"] = float(code.get('xcol2'))/1000
-        dic["ycol1"] = float(code.get('ycol1'))/1000
-	dic["ycol2"] = float(code.get('ycol2'))/1000
-
-        for guide in code.findall('guide'): 
-          key_dict = {}
-          colli_dict={}
-          tape_spots = {}
-          for key in guide.findall('key'):
-            for pos in key.findall('pos'):
-              if pos.get('name') == 'x': 
-                x = float(pos.text)/1000
-              if pos.get('name') == 'y': 
-                y = float(pos.text)/1000
-              if pos.get('name') == 'z': 
-                z = float(pos.text)/1000
-            for rot in key.findall('rot'): 
-              if rot.get('name') == 'R': 
-                R = float(rot.text) 
-              if rot.get('name') == 'P': 
-                P = float(rot.text) 
-              if rot.get('name') == 'Y': 
-                Y = float(rot.text) 
-            tf = PyKDL.Frame() 
-            tf.p = PyKDL.Vector(x, y, z) 
-            tf.M.DoRotX(R) 
-            tf.M.DoRotY(P) 
-            tf.M.DoRotZ(Y)
-            size = []
-            size = [float(key.get('length'))/1000, float(key.get('gap'))/1000, float(key.get('height'))/1000, float(key.get('height_corner'))/1000, float(key.get('xcol1'))/1000, float(key.get('xcol2'))/1000, float(key.get('ycol1'))/1000, float(key.get('ycol2'))/1000]
-            tf2 = PyKDL.Frame()
-            tf2.p = PyKDL.Vector((size[0])/2, (size[1])/2, (size[2])/2)
-            tf2.M.DoRotX(0) 
-            tf2.M.DoRotY(0) 
-            tf2.M.DoRotZ(0)
-            center_pose = tf*tf2 #Frame in the center of the gap of the guide 
-            key_dict = {'frame':tf, 'center_pose':center_pose, 'length': size[0], 'gap': size[1], 'height': size[2], 'height_corner': size[3], 'xcol1': size[4], 'xcol2': size[5], 'ycol1': size[6], 'ycol2': size[7]}
-
-          for colli in guide.findall('collision'):
-            for pos in colli.findall('pos'):
-              if pos.get('name') == 'x': 
-                x = float(pos.text)/1000
-              if pos.get('name') == 'y': 
-                y = float(pos.text)/1000
-              if pos.get('name') == 'z': 
-                z = float(pos.text)/1000
-            for rot in colli.findall('rot'): 
-              if rot.get('name') == 'R': 
-                R = float(rot.text) 
-              if rot.get('name') == 'P': 
-                P = float(rot.text) 
-              if rot.get('name') == 'Y': 
-                Y = float(rot.text) 
-            tf = PyKDL.Frame() 
-            tf.p = PyKDL.Vector(x, y, z) 
-            tf.M.DoRotX(R) 
-            tf.M.DoRotY(P) 
-            tf.M.DoRotZ(Y)
-            colli_dict = {'frame':tf, 'xdim': float(colli.get('xdim'))/1000, 'ydim': float(colli.get('ydim'))/1000, 'zdim': float(colli.get('zdim'))/1000}
-
-          couples[guide.get('couple')] = {'key': key_dict, 'collision': colli_dict}
-        
-        dic["guides"] = couples
-
-        for tape in code.findall('tape_spot'): 
-          for pos in tape.findall('pos'):
-            if pos.get('name') == 'x': 
-              x = float(pos.text)/1000
-            if pos.get('name') == 'y': 
-              y = float(pos.text)/1000
-            if pos.get('name') == 'z': 
-              z = float(pos.text)/1000
-          for rot in tape.findall('rot'): 
-            if rot.get('name') == 'R': 
-              R = float(rot.text) 
-            if rot.get('name') == 'P': 
-              P = float(rot.text) 
-            if rot.get('name') == 'Y': 
-              Y = float(rot.text) 
-          tf = PyKDL.Frame() 
-          tf.p = PyKDL.Vector(x, y, z) 
-          tf.M.DoRotX(R) 
-          tf.M.DoRotY(P) 
-          tf.M.DoRotZ(Y)
-    #Frame of the guide that is going to align the cables in this taping spot
-          tf_guide = PyKDL.Frame()
-          tf_guide = dic['guides'][tape.get('guide')]['key']['center_pose']
-          #Calculations for getting the position of the cables in the taping spot in Y axis
-          dist = (((tf_guide.p[0]-tf.p[0])**2)+((tf_guide.p[1]-tf.p[1])**2))**0.5
-          angle = np.arctan((abs(tf_guide.p[1]-tf.p[1]))/(abs(tf_guide.p[0]-tf.p[0])))
-          angle_dif = 1.57 - Y - angle
-          min_dist = dist*np.cos(angle_dif)
-          tf2 = PyKDL.Frame()
-          tf2.p = PyKDL.Vector(((float(tape.get('xdim')))/2)/1000, min_dist, (tf_guide.p[2])-z)
-          tf2.M.DoRotX(0) 
-          tf2.M.DoRotY(0) 
-          tf2.M.DoRotZ(0)
-          center_pose = tf*tf2 #Frame in the middle of the taping spot (x axis) aligned with the cables (y axis)
-          tape_spots[tape.get('id')] = {'frame':tf, 'center_pose':center_pose, 'xdim': float(tape.get('xdim'))/1000, 'ydim': float(tape.get('ydim'))/1000, 'zdim': float(tape.get('zdim'))/1000}
-
-        dic["tape_spots"] = tape_spots
-        
-        main_dic[code.get("model")] = dic
-
-      elif code.tag=="box":
-        dic = {} 
-        dic["type"] = "box"
-        dic["xdim"] = float(code.get('xdim'))/1000
-        dic["ydim"] = float(code.get('ydim'))/1000
-        dic["zdim"] = float(code.get('zdim'))/1000
-	dic["trays"] = {}
-
-        for tray in code.findall('tray'): 
-          tray_dict = {}
-          for pos in tray.findall('pos'):
-            if pos.get('name') == 'x': 
-              x = float(pos.text)/1000
-            if pos.get('name') == 'y': 
-              y = float(pos.text)/1000
-            if pos.get('name') == 'z': 
-              z = float(pos.text)/1000
-          for rot in tray.findall('rot'): 
-            if rot.get('name') == 'R': 
-              R = float(rot.text) 
-            if rot.get('name') == 'P': 
-              P = float(rot.text) 
-            if rot.get('name') == 'Y': 
-              Y = float(rot.text) 
-          tf = PyKDL.Frame() 
-          tf.p = PyKDL.Vector(x, y, z) 
-          tf.M.DoRotX(R) 
-          tf.M.DoRotY(P) 
-          tf.M.DoRotZ(Y)
-          size = []
-          size = [float(tray.get('xdim'))/1000, float(tray.get('ydim'))/1000, float(tray.get('zdim'))/1000]
-          tf2 = PyKDL.Frame()
-          tf2.p = PyKDL.Vector((size[0])/2, (size[1])/2, 0)
-          tf2.M.DoRotX(0) 
-          tf2.M.DoRotY(0) 
-          tf2.M.DoRotZ(0)
-          center_pose = tf*tf2 #Frame in the center of the tray 
-          tray_dict = {'frame':tf, 'center_pose':center_pose, 'xdim': size[0], 'ydim': size[1], 'zdim': size[2]}
-          dic["trays"][tray.get('id')] = tray_dict
-
-        main_dic[code.get("model")] = dic
-
-      if code.tag=="comb":
-        dic = {} 
-        couples = {}
-        dic["type"] = "comb"
-        dic["xdim"] = float(code.get('xdim'))/1000
-        dic["ydim"] = float(code.get('ydim'))/1000
-        dic["zdim"] = float(code.get('zdim'))/1000
-	dic["xcol1"] = float(code.get('xcol1'))/1000
-        dic["xcol2"] = float(code.get('xcol2'))/1000
-        dic["ycol1"] = float(code.get('ycol1'))/1000
-	dic["ycol2"] = float(code.get('ycol2'))/1000
-
-        for guide in code.findall('guide'): 
-          key_dict = {}
-          colli_dict={}
-          tape_spots = {}
-          for key in guide.findall('key'):
-            for pos in key.findall('pos'):
-              if pos.get('name') == 'x': 
-                x = float(pos.text)/1000
-              if pos.get('name') == 'y': 
-                y = float(pos.text)/1000
-              if pos.get('name') == 'z': 
-                z = float(pos.text)/1000
-            for rot in key.findall('rot'): 
-              if rot.get('name') == 'R': 
-                R = float(rot.text) 
-              if rot.get('name') == 'P': 
-                P = float(rot.text) 
-              if rot.get('name') == 'Y': 
-                Y = float(rot.text) 
-            tf = PyKDL.Frame() 
-            tf.p = PyKDL.Vector(x, y, z) 
-            tf.M.DoRotX(R) 
-            tf.M.DoRotY(P) 
-            tf.M.DoRotZ(Y)
-            size = []
-            size = [float(key.get('length'))/1000, float(key.get('gap'))/1000, float(key.get('height'))/1000, float(key.get('height_corner'))/1000, float(key.get('xcol1'))/1000, float(key.get('xcol2'))/1000, float(key.get('ycol1'))/1000, float(key.get('ycol2'))/1000]
-            tf2 = PyKDL.Frame()
-            tf2.p = PyKDL.Vector((size[0])/2, (size[1])/2, (size[2])/2)
-            tf2.M.DoRotX(0) 
-            tf2.M.DoRotY(0) 
-            tf2.M.DoRotZ(0)
-            center_pose = tf*tf2 #Frame in the center of the gap of the guide 
-            key_dict = {'frame':tf, 'center_pose':center_pose, 'length': size[0], 'gap': size[1], 'height': size[2], 'height_corner': size[3], 'xcol1': size[4], 'xcol2': size[5], 'ycol1': size[6], 'ycol2': size[7]}
-
-          for colli in guide.findall('collision'):
-            for pos in colli.findall('pos'):
-              if pos.get('name') == 'x': 
-                x = float(pos.text)/1000
-              if pos.get('name') == 'y': 
-                y = float(pos.text)/1000
-              if pos.get('name') == 'z': 
-                z = float(pos.text)/1000
-            for rot in colli.findall('rot'): 
-              if rot.get('name') == 'R': 
-                R = float(rot.text) 
-              if rot.get('name') == 'P': 
-                P = float(rot.text) 
-              if rot.get('name') == 'Y': 
-                Y = float(rot.text) 
-            tf = PyKDL.Frame() 
-            tf.p = PyKDL.Vector(x, y, z) 
-            tf.M.DoRotX(R) 
-            tf.M.DoRotY(P) 
-            tf.M.DoRotZ(Y)
-            colli_dict = {'frame':tf, 'xdim': float(colli.get('xdim'))/1000, 'ydim': float(colli.get('ydim'))/1000, 'zdim': float(colli.get('zdim'))/1000}
-
-          couples[guide.get('couple')] = {'key': key_dict, 'collision': colli_dict}
-        
-        dic["guides"] = couples
-
-        main_dic[code.get("model")] = dic
-
-      if code.tag=="ATC_station":
-        dic = {} 
-        couples = {}
-        dic["type"] = "ATC_station"
-        dic["xdim"] = float(code.get('xdim'))/1000
-        dic["ydim"] = float(code.get('ydim'))/1000
-        dic["zdim"] = float(code.get('zdim'))/1000
-	dic["tool"] = code.get('tool')
-	for dim in code.findall('tool_dim'):
-		dic["x_tool"] = float(dim.get('x'))/1000
-		dic["y_tool"] = float(dim.get('y'))/1000
-		dic["z_tool"] = float(dim.get('z'))/1000
-
-        for key in code.findall('tool_base'):
-		for pos in key.findall('pos'): 
-			if pos.get('name') == 'x': 
-		        	x = float(pos.text)/1000
-			if pos.get('name') == 'y': 
-				y = float(pos.text)/1000
-			if pos.get('name') == 'z': 
-		        	z = float(pos.text)/1000
-		for rot in key.findall('rot'): 
-			if rot.get('name') == 'R': 
-				R = float(rot.text) 
-			if rot.get('name') == 'P': 
-				P = float(rot.text) 
-			if rot.get('name') == 'Y': 
-		        	Y = float(rot.text) 
-		tf_base = PyKDL.Frame() 
-		tf_base.p = PyKDL.Vector(x, y, z) 
-		tf_base.M.DoRotX(R) 
-		tf_base.M.DoRotY(P) 
-		tf_base.M.DoRotZ(Y)
-	dic['frame_base'] = tf_base
-
-	for key in code.findall('tool_end'):
-		for pos in key.findall('pos'): 
-			if pos.get('name') == 'x': 
-		        	x = float(pos.text)/1000
-			if pos.get('name') == 'y': 
-				y = float(pos.text)/1000
-			if pos.get('name') == 'z': 
-		        	z = float(pos.text)/1000
-		for rot in key.findall('rot'): 
-			if rot.get('name') == 'R': 
-				R = float(rot.text) 
-			if rot.get('name') == 'P': 
-				P = float(rot.text) 
-			if rot.get('name') == 'Y': 
-		        	Y = float(rot.text) 
-		tf_end = PyKDL.Frame() 
-		tf_end.p = PyKDL.Vector(x, y, z) 
-		tf_end.M.DoRotX(R) 
-		tf_end.M.DoRotY(P) 
-		tf_end.M.DoRotZ(Y)
-	dic['frame_end'] = tf_end
-
-	if dic["tool"] == "gripper":
-		for dim in code.findall('finger_dim'):
-			dic["finger_length"] = float(dim.get('finger_length'))/1000
-			dic["finger_width"] = float(dim.get('finger_width'))/1000
-			dic["finger_height"] = float(dim.get('finger_height'))/1000
-		for key in code.findall('gripper_nail'):
-			for pos in key.findall('pos'): 
-				if pos.get('name') == 'x': 
-					x = float(pos.text)/1000
-				if pos.get('name') == 'y': 
-					y = float(pos.text)/1000
-				if pos.get('name') == 'z': 
-					z = float(pos.text)/1000
-			for rot in key.findall('rot'): 
-				if rot.get('name') == 'R': 
-					R = float(rot.text) 
-				if rot.get('name') == 'P': 
-					P = float(rot.text) 
-				if rot.get('name') == 'Y': 
-					Y = float(rot.text) 
-			tf_nail = PyKDL.Frame() 
-			tf_nail.p = PyKDL.Vector(x, y, z) 
-			tf_nail.M.DoRotX(R) 
-			tf_nail.M.DoRotY(P) 
-			tf_nail.M.DoRotZ(Y)
-		dic['frame_nail'] = tf_nail
-
-	main_dic[code.get("model")] = dic
+  #Attributes (mm) of each type of definition, the keypoints are read by the _read<Child> methods
+  _DEFINITION_DIMS = {
+    'jig': ('xdim', 'ydim', 'zdim', 'xcol1', 'xcol2', 'ycol1', 'ycol2'),
+    'comb': ('xdim', 'ydim', 'zdim', 'xcol1', 'xcol2', 'ycol1', 'ycol2'),
+    'box': ('xdim', 'ydim', 'zdim'),
+    'ATC_station': ('xdim', 'ydim', 'zdim'),
+  }
+  _DEFINITION_CHILDREN = {
+    'jig': ('guide', 'tape_spot'),
+    'comb': ('guide',),
+    'box': ('tray',),
+    'ATC_station': ('tool_dim', 'tool_base', 'tool_end', 'finger_dim', 'gripper_nail'),
+  }
+  _KEY_DIMS = ('length', 'gap', 'height', 'height_corner', 'xcol1', 'xcol2', 'ycol1', 'ycol2')
+  #Attributes that older definition files (e.g. data_UI/complete_CAD_Platform) do not have, they are left out of the dictionary
+  _OPTIONAL_DIMS = ('height_corner', 'xcol1', 'xcol2', 'ycol1', 'ycol2')
+  _POSE_FIELDS = {('pos', 'x'): 0, ('pos', 'y'): 1, ('pos', 'z'): 2, ('rot', 'R'): 3, ('rot', 'P'): 4, ('rot', 'Y'): 5}
 
+  def _createJigsDict(self, path):
+    """Parses the jigs definition file once. All the pose blocks are collected in a single traversal and converted to matrices in bulk, the PyKDL frames are only created when they are read"""
+    root = ET.parse(path).getroot()
+    self._poses = []  #Rows of x, y, z, R, P, Y of every pose block of the file
+    self._frames = []  #(dictionary, key, pose row, local offset of the frame)
+    self._tape_spots = []  #(jig dictionary, tape spot element, pose row)
+    main_dic = {}
+
+    for code in root:
+      if code.tag not in self._DEFINITION_DIMS:
+        continue
+      dic = LazyFrameDict()
+      dic["type"] = code.tag
+      dic.update(self._readDims(code, self._DEFINITION_DIMS[code.tag]))
+      if code.tag == "jig" or code.tag == "comb":
+        dic["guides"] = {}
+      if code.tag == "jig":
+        dic["tape_spots"] = {}
+      if code.tag == "box":
+        dic["trays"] = {}
+      if code.tag == "ATC_station":
+        dic["tool"] = code.get('tool')
+      for child in code:
+        if child.tag in self._DEFINITION_CHILDREN[code.tag]:
+          getattr(self, '_read_' + child.tag)(dic, child)
+      main_dic[code.get("model")] = dic
+
+    matrices = posesToMatrices(np.array(self._poses, dtype=float).reshape(-1, 6) * [0.001, 0.001, 0.001, 1, 1, 1])
+    if self._frames:
+      rows = np.array([frame[2] for frame in self._frames])
+      offsets = np.array([frame[3] for frame in self._frames], dtype=float)
+      frame_matrices = translateLocal(matrices[rows], offsets)
+      for (target, key, row, offset), matrix in zip(self._frames, frame_matrices):
+        target.setMatrix(key, matrix)
+    self._createTapeSpotFrames(matrices)
+
+    del self._poses, self._frames, self._tape_spots
     return main_dic
 
+  def _readDims(self, element, dims):
+    """Attributes of an element in meters, the optional ones that are not in the element are skipped"""
+    values = {}
+    for dim in dims:
+      if element.get(dim) is None and dim in self._OPTIONAL_DIMS:
+        continue
+      values[dim] = float(element.get(dim))/1000
+    return values
+
+  def _addPose(self, element):
+    """Stores the <pos>/<rot> values of an element and returns its row"""
+    row = [0.0] * 6
+    for child in element:
+      field = self._POSE_FIELDS.get((child.tag, child.get('name')))
+      if field is not None:
+        row[field] = float(child.text)
+    self._poses.append(row)
+    return len(self._poses) - 1
+
+  def _addFrame(self, target, key, row, offset=(0.0, 0.0, 0.0)):
+    self._frames.append((target, key, row, offset))
+
+  def _read_guide(self, dic, guide):
+    key_dict = {}
+    colli_dict = {}
+    for child in guide:
+      if child.tag == 'key':
+        key_dict = LazyFrameDict(self._readDims(child, self._KEY_DIMS))
+        row = self._addPose(child)
+        self._addFrame(key_dict, 'frame', row)
+        self._addFrame(key_dict, 'center_pose', row, (key_dict['length']/2, key_dict['gap']/2, key_dict['height']/2))  #Frame in the center of the gap of the guide
+      elif child.tag == 'collision':
+        colli_dict = LazyFrameDict({'xdim': float(child.get('xdim'))/1000, 'ydim': float(child.get('ydim'))/1000, 'zdim': float(child.get('zdim'))/1000})
+        self._addFrame(colli_dict, 'frame', self._addPose(child))
+    dic["guides"][guide.get('couple')] = {'key': key_dict, 'collision': colli_dict}
+
+  def _read_tape_spot(self, dic, tape):
+    #Its center depends on the guide that aligns the cables, so it is computed once all the guides are known
+    self._tape_spots.append((dic, tape, self._addPose(tape)))
+
+  def _read_tray(self, dic, tray):
+    size = [float(tray.get('xdim'))/1000, float(tray.get('ydim'))/1000, float(tray.get('zdim'))/1000]
+    tray_dict = LazyFrameDict({'xdim': size[0], 'ydim': size[1], 'zdim': size[2]})
+    row = self._addPose(tray)
+    self._addFrame(tray_dict, 'frame', row)
+    self._addFrame(tray_dict, 'center_pose', row, (size[0]/2, size[1]/2, 0))  #Frame in the center of the tray
+    dic["trays"][tray.get('id')] = tray_dict
+
+  def _read_tool_dim(self, dic, dim):
+    dic["x_tool"] = float(dim.get('x'))/1000
+    dic["y_tool"] = float(dim.get('y'))/1000
+    dic["z_tool"] = float(dim.get('z'))/1000
+
+  def _read_tool_base(self, dic, key):
+    self._addFrame(dic, 'frame_base', self._addPose(key))
+
+  def _read_tool_end(self, dic, key):
+    self._addFrame(dic, 'frame_end', self._addPose(key))
+
+  def _read_finger_dim(self, dic, dim):
+    if dic["tool"] == "gripper":
+      dic["finger_length"] = float(dim.get('finger_length'))/1000
+      dic["finger_width"] = float(dim.get('finger_width'))/1000
+      dic["finger_height"] = float(dim.get('finger_height'))/1000
+
+  def _read_gripper_nail(self, dic, key):
+    if dic["tool"] == "gripper":
+      self._addFrame(dic, 'frame_nail', self._addPose(key))
+
+  def _createTapeSpotFrames(self, matrices):
+    """Frames of the taping spots: in the middle of the spot (x axis) and aligned with the cables of its guide (y axis)"""
+    if not self._tape_spots:
+      return
+    spots = matrices[[spot[2] for spot in self._tape_spots]]
+    guides = np.array([dic['guides'][tape.get('guide')]['key'].getMatrix('center_pose') for dic, tape, row in self._tape_spots])
+    yaw = np.array([self._poses[row][5] for dic, tape, row in self._tape_spots])
+    half_x = np.array([float(tape.get('xdim'))/2000 for dic, tape, row in self._tape_spots])
+    #Calculations for getting the position of the cables in the taping spot in Y axis
+    diff = guides[:, :3, 3] - spots[:, :3, 3]
+    dist = np.hypot(diff[:, 0], diff[:, 1])
+    angle = np.arctan2(np.abs(diff[:, 1]), np.abs(diff[:, 0]))
+    min_dist = dist*np.cos(1.57 - yaw - angle)
+    centers = translateLocal(spots, np.column_stack((half_x, min_dist, diff[:, 2])))
+    for (dic, tape, row), spot, center in zip(self._tape_spots, spots, centers):
+      dic["tape_spots"][tape.get('id')] = LazyFrameDict(
+        {'xdim': float(tape.get('xdim'))/1000, 'ydim': float(tape.get('ydim'))/1000, 'zdim': float(tape.get('zdim'))/1000},
+        {'frame': spot, 'center_pose': center})
+
   def _createComponentsDict(self, path):
     main_dict = {}
     con_dict = {}
@@ -413,8 +240,6 @@ class InputFilesDataCollector(object):
     return main_dict
 
   def _createWHDict(self, path):
-    with open(path) as fd: 
-      doc = xmltodict.parse(fd.read())
     tree = ET.parse(path)
     root = tree.getroot()
     main_dict = {} 
@@ -449,6 +274,44 @@ class InputFilesDataCollector(object):
       main_dict[WH.get('id')] = WH_dict
     return main_dict
 
+  def _createWHIndexes(self):
+    """Inverted indexes of the wiring harnesses, so the connector, cable and tray lookups do not scan every harness"""
+    self.index_connectors = {}  #label: [(WH, branch)], branch is None for the first connector of the WH
+    self.index_cables = {}  #cable: (WH, branch)
+    self.index_trays = {}  #(box, tray): WH
+    for WH in self.dict_WH:
+      first_con = self.dict_WH[WH]['first_con']
+      self.index_connectors.setdefault(first_con, []).append((WH, None))
+      for branch in self.dict_WH[WH]['end_con']:
+        if branch != first_con:
+          self.index_connectors.setdefault(branch, []).append((WH, branch))
+        for cable in self.dict_WH[WH]['end_con'][branch]:
+          self.index_cables[cable] = (WH, branch)
+      self.index_trays[(self.dict_WH[WH]['box'], self.dict_WH[WH]['tray'])] = WH
+
+  def findConnectorCables(self, label):
+    """Harnesses of a connector (first or end connector) and the (cable, pins) connected to it in each of them"""
+    found = []
+    for WH, branch in self.index_connectors.get(label, []):
+      cables = []
+      if branch is None:
+        for end_con in self.dict_WH[WH]['end_con']:
+          for cable in self.dict_WH[WH]['end_con'][end_con]:
+            cables.append((cable, self.dict_WH[WH]['end_con'][end_con][cable]['first_pins']))
+      else:
+        for cable in self.dict_WH[WH]['end_con'][branch]:
+          cables.append((cable, self.dict_WH[WH]['end_con'][branch][cable]['end_pins']))
+      found.append((WH, cables))
+    return found
+
+  def findCable(self, label):
+    """(WH, branch) of a cable or None"""
+    return self.index_cables.get(label)
+
+  def findTrayWH(self, box, tray):
+    """WH placed in a tray or None"""
+    return self.index_trays.get((box, tray))
+
   def _createSequenceList(self, path):
     main_list = []
 
@@ -0,0 +1,83 @@
+import random
+import numpy as np
+from sequence_optimizer import SequenceOptimizer
+
+#Seconds of each type of operation: (fixed time, time per spot of the operation)
+DEFAULT_DURATIONS = {'EC': (6.0, 0.0), 'PC': (12.0, 0.0), 'RC': (4.0, 3.0), 'T': (10.0, 0.0), 'TJ': (10.0, 0.0)}
+
+
+class CycleSimulator(object):
+    """
+    Offline estimation of the cycle time of an assembly sequence, without the skill manager. Each operation takes the
+    time of its type (durations, {type: (fixed time, time per spot)}) plus the travel between its keypoints, and between
+    two operations the arm travels from the last keypoint of one to the first one of the next, changing the tool if
+    needed (the transition model of SequenceOptimizer).
+    The variants of the sequence are arrays of indexes of the sequence list, and simulate evaluates many of them at once.
+    """
+    def __init__(self, list_seq, jigs_complete_dict, dict_elvez, durations=None, speed=0.25, tool_change_s=8.0):
+        if durations is None:
+            durations = DEFAULT_DURATIONS
+        self.list_seq = list_seq
+        self.model = SequenceOptimizer(list_seq, jigs_complete_dict, dict_elvez, speed, tool_change_s)
+        self.transitions = self.model.transitions
+        self.travel_s = self.model.internalTravel()
+        self.work_s = np.array([durations.get(operation['operation'], (0.0, 0.0))[0] + durations.get(operation['operation'], (0.0, 0.0))[1] * len(operation['spot'])
+                                for operation in list_seq])
+        self.operation_s = self.work_s + self.travel_s
+        #Edges (before, after) of the precedence graph
+        edges = [(j, i) for i, before in enumerate(self.model.predecessors) for j in before]
+        self.edges = np.array(edges, dtype=int).reshape(-1, 2)
+
+    def simulate(self, orders):
+        """ Cycle time of each order, orders is an array (variants x operations) or a single order """
+        orders = np.atleast_2d(np.asarray(orders, dtype=int))
+        cycle = np.full(orders.shape[0], self.operation_s.sum())
+        if orders.shape[1] > 1:
+            cycle += self.transitions[orders[:, :-1], orders[:, 1:]].sum(axis=1)
+        return cycle
+
+    def feasible(self, orders):
+        """ True for each order that keeps the precedence graph """
+        orders = np.atleast_2d(np.asarray(orders, dtype=int))
+        positions = np.empty_like(orders)
+        positions[np.arange(orders.shape[0])[:, None], orders] = np.arange(orders.shape[1])
+        if len(self.edges) == 0:
+            return np.ones(orders.shape[0], dtype=bool)
+        return (positions[:, self.edges[:, 0]] < positions[:, self.edges[:, 1]]).all(axis=1)
+
+    def randomVariants(self, count, seed=None):
+        """ Array of count random orders that keep the precedence graph """
+        generator = random.Random(seed)
+        variants = np.empty((count, len(self.list_seq)), dtype=int)
+        for k in range(count):
+            remaining = [len(before) for before in self.model.predecessors]
+            ready = [i for i, number in enumerate(remaining) if number == 0]
+            for position in range(len(self.list_seq)):
+                operation = ready.pop(generator.randrange(len(ready)))
+                variants[k, position] = operation
+                for successor in self.model.successors[operation]:
+                    remaining[successor] -= 1
+                    if remaining[successor] == 0:
+                        ready.append(successor)
+        return variants
+
+    def timeline(self, order):
+        """ Events of an order: list of (operation index, type, start, end of the travel to it, end) in seconds """
+        events = []
+        time = 0.0
+        previous = None
+        for operation in order:
+            start = time
+            if previous is not None:
+                time += self.transitions[previous, operation]
+            arrival = time
+            time += self.operation_s[operation]
+            events.append((int(operation), self.list_seq[operation]['operation'], start, arrival, time))
+            previous = operation
+        return events
+
+    def breakdown(self, order):
+        """ Seconds of work, travel inside the operations and transitions (travel and tool changes) of an order """
+        order = list(order)
+        return {'work_s': float(self.work_s[order].sum()), 'operation_travel_s': float(self.travel_s[order].sum()),
+                'transition_s': self.model.cost(order), 'cycle_s': float(self.simulate(order)[0])}
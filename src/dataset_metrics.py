@@ -0,0 +1,61 @@
+import os
+import numpy as np
+from offline_layout import loadLayout, DEFAULT_LAUNCH
+from sequence_optimizer import operationPoints
+from cycle_simulator import CycleSimulator
+
+#Data folders of the package that are compared by default
+DATASETS = ('data_routing_v1', 'data_routing_v2', 'data_routing_v3', 'data_routing_v4', 'data_routing_v5', 'data_icps',
+            'data_WH_separation', 'data_UI/complete_CAD_Platform')
+CENTER_POSE = 1  #Index of center_pose in platform_model.GUIDE_FRAMES and SPOT_FRAMES
+
+
+def cadNames(folder, cad_names=('platform', 'combs', 'ATC')):
+    """ Names of the platform, combs and ATC CAD files of a folder, '' for the ones it has not """
+    return tuple(name if os.path.isfile(os.path.join(folder, name + '_ids.wri')) else '' for name in cad_names)
+
+
+def keypointPositions(jigs_complete_dict):
+    """ Positions of the center of all the guides, taping spots and trays, (keypoints, 3) """
+    positions = [np.zeros((0, 3))]
+    for label in sorted(jigs_complete_dict):
+        for keypoints in ('guides', 'tape_spots', 'trays'):
+            if keypoints in jigs_complete_dict[label]:
+                positions.append(jigs_complete_dict[label][keypoints].worldMatrices()[:, CENTER_POSE, :3, 3])
+    return np.concatenate(positions)
+
+
+def routingLength(list_seq, jigs_complete_dict, dict_elvez):
+    """ Meters along the guides of all the RC operations """
+    length = 0.0
+    for operation in list_seq:
+        if operation['operation'] == 'RC':
+            points = operationPoints(operation, jigs_complete_dict, dict_elvez)
+            length += sum(np.linalg.norm(b - a) for a, b in zip(points[:-1], points[1:]))
+    return float(length)
+
+
+def datasetMetrics(folder, launch_file=DEFAULT_LAUNCH, durations=None, speed=0.25, tool_change_s=8.0):
+    """
+    Comparable metrics of a data folder, built without a ROS master: number of components, spread of the keypoints, length of
+    the routings and estimated cycle time of the sequence in file order (CycleSimulator)
+    """
+    dict_elvez, jigs_complete_dict = loadLayout(folder, launch_file, cadNames(folder))
+    types = [jigs_complete_dict[label]['Type'] for label in jigs_complete_dict]
+    positions = keypointPositions(jigs_complete_dict)
+    operations = {}
+    for operation in dict_elvez.list_seq:
+        operations[operation['operation']] = operations.get(operation['operation'], 0) + 1
+    metrics = {
+        'jigs': types.count('J'), 'combs': types.count('C'), 'boxes': types.count('B'), 'ATC_stations': types.count('A'),
+        'connectors': len(dict_elvez.dict_components['connector']), 'devices': len(dict_elvez.dict_components['device']),
+        'cables': len(dict_elvez.dict_components['cable']), 'harnesses': len(dict_elvez.dict_WH),
+        'operations': len(dict_elvez.list_seq), 'operations_by_type': operations, 'keypoints': len(positions),
+        'routing_length_m': routingLength(dict_elvez.list_seq, jigs_complete_dict, dict_elvez),
+    }
+    if len(positions) > 0:
+        metrics['keypoint_extent_m'] = [float(value) for value in positions.max(axis=0) - positions.min(axis=0)]
+        metrics['keypoint_std_m'] = float(np.linalg.norm(positions.std(axis=0)))
+    simulator = CycleSimulator(dict_elvez.list_seq, jigs_complete_dict, dict_elvez, durations, speed, tool_change_s)
+    metrics.update(simulator.breakdown(range(len(dict_elvez.list_seq))))
+    return metrics
@@ -1,9 +1,14 @@
 import os
 import PyKDL
-import xml.etree.ElementTree as ET
+try:
+    import xml.etree.cElementTree as ET
+except ImportError:
+    import xml.etree.ElementTree as ET
 import numpy as np
 import math
 from PyKDL import Frame
+from wri_reader import iterWriRows
+from frame_arrays import frameToMatrix
 
 class ItemID(object): 
     """Class that saves the different elements of the ELVEZ platform with its CAD ID, its label and its commercial number"""
@@ -45,10 +50,10 @@ class ItemID(object):
  
 
 class Transform(PyKDL.Frame):
-    def __init__(self, node, scale, file_name, parent=None):
+    def __init__(self, node, scale, file_name, parent=None, build_children=True):
         super(PyKDL.Frame, self).__init__() 
         self.node = node 
-	self.scale = scale
+        self.scale = scale
         self.file_name = file_name
         #self.shape
         self.children_transforms = []
@@ -58,9 +63,11 @@ class Transform(PyKDL.Frame):
         self.translation = np.array([0.0, 0.0, 0.0])
         self.rotation = np.array([1.0, 0.0, 0.0, 0.0])
         self.parseAttributes(node) 
-        for element in self.node:
-            if element.tag.lower() == 'transform':
-                self.children_transforms.append(Transform(element, self.scale, file_name, self)) 
+        #When the scene is streamed the children are attached by the loader as they are parsed
+        if build_children:
+            for element in self.node:
+                if element.tag.lower() == 'transform':
+                    self.children_transforms.append(Transform(element, self.scale, file_name, self)) 
 
     def parseAttributes(self, node):  
         """ Saves the attributes of the transform: translation, rotation and ID """
@@ -146,37 +153,158 @@ class Transform(PyKDL.Frame):
 
 
 class Scene(Transform):
-    def __init__(self, node, id_map, file_name):
+    def __init__(self, node, id_map, file_name, build_children=True):
         self.id_map = id_map
-	self.scale = np.array([1.0, 1.0, 1.0])
-        super(Scene, self).__init__(node, self.scale, file_name, None) 
-        self.deepItemIDMapping(id_map)
+        self.scale = np.array([1.0, 1.0, 1.0])
+        super(Scene, self).__init__(node, self.scale, file_name, None, build_children) 
+        if build_children:
+            self.deepItemIDMapping(id_map)
 
     @staticmethod
-    def buildScene(x3d_file, wri_file, file_name):
+    def buildScene(x3d_file, wri_file, file_name, streaming=True):
+        id_map = {}
+        for cad_id, label, commercial in iterWriRows(wri_file):
+            id_map[cad_id] = ItemID(cad_id, label, commercial)
+        if streaming:
+            return Scene.loadSceneStreaming(x3d_file, id_map, file_name)
+        return Scene.loadSceneTree(x3d_file, id_map, file_name)
+
+    @staticmethod
+    def loadSceneTree(x3d_file, id_map, file_name):
+        """ Builds the scene from the complete XML tree of the X3D file """
         tree = ET.parse(x3d_file)
         root = tree.getroot()
-        id_map = {}
-        with open(wri_file) as rfile:
-            content = rfile.readlines()
-            for line in content:
-                chunks = line.split('\t')
-                for line in content:
-                    id_map[chunks[0].strip()] = ItemID(chunks[0].strip(), chunks[1].strip(), chunks[2].strip())
         for child in root:
             if child.tag.lower() == 'scene':
                 return Scene(child, id_map, file_name)
 
+    @staticmethod
+    def loadSceneStreaming(x3d_file, id_map, file_name):
+        """ Builds the scene incrementally, discarding the geometry of every Shape as soon as it is parsed """
+        scene = None
+        elements = []  #Stack of the XML elements currently open
+        transforms = []  #Stack of the transforms currently open
+        for event, elem in ET.iterparse(x3d_file, events=('start', 'end')):
+            if event == 'start':
+                elements.append(elem)
+                tag = elem.tag.lower()
+                if scene is None:
+                    #Only the first scene below the X3D root is used, as in loadSceneTree
+                    if tag == 'scene' and len(elements) == 2:
+                        scene = Scene(elem, id_map, file_name, build_children=False)
+                        transforms.append(scene)
+                elif tag == 'transform' and transforms and elements[-2] is transforms[-1].node:
+                    #Attributes are complete on the start event, so the frame can be built right away
+                    parent = transforms[-1]
+                    transform = Transform(elem, parent.scale, file_name, parent, build_children=False)
+                    parent.children_transforms.append(transform)
+                    transforms.append(transform)
+                continue
+
+            elements.pop()
+            if transforms and elem is transforms[-1].node:
+                transforms.pop()
+                if not transforms:
+                    break  #End of the scene, the rest of the file is not needed
+            else:
+                #Shapes (IndexedFaceSet, Coordinate...) and any other node are never read again
+                elem.clear()
+                if elements:
+                    elements[-1].remove(elem)
+
+        if scene is not None:
+            scene.deepItemIDMapping(id_map)
+        return scene
+
+    def getRecords(self):
+        """ Flat list of (parent index, attributes) of all the transforms, enough to rebuild the scene without the X3D file """
+        records = []
+        nodes = [(self, -1)]
+        while nodes:
+            transform, parent_index = nodes.pop()
+            attrib = transform.node.attrib
+            records.append((parent_index, dict((key, attrib[key]) for key in ('DEF', 'translation', 'rotation', 'scale') if key in attrib)))
+            for child in reversed(transform.children_transforms):
+                nodes.append((child, len(records) - 1))
+        return records
+
+    @staticmethod
+    def buildFromRecords(records, id_map, file_name):
+        """ Rebuilds a scene saved with getRecords """
+        scene = Scene(ET.Element('Scene', records[0][1]), id_map, file_name, build_children=False)
+        transforms = [scene]
+        for parent_index, attrib in records[1:]:
+            parent = transforms[parent_index]
+            transform = Transform(ET.Element('Transform', attrib), parent.scale, file_name, parent, build_children=False)
+            parent.children_transforms.append(transform)
+            transforms.append(transform)
+        scene.deepItemIDMapping(id_map)
+        return scene
+
+
+class SceneArrays(object):
+    """ Structure of arrays of a list of transforms: parent index (-1 at the top of a chain), local 4x4 matrix and scale """
+    def __init__(self, parents, local, scales=None):
+        self.parents = np.asarray(parents, dtype=int)
+        self.local = np.asarray(local, dtype=float)
+        self.scales = scales
+        #Depth of each transform in its chain, the world matrices are computed level by level
+        self.depth = np.zeros(len(self.parents), dtype=int)
+        ancestors = self.parents.copy()
+        while np.any(ancestors >= 0):
+            has_parent = ancestors >= 0
+            self.depth[has_parent] += 1
+            ancestors[has_parent] = self.parents[ancestors[has_parent]]
+        max_depth = self.depth.max() if len(self.depth) else 0
+        self.levels = [np.nonzero(self.depth == level)[0] for level in range(1, max_depth + 1)]
+
+    @staticmethod
+    def fromTransforms(transforms):
+        """ Flattens the transforms, the chain of each one stops at the first parent that is not useful (as in getRoot) """
+        index = dict((id(trans), i) for i, trans in enumerate(transforms))
+        parents = []
+        for trans in transforms:
+            if trans.parent is not None and trans.parent.isUseful() and id(trans.parent) in index:
+                parents.append(index[id(trans.parent)])
+            else:
+                parents.append(-1)
+        local = np.array([frameToMatrix(trans) for trans in transforms]).reshape(-1, 4, 4)
+        scales = np.array([trans.scale for trans in transforms], dtype=float).reshape(-1, 3)
+        return SceneArrays(parents, local, scales)
+
+    def worldMatrices(self, base=None):
+        """ Matrices of all the transforms seen from the top of their chain, or from base (4x4) if it is given """
+        world = self.local.copy()
+        for nodes in self.levels:
+            world[nodes] = np.matmul(world[self.parents[nodes]], self.local[nodes])
+        if base is not None:
+            world = np.matmul(base, world)
+        return world
+
 
 class Platform(object):
-    def __init__(self, name, folder):
+    def __init__(self, name, folder, cache=None):
         self.name = name
         self.folder = folder
         self.files = self.retrieveFilesNames()
-	#The following line creates an scene and all the transforms (one for each component of the ELVEZ platform)
-        self.scene = Scene.buildScene(self.files['cad'], self.files['ids'], name)
+        #The following line creates an scene and all the transforms (one for each component of the ELVEZ platform)
+        if cache is None:
+            self.scene = Scene.buildScene(self.files['cad'], self.files['ids'], name)
+        else:
+            self.scene = self.loadScene(cache)
         self.useful_transforms = []
         self.scene.deepSearch(self.useful_transforms)
+        self.arrays = SceneArrays.fromTransforms(self.useful_transforms)
+
+    def loadScene(self, cache):
+        """ Builds the scene from the snapshot of a ModelCache, parsing the input files only if they changed """
+        def build():
+            scene = Scene.buildScene(self.files['cad'], self.files['ids'], self.name)
+            id_map = dict((key, item.id_list) for key, item in scene.id_map.items())
+            return {'records': scene.getRecords(), 'id_map': id_map}
+        snapshot = cache.getOrBuild('platform_' + self.name, [self.files['cad'], self.files['ids']], build)
+        id_map = dict((key, ItemID(*id_list)) for key, id_list in snapshot['id_map'].items())
+        return Scene.buildFromRecords(snapshot['records'], id_map, self.name)
 
     def retrieveFilesNames(self):
         file_map = { 
@@ -0,0 +1,133 @@
+import numpy as np
+import PyKDL
+try:
+    from collections.abc import MutableMapping
+except ImportError:
+    from collections import MutableMapping
+
+
+def rpyToMatrices(rpy):
+    """ Rotation matrices (N, 3, 3) for rows of R, P, Y angles applied as DoRotX(R), DoRotY(P), DoRotZ(Y) """
+    rpy = np.asarray(rpy, dtype=float).reshape(-1, 3)
+    cos = np.cos(rpy)
+    sin = np.sin(rpy)
+    count = len(rpy)
+    rot_x = np.zeros((count, 3, 3))
+    rot_x[:, 0, 0] = 1.0
+    rot_x[:, 1, 1] = cos[:, 0]
+    rot_x[:, 1, 2] = -sin[:, 0]
+    rot_x[:, 2, 1] = sin[:, 0]
+    rot_x[:, 2, 2] = cos[:, 0]
+    rot_y = np.zeros((count, 3, 3))
+    rot_y[:, 1, 1] = 1.0
+    rot_y[:, 0, 0] = cos[:, 1]
+    rot_y[:, 0, 2] = sin[:, 1]
+    rot_y[:, 2, 0] = -sin[:, 1]
+    rot_y[:, 2, 2] = cos[:, 1]
+    rot_z = np.zeros((count, 3, 3))
+    rot_z[:, 2, 2] = 1.0
+    rot_z[:, 0, 0] = cos[:, 2]
+    rot_z[:, 0, 1] = -sin[:, 2]
+    rot_z[:, 1, 0] = sin[:, 2]
+    rot_z[:, 1, 1] = cos[:, 2]
+    return np.matmul(np.matmul(rot_x, rot_y), rot_z)
+
+
+def posesToMatrices(poses):
+    """ Homogeneous matrices (N, 4, 4) for rows of x, y, z, R, P, Y """
+    poses = np.asarray(poses, dtype=float).reshape(-1, 6)
+    matrices = np.zeros((len(poses), 4, 4))
+    matrices[:, :3, :3] = rpyToMatrices(poses[:, 3:])
+    matrices[:, :3, 3] = poses[:, :3]
+    matrices[:, 3, 3] = 1.0
+    return matrices
+
+
+def translateLocal(matrices, offsets):
+    """ Moves each frame by an offset expressed in its own axes, like frame * Frame(Vector(offset)) """
+    result = np.array(matrices, dtype=float)
+    result[:, :3, 3] += np.einsum('nij,nj->ni', result[:, :3, :3], np.asarray(offsets, dtype=float).reshape(-1, 3))
+    return result
+
+
+def matrixToFrame(matrix):
+    """ Creates the PyKDL frame of a 4x4 matrix """
+    m = matrix
+    rotation = PyKDL.Rotation(float(m[0, 0]), float(m[0, 1]), float(m[0, 2]),
+                              float(m[1, 0]), float(m[1, 1]), float(m[1, 2]),
+                              float(m[2, 0]), float(m[2, 1]), float(m[2, 2]))
+    return PyKDL.Frame(rotation, PyKDL.Vector(float(m[0, 3]), float(m[1, 3]), float(m[2, 3])))
+
+
+def frameToMatrix(frame):
+    """ Returns the 4x4 matrix of a PyKDL frame """
+    matrix = np.eye(4)
+    for i in range(3):
+        for j in range(3):
+            matrix[i, j] = frame.M[i, j]
+        matrix[i, 3] = frame.p[i]
+    return matrix
+
+
+class LazyFrameDict(MutableMapping):
+    """
+    Mapping that keeps its frames as 4x4 matrices in a side table and only creates the PyKDL.Frame when the key is read.
+    The other values (and the frames already created) are in a plain dictionary. Every view (in, get, keys, items, values,
+    len, ==, repr, dict(), update) goes through __iter__ and __getitem__, so the frames not created yet are never missed
+    """
+    def __init__(self, values=None, matrices=None):
+        self.fields = dict(values or {})
+        self.matrices = dict(matrices or {})
+
+    def __getitem__(self, key):
+        if key in self.fields:
+            return self.fields[key]
+        if key in self.matrices:
+            frame = matrixToFrame(self.matrices[key])
+            self.fields[key] = frame
+            return frame
+        raise KeyError(key)
+
+    def __setitem__(self, key, value):
+        self.fields[key] = value
+        self.matrices.pop(key, None)
+
+    def __delitem__(self, key):
+        if key not in self:
+            raise KeyError(key)
+        self.fields.pop(key, None)
+        self.matrices.pop(key, None)
+
+    def __contains__(self, key):
+        return key in self.fields or key in self.matrices
+
+    def __iter__(self):
+        for key in self.fields:
+            yield key
+        for key in self.matrices:
+            if key not in self.fields:
+                yield key
+
+    def __len__(self):
+        return len(self.fields) + sum(1 for key in self.matrices if key not in self.fields)
+
+    def setMatrix(self, key, matrix):
+        """ Stores a frame as its 4x4 matrix, the PyKDL frame is created when the key is read """
+        self.fields.pop(key, None)
+        self.matrices[key] = matrix
+
+    def getMatrix(self, key):
+        """ 4x4 matrix of a frame, without creating the PyKDL frame """
+        if key in self.matrices and key not in self.fields:
+            return self.matrices[key]
+        return frameToMatrix(self[key])
+
+    def getFrame(self, key):
+        """ PyKDL frame of a key, created from its matrix the first time it is read """
+        return self[key]
+
+    def copy(self):
+        return LazyFrameDict(self.fields, self.matrices)
+
+    def __repr__(self):
+        return repr(dict(self.items()))
@@ -2,6 +2,7 @@
 
 import rospy, os
 import numpy as np
+from model_cache import invalidateCaches
 from UI_nodes_pkg.srv import *
 
 #Initialize ROS node 
@@ -46,6 +47,7 @@ def move_file_cb(req):
         dest_dir = '/home/remodel/catkin_ws/src/elvez_pkg/data_UI/'
         os.system('rm -r ' + dest_dir + req.destination)
         os.system('cp -r /media/' + str(user_name) + '/' + req.source +  ' ' + dest_dir + req.destination)
+        invalidateCaches(dest_dir)  #The snapshots of the replaced files must not be reused
         print('cp -r /media/' + str(user_name) + '/' + req.source +  ' ' + dest_dir + req.destination)
     except:
         resp.success = False
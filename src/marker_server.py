@@ -0,0 +1,49 @@
+import rospy
+from visualization_msgs.msg import Marker, MarkerArray
+
+
+class MarkerServer(rospy.SubscribeListener):
+    """
+    Publishes the markers of the platform only when they change.
+    Every new subscriber receives the full MarkerArray when it connects (as with a latched topic), and afterwards all the
+    subscribers only receive the markers added, modified (both sent with action ADD) or deleted.
+    The markers are not restamped, a stamp of 0 makes RViz use the latest transform of their frames.
+    """
+    def __init__(self, topic):
+        super(MarkerServer, self).__init__()
+        self.markers = {}  #(ns, id): Marker
+        self.full_array = MarkerArray()
+        self.sent_messages = 0
+        self.publisher = rospy.Publisher(topic, MarkerArray, queue_size=10, subscriber_listener=self)
+
+    def peer_subscribe(self, topic_name, topic_publish, peer_publish):
+        """ Sends all the markers to a new subscriber """
+        if self.full_array.markers:
+            peer_publish(self.full_array)
+            self.sent_messages += 1
+
+    def update(self, markers):
+        """
+        Replaces the published markers by markers, sending only the differences. Returns the number of markers sent.
+        Modified markers must be new objects, as they are compared with the ones given in the previous call
+        """
+        new_markers = {}
+        delta = MarkerArray()
+        for marker in markers:
+            key = (marker.ns, marker.id)
+            new_markers[key] = marker
+            if key not in self.markers or not self.markers[key] == marker:
+                delta.markers.append(marker)
+        for key in self.markers:
+            if key not in new_markers:
+                marker = Marker()
+                marker.header.frame_id = self.markers[key].header.frame_id
+                marker.ns, marker.id = key
+                marker.action = Marker.DELETE
+                delta.markers.append(marker)
+        self.markers = new_markers
+        self.full_array = MarkerArray(markers=list(markers))
+        if delta.markers:
+            self.publisher.publish(delta)
+            self.sent_messages += 1
+        return len(delta.markers)
@@ -0,0 +1,123 @@
+import os
+import zlib
+import shutil
+import hashlib
+try:
+    import cPickle as pickle
+except ImportError:
+    import pickle
+
+CACHE_DIR_NAME = '.model_cache'
+CACHE_VERSION = 2  #Increase it when the structure of the cached data changes
+
+
+def fileDigest(path):
+    """ SHA1 of the content of a file """
+    sha = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            sha.update(block)
+    return sha.hexdigest()
+
+
+def invalidateCaches(folder):
+    """ Removes every model cache found in a folder and its subfolders """
+    for path, dirs, files in os.walk(folder):
+        if CACHE_DIR_NAME in dirs:
+            shutil.rmtree(os.path.join(path, CACHE_DIR_NAME), ignore_errors=True)
+            dirs.remove(CACHE_DIR_NAME)
+
+
+class ModelCache(object):
+    """
+    Compact on-disk snapshots of the data parsed from the input files of a folder.
+    Each part (a platform, the jigs dictionary...) is saved in its own file together with the content hash of its inputs,
+    so only the parts whose inputs changed are rebuilt. The mtime and size of each input are kept to avoid hashing unchanged files.
+    """
+    def __init__(self, folder, cache_dir=None):
+        self.folder = folder
+        self.cache_dir = cache_dir if cache_dir is not None else os.path.join(folder, CACHE_DIR_NAME)
+        self.index_path = os.path.join(self.cache_dir, 'index')
+        self.index = self._read(self.index_path) or {}  #path: (mtime, size, digest)
+        self.hits = []
+        self.misses = []
+
+    def _read(self, path):
+        try:
+            with open(path, 'rb') as f:
+                return pickle.loads(zlib.decompress(f.read()))
+        except Exception:
+            return None
+
+    def _write(self, path, data):
+        if not os.path.isdir(self.cache_dir):
+            os.makedirs(self.cache_dir)
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(zlib.compress(pickle.dumps(data, pickle.HIGHEST_PROTOCOL), 1))
+        os.rename(tmp_path, path)  #Readers never see half written snapshots
+
+    def _partPath(self, part):
+        return os.path.join(self.cache_dir, part.replace(os.sep, '_') + '.pkl')
+
+    def _digest(self, path):
+        """ (content hash, True if it had to be computed) of a file """
+        path = os.path.abspath(path)
+        stat = os.stat(path)
+        entry = self.index.get(path)
+        if entry is None or entry[0] != stat.st_mtime or entry[1] != stat.st_size:
+            entry = (stat.st_mtime, stat.st_size, fileDigest(path))
+            self.index[path] = entry
+            return entry[2], True
+        return entry[2], False
+
+    def _saveIndex(self):
+        try:
+            self._write(self.index_path, self.index)
+        except (IOError, OSError):
+            pass
+
+    def digests(self, paths):
+        """ Content hash of each file, only files whose mtime or size changed are hashed again """
+        digests = []
+        index_changed = False
+        for path in paths:
+            digest, changed = self._digest(path)
+            digests.append(digest)
+            index_changed = index_changed or changed
+        if index_changed:
+            self._saveIndex()
+        return digests
+
+    def inputsKey(self, paths):
+        """ Content hash of each input, used to check if a snapshot is still valid """
+        key = zip([os.path.basename(path) for path in paths], self.digests(paths))
+        return (CACHE_VERSION, tuple(key))
+
+    def load(self, part, paths):
+        """ Returns the snapshot of a part or None if it does not exist or its inputs changed """
+        snapshot = self._read(self._partPath(part))
+        if snapshot is None or snapshot[0] != self.inputsKey(paths):
+            return None
+        return snapshot[1]
+
+    def save(self, part, paths, data):
+        try:
+            self._write(self._partPath(part), (self.inputsKey(paths), data))
+        except Exception as e:
+            print("Model cache: " + part + " could not be saved (" + str(e) + ")")
+
+    def getOrBuild(self, part, paths, build):
+        """ Loads a part from the cache or builds it with build() and saves it """
+        data = self.load(part, paths)
+        if data is not None:
+            self.hits.append(part)
+            return data
+        self.misses.append(part)
+        data = build()
+        self.save(part, paths, data)
+        return data
+
+    def invalidate(self):
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+        self.index = {}
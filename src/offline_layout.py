@@ -0,0 +1,60 @@
+import os
+import xml.etree.ElementTree as ET
+import PyKDL
+from uc2_model import UC2Model, ROOT_FRAMES
+
+DEFAULT_LAUNCH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'launch', 'launcher.launch')
+
+
+def launchFrames(launch_file):
+    """
+    Frames of the static_transform_publisher nodes of a launch file (the commented ones are ignored).
+    Returns {child frame: (parent frame, kdl frame of the child seen from the parent)}
+    """
+    frames = {}
+    for node in ET.parse(launch_file).getroot().iter('node'):
+        if node.get('type') != 'static_transform_publisher':
+            continue
+        args = node.get('args').split()
+        values = [float(value) for value in args[:-3]]
+        frame = PyKDL.Frame()
+        frame.p = PyKDL.Vector(*values[:3])
+        if len(values) == 6:
+            #x y z yaw pitch roll
+            frame.M = PyKDL.Rotation.RPY(values[5], values[4], values[3])
+        else:
+            #x y z qx qy qz qw
+            frame.M = PyKDL.Rotation.Quaternion(*values[3:7])
+        frames[args[-2].lstrip('/')] = (args[-3].lstrip('/'), frame)
+    return frames
+
+
+def rootFrame(frames, frame_id):
+    """ Frame of frame_id seen from the first of its ancestors that is not published in frames """
+    frame = PyKDL.Frame()
+    visited = set()
+    while frame_id in frames and frame_id not in visited:
+        visited.add(frame_id)
+        parent, parent_frame = frames[frame_id]
+        frame = parent_frame * frame
+        frame_id = parent
+    return frame
+
+
+def loadModel(folder, launch_file=DEFAULT_LAUNCH, cad_names=('platform', 'combs', 'ATC'), jigs_file='Jigs_definition_v2.xml',
+              components_file='Components_definition.csv', WH_file='WH_configuration.xml', seq_file='Assembly_sequence.csv', cache=None):
+    """
+    Builds the UC2Model of a data folder as UC2_handler does, without a ROS master: the frames of the CAD files are read
+    from the static_transform_publisher nodes of the launch file instead of tf, so all the poses are seen from their common root frame.
+    cad_names are the names of the platform, combs and ATC CAD files, '' if a data folder has not one of them.
+    """
+    frames = launchFrames(launch_file)
+    model = UC2Model(folder, cad_names, jigs_file, components_file, WH_file, seq_file, cache)
+    model.build(dict((kind, rootFrame(frames, ROOT_FRAMES[kind])) for kind in model.kinds()))
+    return model
+
+
+def loadLayout(folder, launch_file=DEFAULT_LAUNCH, cad_names=('platform', 'combs', 'ATC'), **files):
+    """ Input files and jigs structure of a data folder built with loadModel. Returns (InputFilesDataCollector, jigs_complete_dict) """
+    model = loadModel(folder, launch_file, cad_names, **files)
+    return model.dict_elvez, model.jigs_complete_dict
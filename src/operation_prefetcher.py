@@ -0,0 +1,130 @@
+import time
+import threading
+
+
+class OperationPrefetcher(object):
+    """
+    Resolves in a background thread the operations that follow the current one, so their keypoints are ready when the
+    skill manager finishes. resolve is a function returning the resolve_operation response of a sequence index. It is
+    called from the thread of the prefetcher and, when the operation was not prefetched, from get in the thread of the
+    caller, so it may run in both threads at the same time and must be thread safe (ServiceClient is). An index is never
+    resolved twice at the same time: get waits for an operation that the thread of the prefetcher is resolving, and the
+    thread skips the operation that get is resolving.
+    At most depth operations after the current one are kept. When the index jumps (execute with another index, reset)
+    the resolved operations that are not among the next depth ones are discarded, and invalidate discards all of them.
+    """
+    def __init__(self, resolve, depth=3):
+        self.resolve = resolve
+        self.depth = depth
+        self.condition = threading.Condition()
+        self.operations = {}  #sequence index: resolved operation
+        self.current = None  #Index of the next operation that will be requested
+        self.generation = 0  #Increased when the resolved operations are discarded, so an operation resolved before is not saved
+        self.resolving = None  #Index being resolved by the thread of the prefetcher
+        self.claimed = None  #Index being resolved by get, the thread of the prefetcher does not resolve it
+        self.hits = 0
+        self.misses = 0
+        self.wait_s = []  #Time waiting in get for each operation
+        if depth > 0:
+            self.thread = threading.Thread(target=self._run, name='operation_prefetcher')
+            self.thread.daemon = True
+            self.thread.start()
+
+    def _window(self):
+        """ Indexes of the next depth operations, as far as they are known, and the first one not resolved yet """
+        window = []
+        index = self.current
+        while index is not None and len(window) < self.depth:
+            window.append(index)
+            if index not in self.operations:
+                return window, index
+            operation = self.operations[index]
+            if not operation.success:
+                break
+            index = 0 if operation.end else operation.index
+        return window, None
+
+    def _discard(self):
+        window, _ = self._window()
+        for index in list(self.operations):
+            if index not in window:
+                del self.operations[index]
+
+    def moveTo(self, index):
+        """ Sets the index of the next operation, keeping the operations already resolved from it on """
+        with self.condition:
+            if index == self.current:
+                return
+            self.current = index
+            self._discard()
+            self.condition.notify_all()
+
+    def invalidate(self, index=None):
+        """ Discards all the resolved operations, e.g. after a reset """
+        with self.condition:
+            self.operations = {}
+            self.generation += 1
+            self.current = index
+            self.condition.notify_all()
+
+    def get(self, index):
+        """ Resolved operation of index, waiting for it if it was not prefetched. The prefetching continues from the next one """
+        start = time.time()
+        with self.condition:
+            operation = self.operations.get(index)
+            #The operation is being prefetched: wait for it instead of resolving it twice
+            while operation is None and self.resolving == index:
+                self.condition.wait()
+                operation = self.operations.get(index)
+            if operation is not None:
+                self.hits += 1
+            else:
+                self.misses += 1
+                self.claimed = index
+        try:
+            if operation is None:
+                operation = self.resolve(index)
+        finally:
+            with self.condition:
+                self.claimed = None
+                if operation is not None:
+                    self.current = (0 if operation.end else operation.index) if operation.success else None
+                    self._discard()
+                self.condition.notify_all()
+        self.wait_s.append(time.time() - start)
+        return operation
+
+    def _run(self):
+        while True:
+            with self.condition:
+                index = None
+                while index is None:
+                    if self.current is not None:
+                        _, index = self._window()
+                        if index == self.claimed:
+                            index = None
+                    if index is None:
+                        self.condition.wait()
+                generation = self.generation
+                self.resolving = index
+            try:
+                operation = self.resolve(index)
+            except Exception:
+                #The operation is resolved again by get, that reports the error
+                with self.condition:
+                    self.resolving = None
+                    self.condition.notify_all()
+                    self.condition.wait(1.0)
+                continue
+            with self.condition:
+                self.resolving = None
+                if generation == self.generation and index in self._window()[0]:
+                    self.operations[index] = operation
+                self.condition.notify_all()
+
+    def report(self):
+        """ Text with the operations prefetched and the time spent waiting for the operations """
+        if not self.wait_s:
+            return "No operations dispatched"
+        return "%d operations prefetched, %d resolved on demand. Waiting for the operation: mean %.2f ms, max %.2f ms, total %.1f ms" % (
+            self.hits, self.misses, 1000.0 * sum(self.wait_s) / len(self.wait_s), 1000.0 * max(self.wait_s), 1000.0 * sum(self.wait_s))
@@ -14,18 +14,13 @@ from std_srvs.srv import Trigger, TriggerRequest, TriggerResponse
 from std_srvs.srv import Empty, EmptyResponse
 from elvez_pkg.msg import *
 from elvez_pkg.srv import *
+from service_client import ServiceClient
+from operation_prefetcher import OperationPrefetcher
+from planner_core import PlannerCore, OperationCursor
 from move_sda10f.srv import *
 
 rospy.init_node('planner')
-rate = rospy.Rate(10)
-index = 0
 mode = "Stop"
-end = False
-next = False
-reset = False
-stop = False
-resume = False
-simulation = False
 execute_service = 'ELVEZ_platform_planner/execute'
 resetSeq_service = 'ELVEZ_platform_planner/resetSeq'
 stop_service = 'ELVEZ_platform_planner/stop'
@@ -33,20 +28,44 @@ resume_service = 'ELVEZ_platform_planner/resume'
 simulation_service = 'ELVEZ_platform_planner/simulation'
 pub_index = rospy.Publisher('/sda10f_platform_planner/index_topic', Int32, queue_size=1)
 pub_mode = rospy.Publisher('/sda10f_platform_planner/mode_topic', String, queue_size=1)
+#Index of the next operation, moved by the service callbacks, the simulation state and the worker
+cursor = OperationCursor()
+#The service callbacks post commands that are executed at once by the worker of the core. Stop and resume have their own
+#worker, so they are not blocked by an operation being dispatched
+core = PlannerCore('planner_core')
+control = PlannerCore('planner_control')
+#Persistent connections with the handler and skill manager services, their latency is printed at shutdown
+services = ServiceClient(persistent=rospy.get_param('~persistent_services', True))
+control_services = ServiceClient(persistent=rospy.get_param('~persistent_services', True))
+#The next operations are resolved while the skill manager executes the current one (0 disables it)
+prefetch_services = ServiceClient(persistent=rospy.get_param('~persistent_services', True))
+prefetcher = OperationPrefetcher(lambda i: prefetch_services.call('/ELVEZ_platform_handler/resolve_operation', resolve_operation, resolve_operationRequest(index=i)),
+                                 rospy.get_param('~prefetch_operations', 3))
+execute_time = None  #When the last execute request was received
+idle_times = []  #Seconds from each execute request to the start of its skill
+
+def report():
+    rospy.loginfo("Service latencies:\n" + services.report() + "\n" + control_services.report())
+    rospy.loginfo("Command latencies:\n" + core.report() + "\n" + control.report())
+    rospy.loginfo("Prefetching: " + prefetcher.report())
+    if idle_times:
+        rospy.loginfo("Idle time between skills (execute request to skill start): mean %.1f ms, max %.1f ms" % (1000.0 * sum(idle_times) / len(idle_times), 1000.0 * max(idle_times)))
+
+rospy.on_shutdown(report)
 
 def publish_index():
-    global index
-    pub_index.publish(index)
+    pub_index.publish(cursor.get())
 
 def execute_callback(req): 
     """
     Calls the index operation service of the CAD platform
     """
-    global next
-    global index
-    index = req.index
+    global execute_time
+    cursor.set(req.index)
+    prefetcher.moveTo(req.index)
+    execute_time = time.time()
     publish_index()
-    next = True
+    core.post('execute', req.index)
     resp = index_operationResponse()
     resp.success = True
     return resp
@@ -59,11 +78,10 @@ def resetSeq_callback(req):
     Calls the next operation service of the CAD platform
     """
     resp = TriggerResponse()
-    global reset
-    global index
-    reset = True
-    index = 0
+    cursor.set(0)
+    prefetcher.invalidate(0)
     publish_index()
+    core.post('reset')
     resp.success = True
     return resp
 
@@ -74,9 +92,8 @@ def stop_callback(req):
     """
     Stops the movement of the simulation in execution
     """
-    global stop
     resp = TriggerResponse()
-    stop = True
+    control.post('stop')
     resp.success = True
     return resp
 
@@ -87,9 +104,8 @@ def resume_callback(req):
     """
     Resumes the movement of the simulation stopped
     """
-    global resume
     resp = TriggerResponse()
-    resume = True
+    control.post('resume')
     resp.success = True
     return resp
 
@@ -100,40 +116,33 @@ def simulation_callback(req):
     """
     Calls the next operation service of the CAD platform
     """
-    global simulation
-    simulation = True
+    core.post('simulation')
     return EmptyResponse()
 
 rospy.Service(simulation_service, Empty, simulation_callback)
 
 
 def call_skill_manager(Op_type, keypoints):
-    global index
-    global end
+    global execute_time
+    if execute_time is not None:
+        idle_times.append(time.time() - execute_time)
+        execute_time = None
     print(Op_type)
     print(keypoints)
-    rospy.wait_for_service('/skill_manager/start')
-    skillManager_start_service = rospy.ServiceProxy('/skill_manager/start', start_skill)
     startReq = start_skillRequest()
     startReq.type = Op_type
     startReq.keypoints = keypoints
-    startResult = skillManager_start_service(startReq)
+    startResult = services.call('/skill_manager/start', start_skill, startReq)
     #Change this index update --> When the action finishes
     if (Op_type!='PC' and Op_type!='T'):
-        if end:
-            index = 0
-            end = False
-        else:
-            index += 1
+        cursor.advance()
         publish_index()
-	time.sleep(0.1)
+        time.sleep(0.1)
         pub_mode.publish('Finish')
 
 
 def callback_sim_state(sim_state):
     global mode
-    global end
-    global index
     print(sim_state)
     if sim_state.data == 'Running':
         mode = 'Running'
@@ -141,11 +150,7 @@ def callback_sim_state(sim_state):
         mode = 'Stop'
     if sim_state.data == "Finish":
         mode = 'Finish'
-        if end:
-            index = 0
-            end = False
-        else:
-            index += 1
+        cursor.advance()
         publish_index()
         time.sleep(0.1)
     pub_mode.publish(mode) #Change this to be published only if the mode changes
@@ -153,223 +158,124 @@ def callback_sim_state(sim_state):
 subsSim = rospy.Subscriber('/sda10f_simulation/state', String, callback_sim_state)
 
 
-print("Ready")
+def execute_operation(index):
+    """
+    Dispatches the operation of index to the skill manager
+    """
+    #The operation with all its keypoints, usually resolved while the previous skill was executed
+    next_taskResult = prefetcher.get(index)
+    cursor.dispatched(index, next_taskResult.end)
+    print("Peticion realizada")
+    print(next_taskResult)
+
+    if next_taskResult.type=='PC':
+        try:
+            print("Placing connector operation. Moving...")
+            PC_keypoints = [next_taskResult.connectors[0].tray_center_frame, next_taskResult.guides[0].key_center_frame]
+            call_skill_manager("PC", PC_keypoints)
+        except:
+            print("Error. No moving")
+
+    elif next_taskResult.type=='RC':
+        try:
+            print("Routing cables operation. Moving...")
+            RC_keypoints = [guide.key_center_frame for guide in next_taskResult.guides]
+            call_skill_manager("RC", RC_keypoints)
+        except:
+            print("Error. No moving")
+
+    elif next_taskResult.type=='T':
+        try:
+            print("Taping operation. Moving...")
+            T_keypoints = [next_taskResult.taping_spots[0].center_frame]
+            call_skill_manager("T", T_keypoints)
+        except:
+            print("Error. No moving")
+
+core.register('execute', execute_operation)
+
+
+def reset_sequence():
+    requ = TriggerRequest()
+    result = services.call('/ELVEZ_platform_handler/reset_sequence_list', Trigger, requ)
+    print("Reset done")
+    print(result)
+
+core.register('reset', reset_sequence)
+
+
+def stop_skill():
+    stopReq = TriggerRequest()
+    stopResult = control_services.call('/skill_manager/stop', Trigger, stopReq)
+    print("Stop done")
+
+control.register('stop', stop_skill)
+
+
+def resume_skill():
+    resumeReq = TriggerRequest()
+    resumeResult = control_services.call('/skill_manager/resume', Trigger, resumeReq)
+    print("Resume done")
+
+control.register('resume', resume_skill)
+
+
+def run_simulation():
+    #Reset to the first operation --> placing a connector
+    requ = TriggerRequest()
+    result = services.call('/ELVEZ_platform_handler/reset_sequence_list', Trigger, requ)
+    print("Reset to first operation")
+    print(result)
+
+    #Obtains information about the first operation
+    nextReq = next_operationRequest()
+    next_taskResult = services.call('/ELVEZ_platform_handler/next_operation', next_operation, nextReq)
+    print("Obtaining the first operation...")
+    print(next_taskResult)
+
+    if next_taskResult.type=='PC':
+        #Obtains information about the connector of the operation (tray where it is located)
+        print("")
+        print("Connector info:")
+        connectorReq = connector_infoRequest()
+        connectorReq.label = next_taskResult.label[0]
+        connectorResult = services.call('/ELVEZ_platform_handler/connector_info', connector_info, connectorReq)
+        print(connectorResult)
+
+        #Obtains information about the guide of the operation (keypoint)
+        print("")
+        print("Guide Keypoints info:")
+        guideReq = guide_infoRequest()
+        guideReq.jig = next_taskResult.spot[0].jig
+        guideReq.guide = next_taskResult.spot[0].id
+        guideResult = services.call('/ELVEZ_platform_handler/guide_info', guide_info, guideReq)
+        print(guideResult)
+
+        #Obtain information about the tray where the connector is (keypoint)
+        print("")
+        print("Tray where that connector is located ("+connectorResult.box+"."+connectorResult.tray+"):")
+        trayReq = tray_infoRequest()
+        trayReq.box = connectorResult.box
+        trayReq.tray = connectorResult.tray
+        trayResult = services.call('/ELVEZ_platform_handler/tray_info', tray_info, trayReq)
+        print(trayResult)
+
+        #Launch the simulation service
+        try:
+          PoseReq = Pose_srvRequest()
+          #PoseReq.poseTray = trayResult.key_center_frame
+          PoseReq.poseTray = trayResult.key_corner_frame
+          PoseReq.poseGuide = guideResult.data.key_center_frame
+          PoseResult = services.call('sda10f_simulation/move_to_pose', Pose_srv, PoseReq)
+          print("Moving...")
+          print(PoseResult)
+        except:
+          print("No moving")
+
+core.register('simulation', run_simulation)
 
 
-while not rospy.is_shutdown():
-    #print(next)
-    if next:
-        rospy.wait_for_service('/ELVEZ_platform_handler/index_operation')
-        my_service = rospy.ServiceProxy('/ELVEZ_platform_handler/index_operation', index_operation)
-        nextReq = index_operationRequest()
-        nextReq.index = index
-        next_taskResult = my_service(nextReq)
-        if next_taskResult.end:
-            end = True
-        else:
-            end = False
-        print("Peticion realizada")
-        print(next_taskResult)
-        next = False
-
-
-        if next_taskResult.type=='PC':
-	    print("")
-            print("Connector info:")
-            rospy.wait_for_service('/ELVEZ_platform_handler/connector_info')
-            my_service = rospy.ServiceProxy('/ELVEZ_platform_handler/connector_info', connector_info)
-            connectorReq = connector_infoRequest()
-            connectorReq.label = next_taskResult.label[0]
-            connectorResult = my_service(connectorReq)
-            print(connectorResult)
-
-            print("")
-            print("Guide Keypoints info:")
-            rospy.wait_for_service('/ELVEZ_platform_handler/guide_info')
-            my_service = rospy.ServiceProxy('/ELVEZ_platform_handler/guide_info', guide_info)
-            guideReq = guide_infoRequest()
-            guideReq.jig = next_taskResult.spot[0].jig
-            guideReq.guide = next_taskResult.spot[0].id
-            guideResult = my_service(guideReq)
-            print(guideResult)
-
-	    print("")
-            print("Tray where that connector is located ("+connectorResult.box+"."+connectorResult.tray+"):")
-            rospy.wait_for_service('/ELVEZ_platform_handler/tray_info')
-            my_service = rospy.ServiceProxy('/ELVEZ_platform_handler/tray_info', tray_info)
-            trayReq = tray_infoRequest()
-            trayReq.box = connectorResult.box
-            trayReq.tray = connectorResult.tray
-            trayResult = my_service(trayReq)
-            print(trayResult)
-	      
-            try:
-                print("Placing connector operation. Moving...")
-                PC_keypoints = [trayResult.key_center_frame, guideResult.data.key_center_frame]
-                call_skill_manager("PC", PC_keypoints)
-            except:
-                print("Error. No moving")
-	    
-
-        elif next_taskResult.type=='RC':
-            print("")
-            print("Cables info:")
-
-            for label in next_taskResult.label:
-                if label[:2] == 'CA':
-                    rospy.wait_for_service('/ELVEZ_platform_handler/cable_info')
-                    my_service = rospy.ServiceProxy('/ELVEZ_platform_handler/cable_info', cable_info)
-                    cableReq = cable_infoRequest()
-                    cableReq.label = label
-                    cableResult = my_service(cableReq)
-                    print(cableResult)
-                    print("")
-                else:
-                    rospy.wait_for_service('/ELVEZ_platform_handler/connector_info')
-                    my_service = rospy.ServiceProxy('/ELVEZ_platform_handler/connector_info', connector_info)
-                    connectorReq = connector_infoRequest()
-                    connectorReq.label = label
-                    connectorResult = my_service(connectorReq)
-                    for cableLabel in connectorResult.cables:
-                        rospy.wait_for_service('/ELVEZ_platform_handler/cable_info')
-                        my_service = rospy.ServiceProxy('/ELVEZ_platform_handler/cable_info', cable_info)
-                        cableReq = cable_infoRequest()
-                        cableReq.label = cableLabel.label
-                        cableResult = my_service(cableReq)
-                        print(cableResult)
-                        print("")
-
-            RC_keypoints = []
-            for spot in next_taskResult.spot:
-                print("Guide Keypoints info:")
-                rospy.wait_for_service('/ELVEZ_platform_handler/guide_info')
-                my_service = rospy.ServiceProxy('/ELVEZ_platform_handler/guide_info', guide_info)
-                guideReq = guide_infoRequest()
-                guideReq.jig = spot.jig
-                guideReq.guide = spot.id
-                guideResult = my_service(guideReq)
-                RC_keypoints.append(guideResult.data.key_center_frame)
-                print(guideResult)
-                print("")
-
-            try:
-                print("Routing cables operation. Moving...")
-                call_skill_manager("RC", RC_keypoints)
-            except:
-                print("Error. No moving")
-
-
-        elif next_taskResult.type=='T':
-            print("")
-            print("Taping spot Keypoints info:")
-            rospy.wait_for_service('/ELVEZ_platform_handler/taping_spot_info')
-            my_service = rospy.ServiceProxy('/ELVEZ_platform_handler/taping_spot_info', taping_spot_info)
-            tapeReq = taping_spot_infoRequest()
-            tapeReq.jig = next_taskResult.spot[0].jig
-            tapeReq.spot = next_taskResult.spot[0].id
-            tapeResult = my_service(tapeReq)
-            print(tapeResult)
-
-            try:
-                print("Taping operation. Moving...")
-                T_keypoints = [tapeResult.data.center_frame]
-                call_skill_manager("T", T_keypoints)
-            except:
-                print("Error. No moving")
-
-
-    if reset:
-        rospy.wait_for_service('/ELVEZ_platform_handler/reset_sequence_list')
-        my_service = rospy.ServiceProxy('/ELVEZ_platform_handler/reset_sequence_list', Trigger)
-        requ = TriggerRequest()
-        result = my_service(requ)
-        print("Reset done")
-        print(result)
-        reset = False
-
-
-    if stop:
-        rospy.wait_for_service('/skill_manager/stop')
-        skillManager_stop_service = rospy.ServiceProxy('/skill_manager/stop', Trigger)
-        stopReq = TriggerRequest()
-        stopResult = skillManager_stop_service(stopReq)
-        print("Stop done")
-        stop = False
-
-
-    if resume:
-        rospy.wait_for_service('/skill_manager/resume')
-        skillManager_resume_service = rospy.ServiceProxy('/skill_manager/resume', Trigger)
-        resumeReq = TriggerRequest()
-        resumeResult = skillManager_resume_service(resumeReq)
-        print("Resume done")
-        resume = False 
-
-
-    if simulation:
-	#Reset to the first operation --> placing a connector
-	simulation = False
-	rospy.wait_for_service('/ELVEZ_platform_handler/reset_sequence_list')
-        my_service = rospy.ServiceProxy('/ELVEZ_platform_handler/reset_sequence_list', Trigger)
-        requ = TriggerRequest()
-        result = my_service(requ)
-        print("Reset to first operation")
-        print(result)
-
-	#Obtains information about the first operation
-        rospy.wait_for_service('/ELVEZ_platform_handler/next_operation')
-        my_service = rospy.ServiceProxy('/ELVEZ_platform_handler/next_operation', next_operation)
-        nextReq = next_operationRequest()
-        next_taskResult = my_service(nextReq)
-        print("Obtaining the first operation...")
-        print(next_taskResult)
-
-        if next_taskResult.type=='PC':
-	    #Obtains information about the connector of the operation (tray where it is located)
-	    print("")
-            print("Connector info:")
-            rospy.wait_for_service('/ELVEZ_platform_handler/connector_info')
-            my_service = rospy.ServiceProxy('/ELVEZ_platform_handler/connector_info', connector_info)
-            connectorReq = connector_infoRequest()
-            connectorReq.label = next_taskResult.label[0]
-            connectorResult = my_service(connectorReq)
-            print(connectorResult)
-
-	    #Obtains information about the guide of the operation (keypoint)
-            print("")
-            print("Guide Keypoints info:")
-            rospy.wait_for_service('/ELVEZ_platform_handler/guide_info')
-            my_service = rospy.ServiceProxy('/ELVEZ_platform_handler/guide_info', guide_info)
-            guideReq = guide_infoRequest()
-            guideReq.jig = next_taskResult.spot[0].jig
-            guideReq.guide = next_taskResult.spot[0].id
-            guideResult = my_service(guideReq)
-            print(guideResult)
-
-	    #Obtain information about the tray where the connector is (keypoint)
-	    print("")
-            print("Tray where that connector is located ("+connectorResult.box+"."+connectorResult.tray+"):")
-            rospy.wait_for_service('/ELVEZ_platform_handler/tray_info')
-            my_service = rospy.ServiceProxy('/ELVEZ_platform_handler/tray_info', tray_info)
-            trayReq = tray_infoRequest()
-            trayReq.box = connectorResult.box
-            trayReq.tray = connectorResult.tray
-            trayResult = my_service(trayReq)
-            print(trayResult)
-	    
-	    #Launch the simulation service
-	    try:
-	      rospy.wait_for_service('sda10f_simulation/move_to_pose')
-	      my_service = rospy.ServiceProxy('sda10f_simulation/move_to_pose', Pose_srv)
-	      PoseReq = Pose_srvRequest()
-	      #PoseReq.poseTray = trayResult.key_center_frame
-	      PoseReq.poseTray = trayResult.key_corner_frame
-	      PoseReq.poseGuide = guideResult.data.key_center_frame
-              PoseResult = my_service(PoseReq)
-	      print("Moving...")
-	      print(PoseResult)
-	    except:
-	      print("No moving")
-	   
-   
-    rate.sleep()
+print("Ready")
+core.start()
+control.start()
+rospy.spin()
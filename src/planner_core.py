@@ -0,0 +1,93 @@
+import time
+import threading
+import rospy
+try:
+    from Queue import Queue
+except ImportError:
+    from queue import Queue
+
+
+class OperationCursor(object):
+    """
+    Index of the next operation of the sequence, shared by the service callbacks, the state callback of the simulation and
+    the worker of the planner, which run in different threads
+    """
+    def __init__(self, index=0):
+        self.lock = threading.Lock()
+        self.index = index
+        self.end = False  #The operation dispatched is the last one of the sequence
+
+    def get(self):
+        with self.lock:
+            return self.index
+
+    def set(self, index):
+        with self.lock:
+            self.index = index
+            self.end = False
+
+    def dispatched(self, index, end):
+        """ Saves if the operation dispatched is the last one, if the index was not moved meanwhile """
+        with self.lock:
+            if self.index == index:
+                self.end = end
+
+    def advance(self):
+        """ Moves to the next operation, the first one after the end of the sequence. Returns the new index """
+        with self.lock:
+            if self.end:
+                self.index = 0
+                self.end = False
+            else:
+                self.index += 1
+            return self.index
+
+
+class PlannerCore(object):
+    """
+    Executes the commands of the planner in a worker thread as soon as they arrive. The service callbacks post the
+    commands, and the function registered for each command is called in order with the arguments given in post.
+    The time from each post to the start of its command is saved per command.
+    """
+    def __init__(self, name='planner_core'):
+        self.commands = Queue()
+        self.handlers = {}  #command: function
+        self.latencies = {}  #command: [seconds from the post to the start of the command]
+        self.thread = threading.Thread(target=self._run, name=name)
+        self.thread.daemon = True
+
+    def register(self, command, handler):
+        self.handlers[command] = handler
+
+    def start(self):
+        self.thread.start()
+
+    def post(self, command, *args):
+        if command not in self.handlers:
+            raise ValueError("Unknown command " + command)
+        self.commands.put((command, args, time.time()))
+
+    def shutdown(self):
+        """ Stops the worker after the commands already posted """
+        self.commands.put(None)
+        if self.thread.is_alive():
+            self.thread.join()
+
+    def _run(self):
+        while True:
+            item = self.commands.get()
+            if item is None:
+                return
+            command, args, posted = item
+            self.latencies.setdefault(command, []).append(time.time() - posted)
+            try:
+                self.handlers[command](*args)
+            except Exception as e:
+                rospy.logerr("Command " + command + " failed: " + str(e))
+
+    def report(self):
+        """ Text with the latency from the post to the start of each command """
+        lines = []
+        for command, latencies in sorted(self.latencies.items()):
+            lines.append("%s: %d commands, mean %.2f ms, max %.2f ms" % (command, len(latencies), 1000.0 * sum(latencies) / len(latencies), 1000.0 * max(latencies)))
+        return "\n".join(lines)
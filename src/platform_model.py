@@ -0,0 +1,188 @@
+import numpy as np
+from frame_arrays import LazyFrameDict, frameToMatrix, matrixToFrame
+
+#Type of the components of each reference frame that are added to the complete dictionary
+PLATFORM_TYPES = (1, 2)  #Jigs and boxes
+COMBS_TYPES = (3,)
+ATC_TYPES = (4,)
+
+#Frames of each kind of keypoint, as (key of the sub dictionary or None, key of the frame)
+GUIDE_FRAMES = (('key', 'frame'), ('key', 'center_pose'), ('collision', 'frame'))
+SPOT_FRAMES = ((None, 'frame'), (None, 'center_pose'))
+COLLISION_DIMS = ('xcol1', 'xcol2', 'ycol1', 'ycol2')  #Collision limits of jigs, combs and guide keys, optional in the definition file
+
+
+def createJigsStruct(dict_jigs, scenes):
+    """
+    Returns a dictionary with all the info for all the jigs, boxes, combs and ATC stations, i.e. the frame of its down left corner seen from the base_link,
+    its dimensions and all the information about their keypoints with all their frames referred to the base_link.
+    scenes is a list of (platform, frame of its reference frame seen from the base_link, types of components to add)
+    """
+    jig_full_dict = {}
+    templates = {}  #(commercial, keypoints) -> KeypointTemplate, shared by all the instances of a model
+    for platform, base_frame, types in scenes:
+        #Frames of all the components seen from the base_link in one batched pass over the scene arrays
+        world = platform.arrays.worldMatrices(frameToMatrix(base_frame))
+        for trans, matrix in zip(platform.useful_transforms, world):
+            trans_type = trans.getID().getType()
+            if trans_type not in types or trans.getCommercial() not in dict_jigs:
+                continue
+            frame_frombase = matrixToFrame(matrix)
+            label = trans.getID().getLabel()
+            commercial = trans.getID().getCommercialID()
+            if trans_type == 1:
+                jig_full_dict[label] = _createJigDict(dict_jigs[commercial], matrix, frame_frombase, commercial, "J", templates)
+            elif trans_type == 2:
+                jig_full_dict[label] = _createBoxDict(dict_jigs[commercial], matrix, frame_frombase, commercial, templates)
+            elif trans_type == 3:
+                jig_full_dict[label] = _createJigDict(dict_jigs[commercial], matrix, frame_frombase, commercial, "C", templates)
+            elif trans_type == 4:
+                jig_full_dict[label] = _createATCDict(dict_jigs[commercial], frame_frombase, commercial, label)
+    return jig_full_dict
+
+
+def _getTemplate(templates, definition, commercial, keypoints, frame_paths):
+    if (commercial, keypoints) not in templates:
+        templates[(commercial, keypoints)] = KeypointTemplate(definition[keypoints], frame_paths)
+    return templates[(commercial, keypoints)]
+
+
+class KeypointTemplate(object):
+    """ Keypoints of a commercial model, stored once: the values of each keypoint and its local frames stacked in one array """
+    def __init__(self, keypoints, frame_paths):
+        self.keypoints = keypoints
+        self.frame_paths = frame_paths
+        self.frame_keys = set(frame_key for sub_key, frame_key in frame_paths)
+        self.names = list(keypoints)
+        self.positions = dict((name, i) for i, name in enumerate(self.names))
+        self.local = np.tile(np.eye(4), (len(self.names), len(frame_paths), 1, 1))
+        self.present = np.zeros((len(self.names), len(frame_paths)), dtype=bool)  #Keypoints without collision...
+        for i, name in enumerate(self.names):
+            for j, (sub_key, frame_key) in enumerate(frame_paths):
+                entry = self._getEntry(name, sub_key)
+                if isinstance(entry, LazyFrameDict) and frame_key in entry:
+                    self.local[i, j] = entry.getMatrix(frame_key)
+                    self.present[i, j] = True
+
+    def _getEntry(self, name, sub_key):
+        if sub_key is None:
+            return self.keypoints[name]
+        return self.keypoints[name][sub_key]
+
+    def values(self, name, sub_key):
+        """ Values of a keypoint that are not frames """
+        entry = self._getEntry(name, sub_key)
+        return dict((key, value) for key, value in entry.fields.items() if key not in self.frame_keys)
+
+
+class KeypointInstance(object):
+    """
+    Keypoints of a component, used like the dictionary of its template (e.g. guides[couple]['key']['frame']).
+    Only the frame of the component is stored: the frames of all its keypoints are computed in one batched product the first time one is read, and each keypoint is memoized.
+    """
+    def __init__(self, template, base_matrix):
+        self.template = template
+        self.base_matrix = base_matrix
+        self.world = None
+        self.entries = {}
+
+    def __contains__(self, name):
+        return name in self.template.positions
+
+    def __iter__(self):
+        return iter(self.template.names)
+
+    def __len__(self):
+        return len(self.template.names)
+
+    def keys(self):
+        return list(self.template.names)
+
+    def items(self):
+        return [(name, self[name]) for name in self.template.names]
+
+    def __getitem__(self, name):
+        if name not in self.entries:
+            self.entries[name] = self._createEntry(name)
+        return self.entries[name]
+
+    def __repr__(self):
+        return repr(dict(self.items()))
+
+    def worldMatrices(self):
+        """ Frames of all the keypoints seen from the base_link, (keypoints, frames, 4, 4) """
+        if self.world is None:
+            self.world = np.matmul(self.base_matrix, self.template.local)
+        return self.world
+
+    def _createEntry(self, name):
+        i = self.template.positions[name]
+        world = self.worldMatrices()[i]
+        entry = {}
+        for j, (sub_key, frame_key) in enumerate(self.template.frame_paths):
+            if sub_key not in entry:
+                entry[sub_key] = LazyFrameDict(self.template.values(name, sub_key))
+            if self.template.present[i, j]:
+                entry[sub_key].setMatrix(frame_key, world[j])
+        if None in entry:
+            return entry[None]
+        return entry
+
+
+def collisionLimits(definition):
+    """ [xcol1, xcol2, ycol1, ycol2] of a jig, comb or guide key, empty if its definition has not the collision limits """
+    if not all(dim in definition for dim in COLLISION_DIMS):
+        return []
+    return [definition[dim] for dim in COLLISION_DIMS]
+
+
+def _createJigDict(definition, jig_matrix, jig_frame_frombase, commercial, jig_type, templates):
+    """ Jigs and combs """
+    jig_temp_dict = {}
+    dimensions = [definition['xdim'], definition['ydim'], definition['zdim']]
+    collisions = collisionLimits(definition)
+
+    if 'guides' in definition:
+        jig_temp_dict['guides'] = KeypointInstance(_getTemplate(templates, definition, commercial, 'guides', GUIDE_FRAMES), jig_matrix)
+
+    if 'tape_spots' in definition:
+        jig_temp_dict['tape_spots'] = KeypointInstance(_getTemplate(templates, definition, commercial, 'tape_spots', SPOT_FRAMES), jig_matrix)
+
+    jig_temp_dict['dimensions'] = dimensions
+    jig_temp_dict['collisions'] = collisions
+    jig_temp_dict['jig_frame'] = jig_frame_frombase
+    jig_temp_dict['commercial'] = commercial
+    jig_temp_dict['Type'] = jig_type
+    return jig_temp_dict
+
+
+def _createBoxDict(definition, box_matrix, box_frame_frombase, commercial, templates):
+    box_temp_dict = {}
+    dimensions = [definition['xdim'], definition['ydim'], definition['zdim']]
+
+    if 'trays' in definition:
+        box_temp_dict['trays'] = KeypointInstance(_getTemplate(templates, definition, commercial, 'trays', SPOT_FRAMES), box_matrix)
+
+    box_temp_dict['dimensions'] = dimensions
+    box_temp_dict['box_frame'] = box_frame_frombase
+    box_temp_dict['commercial'] = commercial
+    box_temp_dict['Type'] = "B"
+    return box_temp_dict
+
+
+def _createATCDict(definition, ATC_frame_frombase, commercial, label):
+    ATC_temp_dict = {}
+    ATC_temp_dict['dimensions'] = [definition['xdim'], definition['ydim'], definition['zdim']]
+    ATC_temp_dict['dimensions_tool'] = [definition['x_tool'], definition['y_tool'], definition['z_tool']]
+    ATC_temp_dict['tool_type'] = definition['tool']
+
+    if ATC_temp_dict['tool_type'] == 'gripper':
+        ATC_temp_dict['frame_nail'] = definition['frame_nail']
+        ATC_temp_dict['dimensions_fingers'] = [definition['finger_length'], definition['finger_width'], definition['finger_height']]
+
+    ATC_temp_dict['frame_base'] = ATC_frame_frombase * definition['frame_base'] #local to global. THE MOST IMPORTANT FOR THE ATC
+    ATC_temp_dict['frame_end'] = definition['frame_end'] #This stays local, seen from the base
+    ATC_temp_dict['commercial'] = commercial
+    ATC_temp_dict['tool_name'] = label[1:] #To remove the A at the beginning and have the name of the tool
+    ATC_temp_dict['Type'] = "A"
+    return ATC_temp_dict
@@ -0,0 +1,91 @@
+from elvez_pkg.msg import operation_item
+from elvez_pkg.srv import resolve_operationResponse, index_operationResponse, next_operationResponse, all_operationsResponse
+
+
+def validateOperation(operation, jigs_complete_dict, dict_elvez):
+    """ Errors of the references of an operation of the sequence list to jigs, guides, taping spots, trays and components """
+    errors = []
+    components = dict_elvez.dict_components
+    for label in operation['label']:
+        if label[:2] == 'CA':
+            if label not in components['cable']:
+                errors.append("unknown cable " + label)
+        elif label not in components['connector'] and label not in components['device']:
+            errors.append("unknown connector or device " + label)
+        elif operation['operation'] == 'PC':
+            WHs = [WH for WH, cables in dict_elvez.findConnectorCables(label)]
+            if not WHs:
+                errors.append("connector " + label + " is not in any harness")
+            for WH in WHs:
+                box = dict_elvez.dict_WH[WH]['box']
+                tray = dict_elvez.dict_WH[WH]['tray']
+                if tray not in jigs_complete_dict.get(box, {}).get('trays', {}):
+                    errors.append("unknown tray " + box + "." + tray + " of " + WH)
+    for spot in operation['spot']:
+        jig = spot['jig']
+        if jig not in jigs_complete_dict:
+            errors.append("unknown jig " + jig)
+        elif operation['operation'] == 'T':
+            if spot['tape_spot'] not in jigs_complete_dict[jig].get('tape_spots', {}):
+                errors.append("unknown taping spot " + jig + "." + spot['tape_spot'])
+        else:
+            guide = spot['guide'] if operation['operation'] == 'TJ' else spot['couple']
+            if guide not in jigs_complete_dict[jig].get('guides', {}):
+                errors.append("unknown guide " + jig + "." + guide)
+    return errors
+
+
+class CompiledSequence(object):
+    """
+    Operations of the sequence list resolved once, after building the jigs structure: the resolve_operation response of
+    each operation (spots, connectors with their trays, cables, guides and taping spots) and the responses of the
+    index_operation, next_operation and all_operations services, so every request is a lookup in a list.
+    The references of every operation are checked when it is compiled, errors has (index, message) of each wrong one.
+    The responses of a wrong operation have success False, with its index, type, label, spot and end so it can be skipped.
+    """
+    def __init__(self, service_responses):
+        self.service_responses = service_responses
+        dict_elvez = service_responses.dict_elvez
+        self.operations = []  #resolve_operationResponse of each index
+        self.index_responses = []  #index_operationResponse of each index
+        self.next_responses = []  #next_operationResponse of each index
+        self.all_operations = all_operationsResponse()
+        self.errors = []
+        for index, operation in enumerate(dict_elvez.list_seq):
+            messages = validateOperation(operation, service_responses.jigs_complete_dict, dict_elvez)
+            for message in messages:
+                self.errors.append((index, message))
+            resolved = service_responses.resolveOperation(index)
+            if messages:
+                resolved.success = False
+            self.operations.append(resolved)
+            self.index_responses.append(index_operationResponse(success=resolved.success, index=resolved.index, type=resolved.type, label=resolved.label,
+                                                                spot=resolved.spot, end=resolved.end))
+            self.next_responses.append(next_operationResponse(success=resolved.success, type=resolved.type, label=resolved.label, spot=resolved.spot,
+                                                              end=resolved.end))
+            self.all_operations.data.append(operation_item(type=resolved.type, label=resolved.label, spot=resolved.spot))
+        self.all_operations.success = True
+
+    def isBuiltFrom(self, service_responses):
+        return self.service_responses is service_responses
+
+    def __len__(self):
+        return len(self.operations)
+
+    def operation(self, index):
+        if 0 <= index < len(self.operations):
+            return self.operations[index]
+        return resolve_operationResponse(success=False, index=index)
+
+    def indexOperation(self, index):
+        if 0 <= index < len(self.index_responses):
+            return self.index_responses[index]
+        return index_operationResponse(success=False, index=index)
+
+    def nextOperation(self, index):
+        if 0 <= index < len(self.next_responses):
+            return self.next_responses[index]
+        return next_operationResponse(success=False)
+
+    def allOperations(self):
+        return self.all_operations
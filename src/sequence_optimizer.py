@@ -0,0 +1,225 @@
+import csv
+import numpy as np
+
+#Stage of each type of operation: within a harness, an operation never goes before one of a previous stage
+OPERATION_STAGES = {'EC': 0, 'PC': 1, 'RC': 2, 'T': 3, 'TJ': 3}
+#Tool used by each type of operation, the others use the gripper
+OPERATION_TOOLS = {'T': 'gun', 'TJ': 'gun'}
+SEQUENCE_TYPES = ('RC', 'PC', 'T', 'TJ', 'EC')  #Rows of Assembly_sequence.csv read by InputFilesDataCollector
+
+
+def _point(component, keypoints, key, frame_path):
+    """ Position of a keypoint frame of a component, None if it does not exist """
+    if component is None or key not in component.get(keypoints, {}):
+        return None
+    entry = component[keypoints][key]
+    for sub_key in frame_path[:-1]:
+        entry = entry[sub_key]
+    frame = entry[frame_path[-1]]
+    return np.array([frame.p[0], frame.p[1], frame.p[2]])
+
+
+def operationPoints(operation, jigs_complete_dict, dict_elvez):
+    """
+    Positions of the end effector along an operation of the sequence list: the tray of the connector and its guide for
+    PC, the guides of the route for RC, the taping spot for T and the guide for EC and TJ. Unknown keypoints are skipped
+    """
+    points = []
+    operation_type = operation['operation']
+    if operation_type == 'PC':
+        for label in operation['label'][:1]:
+            for WH, cables in dict_elvez.findConnectorCables(label)[:1]:
+                box = dict_elvez.dict_WH[WH]['box']
+                points.append(_point(jigs_complete_dict.get(box), 'trays', dict_elvez.dict_WH[WH]['tray'], ('center_pose',)))
+    for spot in operation['spot']:
+        component = jigs_complete_dict.get(spot['jig'])
+        if operation_type == 'T':
+            points.append(_point(component, 'tape_spots', spot['tape_spot'], ('center_pose',)))
+        else:
+            points.append(_point(component, 'guides', spot['guide'] if operation_type == 'TJ' else spot['couple'], ('key', 'center_pose')))
+    return [point for point in points if point is not None]
+
+
+def _harnesses(label, dict_elvez):
+    """ Harnesses of a label (harness, connector or cable), None if it is not found in any """
+    if label in dict_elvez.dict_WH:
+        return set([label])
+    harnesses = set(WH for WH, cables in dict_elvez.findConnectorCables(label))
+    cable_WH = dict_elvez.findCable(label)
+    if cable_WH is not None:
+        harnesses.add(cable_WH[0])
+    for WH in dict_elvez.dict_WH:
+        if dict_elvez.dict_WH[WH].get('first_con') == label:
+            harnesses.add(WH)
+    return harnesses if harnesses else None
+
+
+def precedenceGraph(list_seq, dict_elvez):
+    """
+    Predecessors of each operation of the sequence list, i.e. the operations that must be done before it:
+    - the previous operations with any of its labels or of the same harness (a connector is extracted and placed before
+      its cables are routed, the cables of a harness are routed in the order of the file)
+    - if the harness of a label is unknown, the previous operations of a lower stage (EC, PC, RC, T)
+    - the previous routings through a jig before taping in it, and the previous tapings of a jig before routing through it
+    Returns a list of sets of indexes
+    """
+    info = []
+    for operation in list_seq:
+        harnesses = set()
+        unknown = False
+        for label in operation['label']:
+            label_harnesses = _harnesses(label, dict_elvez)
+            if label_harnesses is None:
+                unknown = True
+            else:
+                harnesses |= label_harnesses
+        info.append((set(operation['label']), harnesses, unknown, set(spot['jig'] for spot in operation['spot'])))
+    predecessors = []
+    for i, operation in enumerate(list_seq):
+        labels, harnesses, unknown, jigs = info[i]
+        stage = OPERATION_STAGES.get(operation['operation'], 0)
+        before = set()
+        for j in range(i):
+            other_labels, other_harnesses, other_unknown, other_jigs = info[j]
+            other_stage = OPERATION_STAGES.get(list_seq[j]['operation'], 0)
+            if labels & other_labels or harnesses & other_harnesses:
+                before.add(j)
+            elif (unknown or other_unknown) and other_stage < stage:
+                before.add(j)
+            elif jigs & other_jigs and (stage == 3) != (other_stage == 3) and min(stage, other_stage) >= 2:
+                before.add(j)
+        predecessors.append(before)
+    return predecessors
+
+
+class SequenceOptimizer(object):
+    """
+    Reorders the operations of the sequence list to reduce the travel of the end effector between operations and the
+    tool changes, keeping the precedence graph. The transitions are estimated as the straight distance from the last
+    keypoint of an operation to the first one of the next at speed (m/s), plus tool_change_s when the tool changes.
+    The order is built by a greedy nearest feasible operation and both it and the original order are improved by
+    moving single operations to the best feasible position (insertion), keeping the best result.
+    """
+    def __init__(self, list_seq, jigs_complete_dict, dict_elvez, speed=0.25, tool_change_s=8.0):
+        self.list_seq = list_seq
+        self.speed = speed
+        self.tool_change_s = tool_change_s
+        self.predecessors = precedenceGraph(list_seq, dict_elvez)
+        self.successors = [set() for _ in list_seq]
+        for i, before in enumerate(self.predecessors):
+            for j in before:
+                self.successors[j].add(i)
+        self.points = [operationPoints(operation, jigs_complete_dict, dict_elvez) for operation in list_seq]
+        self.tools = [OPERATION_TOOLS.get(operation['operation'], 'gripper') for operation in list_seq]
+        self.transitions = self._transitionMatrix()
+
+    def _transitionMatrix(self):
+        """ Seconds from the end of each operation to the start of each other one """
+        n = len(self.list_seq)
+        starts = np.full((n, 3), np.nan)
+        ends = np.full((n, 3), np.nan)
+        for i, points in enumerate(self.points):
+            if points:
+                starts[i] = points[0]
+                ends[i] = points[-1]
+        distances = np.linalg.norm(ends[:, None, :] - starts[None, :, :], axis=2)
+        #The operations without known keypoints do not add travel
+        transitions = np.nan_to_num(distances) / self.speed
+        tools = np.array(self.tools)
+        transitions += (tools[:, None] != tools[None, :]) * self.tool_change_s
+        return transitions
+
+    def internalTravel(self):
+        """ Seconds of travel between the keypoints of each operation """
+        return np.array([sum(np.linalg.norm(b - a) for a, b in zip(points[:-1], points[1:])) / self.speed for points in self.points])
+
+    def cost(self, order):
+        """ Seconds of the transitions between the operations of an order """
+        order = np.asarray(order, dtype=int)
+        if len(order) < 2:
+            return 0.0
+        return float(self.transitions[order[:-1], order[1:]].sum())
+
+    def isFeasible(self, order):
+        positions = dict((operation, position) for position, operation in enumerate(order))
+        return len(positions) == len(self.list_seq) and all(positions[j] < positions[i] for i in positions for j in self.predecessors[i])
+
+    def greedy(self):
+        """ Order choosing each time the feasible operation with the cheapest transition from the previous one """
+        remaining = [len(before) for before in self.predecessors]
+        ready = set(i for i, count in enumerate(remaining) if count == 0)
+        order = []
+        while ready:
+            if order:
+                operation = min(ready, key=lambda i: (self.transitions[order[-1], i], i))
+            else:
+                operation = min(ready)
+            ready.remove(operation)
+            order.append(operation)
+            for successor in self.successors[operation]:
+                remaining[successor] -= 1
+                if remaining[successor] == 0:
+                    ready.add(successor)
+        return order
+
+    def improve(self, order, max_passes=50):
+        """ Moves single operations to the feasible position that reduces most the cost, until no move improves it """
+        order = list(order)
+        T = self.transitions
+        for _ in range(max_passes):
+            improved = False
+            for operation in list(order):
+                i = order.index(operation)
+                rest = order[:i] + order[i + 1:]
+                #Cost saved by removing the operation
+                removed = 0.0
+                if i > 0:
+                    removed += T[rest[i - 1], operation]
+                if i < len(rest):
+                    removed += T[operation, rest[i]]
+                if 0 < i < len(rest):
+                    removed -= T[rest[i - 1], rest[i]]
+                #Feasible positions: after all its predecessors and before all its successors
+                positions = dict((other, position) for position, other in enumerate(rest))
+                low = max([positions[j] + 1 for j in self.predecessors[operation]] + [0])
+                high = min([positions[j] for j in self.successors[operation]] + [len(rest)])
+                best, best_position = 0.0, i
+                for position in range(low, high + 1):
+                    added = 0.0
+                    if position > 0:
+                        added += T[rest[position - 1], operation]
+                    if position < len(rest):
+                        added += T[operation, rest[position]]
+                    if 0 < position < len(rest):
+                        added -= T[rest[position - 1], rest[position]]
+                    if added - removed < best - 1e-9:
+                        best, best_position = added - removed, position
+                if best_position != i:
+                    order = rest[:best_position] + [operation] + rest[best_position:]
+                    improved = True
+            if not improved:
+                break
+        return order
+
+    def optimize(self):
+        """ Best order found and its cost """
+        original = self.improve(range(len(self.list_seq)))
+        greedy = self.improve(self.greedy())
+        return min([original, greedy], key=self.cost)
+
+
+def writeSequence(seq_file, order, output_file):
+    """
+    Writes the operations of an Assembly_sequence.csv file in a new order (indexes of the sequence list), renumbering them.
+    The header and the rows that are not operations are kept at the beginning
+    """
+    with open(seq_file, 'rb') as f:
+        rows = list(csv.reader(f, delimiter=';'))
+    operations = [row for row in rows if len(row) > 1 and row[1].upper() in SEQUENCE_TYPES]
+    others = [row for row in rows if not (len(row) > 1 and row[1].upper() in SEQUENCE_TYPES)]
+    with open(output_file, 'wb') as f:
+        writer = csv.writer(f, delimiter=';', lineterminator='\n')
+        for row in others:
+            writer.writerow(row)
+        for number, index in enumerate(order):
+            writer.writerow([str(number + 1)] + operations[index][1:])
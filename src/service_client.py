@@ -0,0 +1,84 @@
+import time
+import threading
+import rospy
+
+
+class ServiceClient(object):
+    """
+    Calls the services of the platform handler and of the skill manager.
+    With persistent=True the proxy of each service is created once, after waiting for the service, and its connection is
+    reused in every call. If the connection is lost (e.g. the handler was restarted) the proxy is created again and the
+    call repeated, up to retries times. With persistent=False every call waits for the service and opens a new connection,
+    as the planners did before.
+    The latency of each call is saved per service.
+    The calls are serialized with a lock, so the client can be shared by several threads: a persistent proxy is one
+    connection, and two calls at the same time on it could read each other's response.
+    """
+    def __init__(self, persistent=True, retries=2, wait_timeout=None):
+        self.persistent = persistent
+        self.retries = retries
+        self.wait_timeout = wait_timeout
+        self.proxies = {}  #service name: ServiceProxy
+        self.latencies = {}  #service name: [seconds of each call]
+        self.reconnections = {}  #service name: proxies recreated after a failure
+        self.lock = threading.RLock()
+
+    def proxy(self, name, service_class):
+        """ Proxy of the service, waiting for it if it has not been created yet """
+        with self.lock:
+            if name not in self.proxies:
+                rospy.wait_for_service(name, self.wait_timeout)
+                self.proxies[name] = rospy.ServiceProxy(name, service_class, persistent=self.persistent)
+            return self.proxies[name]
+
+    def close(self, name=None):
+        """ Closes the connection of a service, or of all of them """
+        with self.lock:
+            names = [name] if name is not None else list(self.proxies)
+            for service_name in names:
+                if service_name in self.proxies:
+                    self.proxies.pop(service_name).close()
+
+    def call(self, name, service_class, request):
+        """ Calls the service and returns its response """
+        with self.lock:
+            return self._call(name, service_class, request)
+
+    def _call(self, name, service_class, request):
+        attempt = 0
+        start = time.time()
+        while True:
+            proxy = self.proxy(name, service_class)
+            try:
+                response = proxy(request)
+                break
+            except (rospy.ServiceException, rospy.exceptions.TransportException):
+                #An error of the service itself is not repeated, only the calls that did not reach it or lost the connection
+                if not self.persistent or attempt >= self.retries or (proxy.transport is not None and not proxy.transport.done):
+                    self.close(name)
+                    raise
+                self.close(name)
+                self.reconnections[name] = self.reconnections.get(name, 0) + 1
+                attempt += 1
+                rospy.logwarn("Connection with " + name + " lost, reconnecting")
+        if not self.persistent:
+            self.close(name)
+        elapsed = time.time() - start
+        self.latencies.setdefault(name, []).append(elapsed)
+        rospy.logdebug("%s: %.2f ms" % (name, elapsed * 1000))
+        return response
+
+    def stats(self):
+        """ Calls, mean, max and total latency (ms) and reconnections of each service """
+        stats = {}
+        for name, latencies in self.latencies.items():
+            stats[name] = {'calls': len(latencies), 'mean_ms': 1000.0 * sum(latencies) / len(latencies), 'max_ms': 1000.0 * max(latencies),
+                           'total_ms': 1000.0 * sum(latencies), 'reconnections': self.reconnections.get(name, 0)}
+        return stats
+
+    def report(self):
+        """ Text with the latency of each service """
+        lines = []
+        for name, stat in sorted(self.stats().items()):
+            lines.append("%s: %d calls, mean %.2f ms, max %.2f ms, %d reconnections" % (name, stat['calls'], stat['mean_ms'], stat['max_ms'], stat['reconnections']))
+        return "\n".join(lines)
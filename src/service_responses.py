@@ -0,0 +1,308 @@
+from geometry_msgs.msg import Pose
+from elvez_pkg.msg import jig_guide_data, jig_tape_data, pins_data, spot_data, connector_data, cable_data
+from elvez_pkg.srv import jig_infoResponse, guide_infoResponse, taping_spot_infoResponse, tray_infoResponse, tool_infoResponse
+from elvez_pkg.srv import connector_infoResponse, cable_infoResponse, resolve_operationResponse
+from platform_model import collisionLimits
+
+
+#Function for transforming a kdl frame in a Pose (for sending it in msgs and srvs)
+def fromKdlToPose(kdl_frame):
+    pose = Pose()
+    pose.position.x = kdl_frame.p[0]
+    pose.position.y = kdl_frame.p[1]
+    pose.position.z = kdl_frame.p[2]
+    ang = kdl_frame.M.GetQuaternion()
+    pose.orientation.x = ang[0]
+    pose.orientation.y = ang[1]
+    pose.orientation.z = ang[2]
+    pose.orientation.w = ang[3]
+    return pose
+
+
+class ServiceResponses(object):
+    """
+    Responses of the info services and of resolve_operation, built from the jigs structure the first time each one is
+    requested and memoized, so creating them does not read the frames of every keypoint.
+    The responses are shared between requests, so they must not be modified by the callbacks.
+    """
+    def __init__(self, jigs_complete_dict, dict_elvez):
+        self.jigs_complete_dict = jigs_complete_dict
+        self.dict_elvez = dict_elvez
+        self.jigs = {}  #jig: jig_infoResponse
+        self.guides = {}  #(jig, guide): guide_infoResponse
+        self.spots = {}  #(jig, spot): taping_spot_infoResponse
+        self.trays = {}  #(box, tray): tray_infoResponse
+        self.tools = {}  #ATC label: tool_infoResponse
+        self.connectors = {}  #label: connector_infoResponse
+        self.cables = {}  #label: cable_infoResponse
+        self.operations = {}  #sequence index: resolve_operationResponse
+
+    def isBuiltFrom(self, jigs_complete_dict, dict_elvez):
+        """ False if the platform model was reloaded after building the responses """
+        return self.jigs_complete_dict is jigs_complete_dict and self.dict_elvez is dict_elvez
+
+    def _jig(self, jig):
+        """ Component of a jig (or comb) of the jigs structure, None if there is no such jig """
+        component = self.jigs_complete_dict.get(jig)
+        if component is None or 'jig_frame' not in component:
+            return None
+        return component
+
+    def _createJig(self, component):
+        resp = jig_infoResponse()
+        resp.commercial = component['commercial']
+        resp.corner_frame = fromKdlToPose(component['jig_frame'])
+        resp.dimensions = component['dimensions']
+        if 'guides' in component:
+            for guide in component['guides']:
+                guide_dict = component['guides'][guide]
+                data_guide = self._guideData(guide, guide_dict)
+                data_guide.collisions = collisionLimits(guide_dict['key'])
+                resp.guides.append(data_guide)
+        if 'tape_spots' in component:
+            for spot in component['tape_spots']:
+                resp.taping_spots.append(self._spotData(spot, component['tape_spots'][spot]))
+        resp.success = True
+        return resp
+
+    def _createGuide(self, component, guide):
+        #The guide_info service gives the collisions and the dimensions of the jig instead
+        resp = guide_infoResponse()
+        resp.data = self._guideData(guide, component['guides'][guide])
+        resp.data.collisions = component['collisions']
+        resp.data.dimensions = component['dimensions']
+        resp.success = True
+        return resp
+
+    def _guideData(self, guide, guide_dict):
+        data = jig_guide_data()
+        data.id = guide
+        data.key_length = guide_dict['key']['length']
+        data.key_gap = guide_dict['key']['gap']
+        data.key_height = guide_dict['key']['height']
+        data.key_height_corner = guide_dict['key'].get('height_corner', 0.0)
+        data.key_corner_frame = fromKdlToPose(guide_dict['key']['frame'])
+        data.key_center_frame = fromKdlToPose(guide_dict['key']['center_pose'])
+        data.collision_dimensions = [guide_dict['collision']['xdim'], guide_dict['collision']['ydim'], guide_dict['collision']['zdim']]
+        data.collision_corner_frame = fromKdlToPose(guide_dict['collision']['frame'])
+        return data
+
+    def _spotData(self, spot, spot_dict):
+        data = jig_tape_data()
+        data.id = spot
+        data.corner_frame = fromKdlToPose(spot_dict['frame'])
+        data.center_frame = fromKdlToPose(spot_dict['center_pose'])
+        data.dimensions = [spot_dict['xdim'], spot_dict['ydim'], spot_dict['zdim']]
+        return data
+
+    def _createTray(self, box, tray, tray_dict):
+        resp = tray_infoResponse()
+        resp.key_corner_frame = fromKdlToPose(tray_dict['frame'])
+        resp.key_center_frame = fromKdlToPose(tray_dict['center_pose'])
+        resp.dimensions = [tray_dict['xdim'], tray_dict['ydim'], tray_dict['zdim']]
+        tray_WH = self.dict_elvez.findTrayWH(box, tray)
+        if tray_WH is not None:
+            resp.WH = tray_WH
+        resp.success = True
+        return resp
+
+    def _createTool(self, component):
+        resp = tool_infoResponse()
+        resp.dim_tool = component['dimensions_tool']
+        resp.type = component['tool_type']
+        if resp.type == "gripper":
+            resp.pose_nail = fromKdlToPose(component['frame_nail'])
+            resp.dim_fingers = component['dimensions_fingers']
+        resp.pose_base = fromKdlToPose(component['frame_base'])
+        resp.pose_end = fromKdlToPose(component['frame_end'])
+        resp.success = True
+        return resp
+
+    def jigInfo(self, jig):
+        if jig not in self.jigs:
+            component = self._jig(jig)
+            if component is None:
+                return jig_infoResponse(success=False)
+            self.jigs[jig] = self._createJig(component)
+        return self.jigs[jig]
+
+    def guideInfo(self, jig, guide):
+        if (jig, guide) not in self.guides:
+            component = self._jig(jig)
+            if component is None or guide not in component.get('guides', {}):
+                return guide_infoResponse(success=False)
+            self.guides[(jig, guide)] = self._createGuide(component, guide)
+        return self.guides[(jig, guide)]
+
+    def tapingSpotInfo(self, jig, spot):
+        if (jig, spot) not in self.spots:
+            component = self._jig(jig)
+            if component is None or spot not in component.get('tape_spots', {}):
+                return taping_spot_infoResponse(success=False)
+            self.spots[(jig, spot)] = taping_spot_infoResponse(data=self._spotData(spot, component['tape_spots'][spot]), success=True)
+        return self.spots[(jig, spot)]
+
+    def trayInfo(self, box, tray):
+        if (box, tray) not in self.trays:
+            trays = self.jigs_complete_dict.get(box, {}).get('trays', {})
+            if tray not in trays:
+                return tray_infoResponse(success=False)
+            self.trays[(box, tray)] = self._createTray(box, tray, trays[tray])
+        return self.trays[(box, tray)]
+
+    def toolInfo(self, name):
+        label_name = "A" + name
+        if label_name not in self.tools:
+            component = self.jigs_complete_dict.get(label_name, {})
+            if 'tool_type' not in component:
+                return tool_infoResponse(success=False)
+            self.tools[label_name] = self._createTool(component)
+        return self.tools[label_name]
+
+    def connectorInfo(self, label):
+        """ Information about a connector or device and the cables of the harnesses where it is the first or an end connector """
+        if label in self.connectors:
+            return self.connectors[label]
+        resp = connector_infoResponse()
+        components = self.dict_elvez.dict_components
+        if label in components['connector']:
+            resp.component = 'CON'
+            resp.color = components['connector'][label]['color']
+            resp.reference = components['connector'][label]['reference']
+            resp.model = components['connector'][label]['model']
+            resp.dimensions = [components['connector'][label]['xdim'], components['connector'][label]['ydim'], components['connector'][label]['zdim']]
+        elif label in components['device']:
+            resp.component = 'DEV'
+            resp.color = components['device'][label]['color']
+            resp.model = components['device'][label]['model']
+            resp.type = components['device'][label]['type']
+
+        #Harnesses where the label is the first connector or an end connector (from the index built at load time)
+        for WH, cables in self.dict_elvez.findConnectorCables(label):
+            resp.WH = WH
+            resp.box = self.dict_elvez.dict_WH[WH]['box']
+            resp.tray = self.dict_elvez.dict_WH[WH]['tray']
+            for cable, pins in cables:
+                data = pins_data()
+                data.label = cable
+                data.pins = pins
+                resp.cables.append(data)
+
+        resp.success = True
+        self.connectors[label] = resp
+        return resp
+
+    def cableInfo(self, label):
+        """ Information about a cable and the connectors at its ends """
+        if label in self.cables:
+            return self.cables[label]
+        resp = cable_infoResponse()
+        components = self.dict_elvez.dict_components
+        if label in components['cable']:
+            resp.component = 'CAB'
+            resp.color = components['cable'][label]['color']
+            resp.length = components['cable'][label]['length']
+            resp.diameter = components['cable'][label]['diameter']
+
+            cable_WH = self.dict_elvez.findCable(label)
+            if cable_WH is not None:
+                WH, branch = cable_WH
+                dict_WH = self.dict_elvez.dict_WH[WH]
+                resp.WH = WH
+                resp.box = dict_WH['box']
+                resp.tray = dict_WH['tray']
+                data1 = pins_data()
+                data2 = pins_data()
+                data1.label = dict_WH['first_con']
+                data1.pins = dict_WH['end_con'][branch][label]['first_pins']
+                data2.label = branch
+                data2.pins = dict_WH['end_con'][branch][label]['end_pins']
+                resp.connectors = [data1, data2]
+            resp.success = True
+        else:
+            resp.success = False
+        self.cables[label] = resp
+        return resp
+
+    def spotData(self, operation, spot):
+        """ spot_data of a spot of an operation of the sequence list """
+        data = spot_data()
+        data.jig = spot['jig']
+        if operation == 'T':
+            data.id = spot['tape_spot']
+        elif operation == 'TJ':
+            data.id = spot['guide']
+        else:
+            data.id = spot['couple']
+            if operation == 'PC' or operation == 'EC':
+                data.side = spot['side']
+        return data
+
+    def _connectorData(self, label):
+        info = self.connectorInfo(label)
+        data = connector_data(label=label, component=info.component, reference=info.reference, model=info.model, type=info.type, color=info.color,
+                              WH=info.WH, box=info.box, tray=info.tray, cables=info.cables, dimensions=info.dimensions)
+        tray = self.trayInfo(info.box, info.tray)
+        if tray.success:
+            data.tray_corner_frame = tray.key_corner_frame
+            data.tray_center_frame = tray.key_center_frame
+            data.tray_dimensions = tray.dimensions
+        return data
+
+    def _cableData(self, label):
+        info = self.cableInfo(label)
+        return cable_data(label=label, component=info.component, color=info.color, length=info.length, diameter=info.diameter,
+                          WH=info.WH, box=info.box, tray=info.tray, connectors=info.connectors)
+
+    def resolveOperation(self, index):
+        """
+        Operation of the sequence list with all the information needed to perform it: its connectors (with the tray where
+        they are), its cables (the ones of the labels and the ones of the connectors of an RC operation), the guide of each
+        spot and the taping spots. index is the index of the next operation, as in index_operation, but the index of the
+        handler is not modified. success is False if a connector, cable, guide or taping spot of the operation or the tray
+        of a connector to pick (PC) is not found, the rest of the response is filled anyway
+        """
+        if index in self.operations:
+            return self.operations[index]
+        list_seq = self.dict_elvez.list_seq
+        if index < 0 or index >= len(list_seq):
+            return resolve_operationResponse(success=False, index=index)
+        operation = list_seq[index]
+        resp = resolve_operationResponse()
+        resp.type = operation['operation']
+        resp.label = list(operation['label'])
+        resp.spot = [self.spotData(resp.type, spot) for spot in operation['spot']]
+        resp.index = index + 1
+        resp.end = resp.index >= len(list_seq)
+        if resp.end:
+            resp.index = 0
+
+        found = []  #success of every lookup
+        cable_labels = []
+        for label in resp.label:
+            if label[:2] == 'CA':
+                cable_labels.append(label)
+            else:
+                connector = self._connectorData(label)
+                resp.connectors.append(connector)
+                found.append(connector.component != '')
+                if resp.type == 'PC':
+                    found.append(self.trayInfo(connector.box, connector.tray).success)
+                if resp.type == 'RC':
+                    cable_labels += [cable.label for cable in connector.cables]
+        for label in cable_labels:
+            resp.cables.append(self._cableData(label))
+            found.append(self.cableInfo(label).success)
+
+        for spot in resp.spot:
+            if resp.type == 'T':
+                info = self.tapingSpotInfo(spot.jig, spot.id)
+                resp.taping_spots.append(info.data)
+            else:
+                info = self.guideInfo(spot.jig, spot.id)
+                resp.guides.append(info.data)
+            found.append(info.success)
+
+        resp.success = all(found)
+        self.operations[index] = resp
+        return resp
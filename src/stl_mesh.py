@@ -0,0 +1,270 @@
+import os
+import heapq
+import multiprocessing
+import numpy as np
+from model_cache import fileDigest
+from wri_reader import iterWriRows
+
+#Record of a triangle in a binary STL file
+STL_DTYPE = np.dtype([('normal', '<f4', (3,)), ('vertices', '<f4', (3, 3)), ('attribute', '<u2')])
+#Fraction of the triangles of the original mesh kept in each level of detail, level 0 is the original file
+LOD_RATIOS = (1.0, 0.5, 0.25, 0.1, 0.03)
+
+
+def _binaryCount(path):
+    """ Number of triangles of a binary STL file or None if the file is not a binary STL """
+    with open(path, 'rb') as f:
+        header = f.read(84)
+    if len(header) < 84:
+        return None
+    count = int(np.frombuffer(header[80:84], '<u4')[0])
+    if os.path.getsize(path) != 84 + count * STL_DTYPE.itemsize:
+        return None
+    return count
+
+
+def mapStl(path):
+    """ Records (STL_DTYPE) of a binary STL file, memory-mapped read only instead of read. None if the file is not a binary STL """
+    count = _binaryCount(path)
+    if count is None:
+        return None
+    if count == 0:
+        return np.zeros(0, STL_DTYPE)
+    return np.memmap(path, dtype=STL_DTYPE, mode='r', offset=84, shape=(count,))
+
+
+def readStl(path):
+    """ Triangles (N, 3, 3) of a binary or ASCII STL file """
+    records = mapStl(path)
+    if records is not None:
+        return records['vertices'].astype(np.float64)
+    vertices = []
+    with open(path) as f:
+        for line in f:
+            chunks = line.split()
+            if chunks and chunks[0] == 'vertex':
+                vertices.append([float(chunk) for chunk in chunks[1:4]])
+    return np.array(vertices, dtype=np.float64).reshape(-1, 3, 3)
+
+
+def stlTriangleCount(path):
+    count = _binaryCount(path)
+    if count is None:
+        count = len(readStl(path))
+    return count
+
+
+def meshStats(path, chunk=1 << 20):
+    """
+    Triangles, axis aligned bounding box (min, max, extent), enclosed volume and surface area of an STL file.
+    Binary files are processed from the memory map in chunks of triangles
+    """
+    records = mapStl(path)
+    if records is not None:
+        vertices = records['vertices']
+    else:
+        vertices = readStl(path)
+    low = np.full(3, np.inf)
+    high = np.full(3, -np.inf)
+    volume = 0.0
+    area = 0.0
+    for start in range(0, len(vertices), chunk):
+        triangles = np.asarray(vertices[start:start + chunk], dtype=np.float64)
+        points = triangles.reshape(-1, 3)
+        low = np.minimum(low, points.min(axis=0))
+        high = np.maximum(high, points.max(axis=0))
+        #Divergence theorem: sum of the signed volumes of the tetrahedra formed by each triangle and the origin
+        volume += np.einsum('ij,ij->', triangles[:, 0], np.cross(triangles[:, 1], triangles[:, 2])) / 6.0
+        area += np.linalg.norm(np.cross(triangles[:, 1] - triangles[:, 0], triangles[:, 2] - triangles[:, 0]), axis=1).sum() / 2.0
+    if len(vertices) == 0:
+        low = high = np.zeros(3)
+    return {'triangles': len(vertices), 'min': low.tolist(), 'max': high.tolist(), 'extent': (high - low).tolist(), 'volume': abs(volume), 'area': area}
+
+
+def directoryStats(folder, processes=None):
+    """ meshStats of every STL file of a folder and its subfolders, computed in parallel. Keys are paths relative to folder """
+    paths = []
+    for path, dirs, files in os.walk(folder):
+        dirs.sort()
+        paths += [os.path.join(path, name) for name in sorted(files) if name.lower().endswith('.stl')]
+    if processes == 1 or len(paths) < 2:
+        stats = [meshStats(path) for path in paths]
+    else:
+        pool = multiprocessing.Pool(processes)
+        try:
+            stats = pool.map(meshStats, paths)
+        finally:
+            pool.close()
+            pool.join()
+    return dict((os.path.relpath(path, folder), stat) for path, stat in zip(paths, stats))
+
+
+def checkMeshDimensions(folder, dict_jigs, stats, scale=0.001, tolerance=0.1, types=('jig', 'box', 'comb')):
+    """
+    Compares the xdim, ydim, zdim of the definitions of the jigs, boxes and combs with the bounding box of their meshes.
+    xdim, ydim, zdim are the sizes of the body of the component along the x, y, z axes of its frame, which is also the
+    frame of its STL file. The mesh also has the guides, keys and trays of the body, so it can be larger than the
+    definition but not smaller: a definition is wrong if it exceeds the mesh by more than tolerance along any axis.
+    Some STL files are exported turned about the vertical axis, so the footprint (xdim, ydim) is compared without its
+    orientation and zdim with the height of the mesh.
+    The meshes of folder/stl/<cad>/<CAD ID>.STL are matched with their definition through folder/<cad>_ids.wri.
+    stats is the result of directoryStats(folder/stl) and scale converts the units of the meshes to meters.
+    Returns rows of (mesh, label, commercial, definition dims, mesh dims, largest relative excess, within tolerance)
+    """
+    cad_ids = {}  #cad: {CAD ID: (label, commercial)}
+    rows = []
+    for mesh in sorted(stats):
+        cad_name, file_name = os.path.split(mesh)
+        if cad_name not in cad_ids:
+            ids_file = os.path.join(folder, cad_name + '_ids.wri')
+            cad_ids[cad_name] = {}
+            if cad_name != '' and os.path.isfile(ids_file):
+                cad_ids[cad_name] = dict((row_id, (label, commercial)) for row_id, label, commercial in iterWriRows(ids_file))
+        cad_id = os.path.splitext(file_name)[0]
+        if cad_id not in cad_ids[cad_name]:
+            continue
+        label, commercial = cad_ids[cad_name][cad_id]
+        if commercial not in dict_jigs or dict_jigs[commercial].get('type') not in types:
+            continue
+        definition = [dict_jigs[commercial]['xdim'], dict_jigs[commercial]['ydim'], dict_jigs[commercial]['zdim']]
+        extent = [value * scale for value in stats[mesh]['extent']]
+        pairs = zip(sorted(extent[:2]), sorted(definition[:2])) + [(extent[2], definition[2])]
+        excess = max((d - e) / max(abs(d), 1e-9) for e, d in pairs)
+        rows.append((mesh, label, commercial, definition, extent, excess, excess <= tolerance))
+    return rows
+
+
+def writeStl(path, triangles, header=b'Decimated by elvez_pkg'):
+    """ Saves the triangles (N, 3, 3) as a binary STL file """
+    triangles = np.asarray(triangles, dtype=np.float64).reshape(-1, 3, 3)
+    data = np.zeros(len(triangles), STL_DTYPE)
+    data['vertices'] = triangles
+    normals = np.cross(triangles[:, 1] - triangles[:, 0], triangles[:, 2] - triangles[:, 0])
+    lengths = np.linalg.norm(normals, axis=1)
+    lengths[lengths == 0] = 1.0
+    data['normal'] = normals / lengths[:, None]
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(header[:80].ljust(80, b'\0'))
+        f.write(np.array([len(data)], '<u4').tobytes())
+        data.tofile(f)
+    os.rename(tmp_path, path)
+
+
+def decimate(triangles, cell_size):
+    """
+    Vertex clustering: the vertices inside the same cell of a grid are merged in their mean point,
+    and the triangles that become degenerate or duplicated are removed
+    """
+    vertices = triangles.reshape(-1, 3)
+    cells = np.floor((vertices - vertices.min(axis=0)) / cell_size).astype(np.int64)
+    dims = cells.max(axis=0) + 1
+    keys = (cells[:, 0] * dims[1] + cells[:, 1]) * dims[2] + cells[:, 2]
+    _, cluster = np.unique(keys, return_inverse=True)
+    counts = np.bincount(cluster).astype(np.float64)
+    points = np.column_stack([np.bincount(cluster, vertices[:, axis]) for axis in range(3)]) / counts[:, None]
+    faces = cluster.reshape(-1, 3)
+    faces = faces[(faces[:, 0] != faces[:, 1]) & (faces[:, 1] != faces[:, 2]) & (faces[:, 0] != faces[:, 2])]
+    if len(faces) == 0:
+        return np.zeros((0, 3, 3))
+    #Triangles with the same vertices in any order are kept once
+    sorted_faces = np.sort(faces, axis=1)
+    face_keys = (sorted_faces[:, 0] * len(points) + sorted_faces[:, 1]) * len(points) + sorted_faces[:, 2]
+    _, first = np.unique(face_keys, return_index=True)
+    return points[faces[np.sort(first)]]
+
+
+def decimateToCount(triangles, target, iterations=12):
+    """ Decimation with the smallest cell size found that leaves at most target triangles """
+    if len(triangles) <= target:
+        return triangles
+    vertices = triangles.reshape(-1, 3)
+    diagonal = np.linalg.norm(vertices.max(axis=0) - vertices.min(axis=0))
+    low, high = diagonal * 1e-4, diagonal
+    best = decimate(triangles, high)
+    for _ in range(iterations):
+        middle = (low + high) / 2
+        result = decimate(triangles, middle)
+        if len(result) <= target:
+            best = result
+            high = middle
+        else:
+            low = middle
+    return best
+
+
+def canonicalMeshes(paths, digests=None):
+    """
+    Maps each mesh file to the first one (in sorted order) with the same content, so identical meshes are loaded only once.
+    digests is a function returning the content hash of a list of files, by default the SHA1 of each file
+    """
+    paths = sorted(set(path for path in paths if os.path.isfile(path)))
+    if digests is None:
+        digests = lambda files: [fileDigest(path) for path in files]
+    canonical = {}
+    first = {}  #digest: canonical path
+    for path, digest in zip(paths, digests(paths)):
+        canonical[path] = first.setdefault(digest, path)
+    return canonical
+
+
+class MeshLOD(object):
+    """
+    Levels of detail of the STL meshes shown in RViz.
+    The low poly variants are saved in cache_dir named by the SHA1 of the original file, so each one is computed only once.
+    """
+    def __init__(self, cache_dir, ratios=LOD_RATIOS):
+        self.cache_dir = cache_dir
+        self.ratios = ratios
+        self.meshes = {}  #path: [(path, triangles, bytes)] of each level
+
+    def levels(self, path):
+        """ (path, triangles, bytes) of each level of detail of a mesh, the first one is the original file """
+        if path in self.meshes:
+            return self.meshes[path]
+        if not os.path.isfile(path):
+            self.meshes[path] = [(path, 0, 0)]
+            return self.meshes[path]
+        levels = [(path, stlTriangleCount(path), os.path.getsize(path))]
+        digest = fileDigest(path)
+        triangles = None
+        for ratio in self.ratios[1:]:
+            lod_path = os.path.join(self.cache_dir, '%s_%03d.STL' % (digest, int(round(ratio * 1000))))
+            if not os.path.isfile(lod_path):
+                if triangles is None:
+                    triangles = readStl(path)
+                if not os.path.isdir(self.cache_dir):
+                    os.makedirs(self.cache_dir)
+                writeStl(lod_path, decimateToCount(triangles, int(levels[0][1] * ratio)))
+            levels.append((lod_path, stlTriangleCount(lod_path), os.path.getsize(lod_path)))
+        self.meshes[path] = levels
+        return levels
+
+    def assignLevels(self, paths, budget):
+        """
+        Level of each mesh of the scene (one path per marker, repeated if the mesh is used several times) so the
+        total number of triangles fits in budget. The meshes with more triangles are simplified first.
+        Returns the chosen (path, triangles, bytes) of each mesh
+        """
+        levels = [self.levels(path) for path in paths]
+        chosen = [0] * len(paths)
+        total = sum(mesh_levels[0][1] for mesh_levels in levels)
+        heap = [(-mesh_levels[0][1], i) for i, mesh_levels in enumerate(levels)]
+        heapq.heapify(heap)
+        while total > budget and heap:
+            triangles, i = heapq.heappop(heap)
+            if chosen[i] + 1 >= len(levels[i]):
+                continue
+            chosen[i] += 1
+            total += levels[i][chosen[i]][1] + triangles
+            heapq.heappush(heap, (-levels[i][chosen[i]][1], i))
+        return [levels[i][chosen[i]] for i in range(len(paths))]
+
+    def report(self, paths, chosen):
+        """ Rows of (original file, triangles, bytes, triangles, bytes of the chosen level) and the totals """
+        rows = []
+        for path, level in zip(paths, chosen):
+            original = self.levels(path)[0]
+            rows.append((os.path.basename(path), original[1], original[2], level[1], level[2]))
+        totals = tuple(sum(row[column] for row in rows) for column in range(1, 5))
+        return rows, totals
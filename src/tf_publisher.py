@@ -0,0 +1,61 @@
+import rospy
+import tf2_ros
+from geometry_msgs.msg import TransformStamped
+
+
+class PlatformTFPublisher(object):
+    """
+    Publishes the frames of the platform components and their keypoints.
+    With static=True all the frames are sent together in one latched /tf_static message, only when a frame is added or changes.
+    With static=False they are re-broadcasted on /tf on every tick, as one message with all the frames.
+    In both cases the TransformStamped of each frame is built once, when it is set, and only its stamp is updated afterwards.
+    """
+    def __init__(self, static=True):
+        self.static = static
+        if static:
+            self.broadcaster = tf2_ros.StaticTransformBroadcaster()
+        else:
+            self.broadcaster = tf2_ros.TransformBroadcaster()
+        self.frames = {}  #child frame: (parent frame, translation, quaternion)
+        self.transforms = {}  #child frame: TransformStamped
+        self.transform_list = []  #Transforms sent in each message
+        self.changed = []  #Child frames added or modified since the last publication
+        self.sent_messages = 0
+
+    def setFrame(self, frame, frame_id, parent_frame):
+        """ Adds or updates the kdl frame of frame_id, seen from parent_frame """
+        value = (parent_frame, (frame.p.x(), frame.p.y(), frame.p.z()), tuple(frame.M.GetQuaternion()))
+        if self.frames.get(frame_id) == value:
+            return
+        self.frames[frame_id] = value
+        self.changed.append(frame_id)
+
+    def _updateTransforms(self):
+        """ Builds the TransformStamped of the frames that changed. Returns the number of changed frames """
+        if not self.changed:
+            return 0
+        for frame_id in self.changed:
+            parent_frame, translation, rotation = self.frames[frame_id]
+            transform = TransformStamped()
+            transform.header.frame_id = parent_frame
+            transform.child_frame_id = frame_id
+            transform.transform.translation.x, transform.transform.translation.y, transform.transform.translation.z = translation
+            transform.transform.rotation.x, transform.transform.rotation.y, transform.transform.rotation.z, transform.transform.rotation.w = rotation
+            self.transforms[frame_id] = transform
+        self.transform_list = list(self.transforms.values())
+        changed = len(self.changed)
+        self.changed = []
+        return changed
+
+    def publish(self):
+        """ Called on every tick. Returns the number of frames that changed since the last call """
+        changed = self._updateTransforms()
+        if self.static and changed == 0:
+            return 0
+        stamp = rospy.get_rostime()
+        for transform in self.transform_list:
+            transform.header.stamp = stamp
+        #One message with all the frames. For /tf_static it has to contain all of them, as the latched topic only keeps the last message
+        self.broadcaster.sendTransform(self.transform_list)
+        self.sent_messages += 1
+        return changed
@@ -0,0 +1,271 @@
+import os
+import numpy as np
+from visualization_msgs.msg import Marker
+from elvez_platform import Platform
+from collectData import InputFilesDataCollector
+from stl_mesh import MeshLOD, canonicalMeshes
+from model_cache import CACHE_DIR_NAME
+from service_responses import ServiceResponses
+from sequence_compiler import CompiledSequence
+from elvez_pkg.srv import all_cad_componentsResponse
+import visualization as visualization
+import platform_model
+
+#CAD files of the cell: the reference frame of each one and the type of components added to the jigs structure
+CAD_KINDS = ('platform', 'combs', 'ATC')
+ROOT_FRAMES = {'platform': 'platform_rf', 'combs': 'combs_rf', 'ATC': 'ATC_rf'}
+KIND_TYPES = {'platform': platform_model.PLATFORM_TYPES, 'combs': platform_model.COMBS_TYPES, 'ATC': platform_model.ATC_TYPES}
+
+
+class UC2Model(object):
+    """
+    Model of the ELVEZ platform used by UC2_handler, without a ROS node: the CAD files, the input files and the jigs
+    structure with all the frames seen from the base frame, the responses of the info services, the operation sequence
+    and the markers and frames shown in RViz. The adapter (main_UC2) only gets the frames of the CAD files from tf, calls
+    build and forwards the service requests.
+    No ROS master is needed, but the responses and markers are ROS messages, so the messages of elvez_pkg, geometry_msgs
+    and visualization_msgs must be importable (built and sourced workspace).
+    cad_names has the names of the platform, combs and ATC CAD files, '' for the ones that are not used.
+    """
+    def __init__(self, files_path, cad_names, jigs_file, components_file, WH_file, seq_file, cache=None):
+        self.files_path = files_path
+        self.cache = cache
+        self.cad_names = dict(zip(CAD_KINDS, cad_names))
+        self.platforms = {}  #kind: Platform
+        for kind in self.kinds():
+            self.platforms[kind] = Platform(self.cad_names[kind], files_path, cache)
+        ids_files = [name + "_ids.wri" if name != "" else "" for name in cad_names]
+        self.dict_elvez = InputFilesDataCollector(files_path, ids_files[0], ids_files[1], ids_files[2], jigs_file, components_file, WH_file, seq_file, cache)
+        self.jigs_complete_dict = {}
+        self.service_responses = None
+        self.compiled_sequence = None
+        self.operation_index = 0
+
+    def kinds(self):
+        """ CAD files used, in the order of CAD_KINDS """
+        return [kind for kind in CAD_KINDS if self.cad_names.get(kind, "") != ""]
+
+    def transforms(self, kind):
+        if kind not in self.platforms:
+            return []
+        return self.platforms[kind].useful_transforms
+
+    #Generation of a complete dictionary for the jigs referring all their frames to the base_link
+    def build(self, root_frames):
+        """
+        Creates the jigs structure. root_frames has the kdl frame of the reference frame of each CAD file (ROOT_FRAMES)
+        seen from the base frame. Returns the jigs structure
+        """
+        scenes = [(self.platforms[kind], root_frames[kind], KIND_TYPES[kind]) for kind in self.kinds()]
+        self.jigs_complete_dict = platform_model.createJigsStruct(self.dict_elvez.dict_jigs, scenes)
+        return self.jigs_complete_dict
+
+    def responses(self):
+        """ Prebuilt responses of the info services, rebuilt if the platform model was rebuilt """
+        if self.service_responses is None or not self.service_responses.isBuiltFrom(self.jigs_complete_dict, self.dict_elvez):
+            self.service_responses = ServiceResponses(self.jigs_complete_dict, self.dict_elvez)
+        return self.service_responses
+
+    def compiled(self):
+        """ Operations of the sequence resolved, compiled again if the platform model was rebuilt """
+        responses = self.responses()
+        if self.compiled_sequence is None or not self.compiled_sequence.isBuiltFrom(responses):
+            self.compiled_sequence = CompiledSequence(responses)
+        return self.compiled_sequence
+
+    #Info services
+    def connectorInfo(self, label):
+        return self.responses().connectorInfo(label)
+
+    def cableInfo(self, label):
+        return self.responses().cableInfo(label)
+
+    def trayInfo(self, box, tray):
+        return self.responses().trayInfo(box, tray)
+
+    def guideInfo(self, jig, guide):
+        return self.responses().guideInfo(jig, guide)
+
+    def tapingSpotInfo(self, jig, spot):
+        return self.responses().tapingSpotInfo(jig, spot)
+
+    def jigInfo(self, jig):
+        return self.responses().jigInfo(jig)
+
+    def toolInfo(self, name):
+        return self.responses().toolInfo(name)
+
+    def allCadComponents(self):
+        """ Name of all the guides, taping spots and trays as 'component,keypoints,name' """
+        resp = all_cad_componentsResponse()
+        for elem in self.jigs_complete_dict:
+            elem_subtype = []
+            if elem[0] == 'J':
+                elem_subtype = ["guides", "tape_spots"]
+            if elem[0] == 'B':
+                elem_subtype = ["trays"]
+            for subtype in elem_subtype:
+                for subelem in self.jigs_complete_dict[elem][subtype]:
+                    resp.data.append(str(elem) + "," + str(subtype) + "," + str(subelem))
+        resp.success = True
+        return resp
+
+    #Operation sequence. operation_index is the next operation returned by nextOperation
+    def nextOperation(self):
+        """ Next operation of the sequence. A wrong operation is returned with success False and the sequence goes on """
+        compiled = self.compiled()
+        resp = compiled.nextOperation(self.operation_index)
+        if resp.end or self.operation_index >= len(compiled):
+            self.operation_index = 0
+        else:
+            self.operation_index += 1
+        return resp
+
+    def resetSequence(self):
+        self.operation_index = 0
+
+    def resetSequenceTo(self, index):
+        """ Moves the sequence to an operation. Returns False if the index is not in the sequence """
+        if index >= len(self.dict_elvez.list_seq):
+            return False
+        self.operation_index = index
+        return True
+
+    def indexOperation(self, index):
+        compiled = self.compiled()
+        resp = compiled.indexOperation(index)
+        self.operation_index = resp.index if 0 <= index < len(compiled) else 0
+        return resp
+
+    def allOperations(self):
+        self.operation_index = 0
+        return self.compiled().allOperations()
+
+    def resolveOperation(self, index):
+        return self.compiled().operation(index)
+
+    #RViz
+    def createMarkers(self, package_path, batch_keypoint_markers=True):
+        """
+        Markers of the mesh of every component of the CAD files and of their keypoints. package_path is the URL of the
+        folder with the STL files of each CAD file (e.g. file://<files_path>/stl/)
+        """
+        markers = []
+        for kind in self.kinds():
+            for trans in self.transforms(kind):
+                parent = trans.parent
+                path = package_path + kind + "/" + trans.getID().getCadID() + ".STL"
+                color = visualization.Color(0.5, 0.5, 0.5, 1)
+                if parent.isUseful():
+                    parent_name = parent.getName()
+                else:
+                    parent_name = ROOT_FRAMES[kind]
+                marker = visualization.createMesh(parent_name, mesh_path=path, transform=trans, color=color, scale=trans.scale)
+                marker.id = len(markers)
+                marker.text = trans.item_id.id_list[0]
+                markers.append(marker)
+                #Keypoints in RVIZ
+                for keypoints, color, text in self._keypoints(trans, KIND_TYPES[kind]):
+                    self._addKeypointMarkers(markers, trans.getName(), keypoints, color, text, batch_keypoint_markers)
+        return markers
+
+    def _keypoints(self, trans, types):
+        """ (list of (LazyFrameDict, key of the frame seen from the component), color, text) of each class of keypoints of a component """
+        commercial = trans.getCommercial()
+        trans_type = trans.getID().getType()
+        if commercial not in self.dict_elvez.dict_jigs or trans_type not in types:
+            return []
+        definition = self.dict_elvez.dict_jigs[commercial]
+        keypoints = []
+        if trans_type in (1, 3) and 'guides' in definition:
+            guides = definition['guides']
+            keypoints.append(([(guides[guide]['key'], 'center_pose') for guide in guides], visualization.Color(1, 0, 0, 1), "Keypoint guide"))
+        if trans_type == 1 and 'tape_spots' in definition:
+            tape_spots = definition['tape_spots']
+            keypoints.append(([(tape_spots[tape], 'center_pose') for tape in tape_spots], visualization.Color(0, 0, 1, 1), "Keypoint tape"))
+        if trans_type == 2 and 'trays' in definition:
+            trays = definition['trays']
+            keypoints.append(([(trays[tray], 'center_pose') for tray in trays], visualization.Color(0, 1, 0, 1), "Keypoint tray"))
+        if trans_type == 4:
+            keypoints.append(([(definition, 'frame_base')], visualization.Color(1, 0, 1, 1), "Keypoint tool base"))
+        return keypoints
+
+    def _addKeypointMarkers(self, markers, frame_id, keypoints, color, text, batch):
+        """ Adds the markers of one class of keypoints of a component, one SPHERE_LIST if batch """
+        if len(keypoints) == 0:
+            return
+        scaleKP = np.array([1, 1, 1])
+        if batch:
+            positions = np.array([frames.getMatrix(key)[:3, 3] for frames, key in keypoints])
+            new_markers = [visualization.createKeypointList(frame_id=frame_id, positions=positions, scale=scaleKP, color=color)]
+        else:
+            new_markers = [visualization.createKeypoint(frame_id=frame_id, transform=frames[key], scale=scaleKP, color=color) for frames, key in keypoints]
+        for keypoint in new_markers:
+            keypoint.id = len(markers)
+            keypoint.text = text
+            markers.append(keypoint)
+
+    def shareIdenticalMeshes(self, markers):
+        """
+        Points the mesh markers of byte-identical STL files to the same file, so RViz loads each mesh once.
+        The map is saved in the model cache together with the hashes of the STL files. Returns the map
+        """
+        mesh_markers = [marker for marker in markers if marker.type == Marker.MESH_RESOURCE]
+        paths = sorted(set(marker.mesh_resource[len('file://'):] for marker in mesh_markers))
+        paths = [path for path in paths if os.path.isfile(path)]
+        if self.cache is not None:
+            mesh_map = self.cache.getOrBuild('meshes', paths, lambda: canonicalMeshes(paths, self.cache.digests))
+        else:
+            mesh_map = canonicalMeshes(paths)
+        for marker in mesh_markers:
+            path = marker.mesh_resource[len('file://'):]
+            if path in mesh_map:
+                marker.mesh_resource = 'file://' + mesh_map[path]
+        return mesh_map
+
+    def applyMeshLevelsOfDetail(self, markers, triangle_budget):
+        """
+        Replaces the STL files of the mesh markers by low poly variants so all the meshes fit in triangle_budget.
+        Returns the totals of MeshLOD.report
+        """
+        mesh_markers = [marker for marker in markers if marker.type == Marker.MESH_RESOURCE]
+        paths = [marker.mesh_resource[len('file://'):] for marker in mesh_markers]
+        mesh_lod = MeshLOD(os.path.join(self.files_path, CACHE_DIR_NAME, 'meshes'))
+        levels = mesh_lod.assignLevels(paths, triangle_budget)
+        for marker, level in zip(mesh_markers, levels):
+            marker.mesh_resource = 'file://' + level[0]
+        rows, totals = mesh_lod.report(paths, levels)
+        return totals
+
+    def addPlatformFrames(self, tf_publisher):
+        """
+        Sets in tf_publisher (anything with setFrame(frame, frame_id, parent_frame)) the frames of all the components of
+        the CAD files and their keypoints, seen from their parent frames
+        """
+        for kind in self.kinds():
+            root = self.transforms(kind)[0].getRoot()
+            tf_publisher.setFrame(root, root.getName(), ROOT_FRAMES[kind])
+        for kind in self.kinds():
+            for trans_tf in self.transforms(kind):
+                tf_name = trans_tf.getName()
+                parent_tf = trans_tf.parent
+                if parent_tf.isUseful():
+                    tf_publisher.setFrame(trans_tf, tf_name, parent_tf.getName())
+                #Keypoints
+                commercial = trans_tf.getCommercial()
+                trans_type = trans_tf.getID().getType()
+                if commercial not in self.dict_elvez.dict_jigs or trans_type not in KIND_TYPES[kind]:
+                    continue
+                definition = self.dict_elvez.dict_jigs[commercial]
+                if trans_type in (1, 3) and 'guides' in definition:
+                    for guide in definition['guides']:
+                        tf_publisher.setFrame(definition['guides'][guide]['key']['center_pose'], tf_name + 'guide' + guide, tf_name)
+                if trans_type == 1 and 'tape_spots' in definition:
+                    for tape in definition['tape_spots']:
+                        tf_publisher.setFrame(definition['tape_spots'][tape]['center_pose'], tf_name + 'tape_spot' + tape, tf_name)
+                if trans_type == 2 and 'trays' in definition:
+                    for tray in definition['trays']:
+                        tf_publisher.setFrame(definition['trays'][tray]['center_pose'], tf_name + 'tray' + tray, tf_name)
+                if trans_type == 4:
+                    name = tf_name + '_ATC_base_' + self.jigs_complete_dict[trans_tf.getLabel()]['tool_name']
+                    tf_publisher.setFrame(definition['frame_base'], name, tf_name)
@@ -1,5 +1,6 @@
-import rospy
 from visualization_msgs.msg import Marker
+from geometry_msgs.msg import Point
+from std_msgs.msg import ColorRGBA
 import PyKDL 
 import numpy as np
 
@@ -57,5 +58,24 @@ def createKeypoint(frame_id, transform=PyKDL.Frame(), color=Color(1, 0, 0, 1), s
     marker.pose.orientation.y = quat[1] 
     marker.pose.orientation.z = quat[2] 
     marker.pose.orientation.w = quat[3] 
-    print("Working properly...")
+    return marker
+
+def createKeypointList(frame_id, positions, color=Color(1, 0, 0, 1), colors=None, scale=np.array([1, 1, 1]), name=""): 
+    """ Creates a single SPHERE_LIST Marker for several keypoints. positions is a Nx3 array and colors an optional Nx4 array (RGBA per keypoint) """ 
+    marker = Marker() 
+    marker.header.frame_id = frame_id 
+    marker.type = Marker.SPHERE_LIST
+    marker.action = marker.ADD 
+    marker.ns = name 
+    marker.color.r = color.r 
+    marker.color.g = color.g 
+    marker.color.b = color.b 
+    marker.color.a = color.a 
+    marker.scale.x = scale[0]*0.01
+    marker.scale.y = scale[1]*0.01
+    marker.scale.z = scale[2]*0.01
+    marker.pose.orientation.w = 1
+    marker.points = [Point(x, y, z) for x, y, z in np.asarray(positions, dtype=float).reshape(-1, 3).tolist()]
+    if colors is not None:
+        marker.colors = [ColorRGBA(r, g, b, a) for r, g, b, a in np.asarray(colors, dtype=float).reshape(-1, 4).tolist()]
     return marker
@@ -0,0 +1,8 @@
+def iterWriRows(path):
+    """ Yields (cad_id, label, commercial) for each line of a .wri ID file, reading the file only once """
+    with open(path) as rfile:
+        for line in rfile:
+            chunks = line.split('\t')
+            if len(chunks) < 3:  #Empty lines
+                continue
+            yield chunks[0].strip(), chunks[1].strip(), chunks[2].strip()